@@ -1,8 +1,10 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
+from .bulk import bulk_transition
 from .models import (
     Designer, Category, Tag, Season, Material, 
-    Clothing, ClothingHistory, UserPermission
+    Clothing, ClothingHistory, ClothingHistoryArchive, UserPermission
 )
 
 @admin.register(Designer)
@@ -48,11 +50,21 @@ class MaterialAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     readonly_fields = ['created_at']
 
+class RecentHistoryFormSet(BaseInlineFormSet):
+    """只显示最近的历史，完整历史在历史列表中按服装筛选查看"""
+    limit = 20
+
+    def get_queryset(self):
+        queryset = super().get_queryset().order_by('-created_at')
+        return queryset.filter(pk__in=list(queryset.values_list('pk', flat=True)[:self.limit]))
+
 class ClothingHistoryInline(admin.TabularInline):
     model = ClothingHistory
+    formset = RecentHistoryFormSet
     extra = 0
     readonly_fields = ['designer', 'action', 'description', 'changes', 'created_at']
     can_delete = False
+    verbose_name_plural = f'最近 {RecentHistoryFormSet.limit} 条修改历史'
 
 @admin.register(Clothing)
 class ClothingAdmin(admin.ModelAdmin):
@@ -91,9 +103,34 @@ class ClothingAdmin(admin.ModelAdmin):
         }),
     )
 
+    actions = ['publish_selected', 'archive_selected', 'make_public', 'make_private']
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('designer', 'category', 'season')
 
+    def run_bulk(self, request, queryset, operation):
+        """与 API 的批量操作共用同一实现（一条 UPDATE + 批量写历史）"""
+        result = bulk_transition(request.user, list(queryset.values_list('pk', flat=True)), operation)
+        self.message_user(
+            request, f'已处理 {len(result["updated"])} 件，{len(result["unchanged"])} 件无需修改'
+        )
+
+    @admin.action(description='发布所选服装')
+    def publish_selected(self, request, queryset):
+        self.run_bulk(request, queryset, 'publish')
+
+    @admin.action(description='归档所选服装')
+    def archive_selected(self, request, queryset):
+        self.run_bulk(request, queryset, 'archive')
+
+    @admin.action(description='公开所选服装')
+    def make_public(self, request, queryset):
+        self.run_bulk(request, queryset, 'make_public')
+
+    @admin.action(description='取消公开所选服装')
+    def make_private(self, request, queryset):
+        self.run_bulk(request, queryset, 'make_private')
+
 @admin.register(ClothingHistory)
 class ClothingHistoryAdmin(admin.ModelAdmin):
     list_display = ['clothing', 'designer', 'action', 'created_at']
@@ -107,6 +144,19 @@ class ClothingHistoryAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
+@admin.register(ClothingHistoryArchive)
+class ClothingHistoryArchiveAdmin(admin.ModelAdmin):
+    list_display = ['clothing', 'entry_count', 'first_at', 'last_at', 'updated_at']
+    search_fields = ['clothing__name', 'clothing__style_number']
+    exclude = ['data']
+    readonly_fields = ['clothing', 'entry_count', 'first_at', 'last_at', 'created_at', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @admin.register(UserPermission)
 class UserPermissionAdmin(admin.ModelAdmin):
     list_display = [
@@ -0,0 +1,134 @@
+"""
+基准测试公共部分：在本地启动 gunicorn、创建登录会话、并发发送请求、统计延迟分位数和峰值内存
+"""
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import CommandError
+from django.middleware.csrf import _get_new_csrf_string
+
+# 部署方式 -> SERVE_ASGI（gunicorn.conf.py 据此选择工作进程和应用）
+SERVERS = {
+    'wsgi': 'false',
+    'asgi': 'true',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(latencies):
+    """延迟列表（秒）-> 毫秒分位数"""
+    values = sorted(latencies)
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None}
+    return {name: round(percentile(values, fraction) * 1000, 2)
+            for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))}
+
+
+def create_session(user):
+    """直接创建登录会话，避免依赖登录页面"""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return session
+
+
+def auth_headers(session_key):
+    """会话 Cookie 及 CSRF Cookie/请求头（SessionAuthentication 的写请求需要）"""
+    csrf = _get_new_csrf_string()
+    return {
+        'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}; {settings.CSRF_COOKIE_NAME}={csrf}',
+        'X-CSRFToken': csrf,
+    }
+
+
+def own_peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def server_peak_rss_kb(pid):
+    """gunicorn 各工作进程峰值内存（VmHWM）中的最大值，仅 Linux"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as handle:
+            children = handle.read().split()
+        peaks = []
+        for child in children:
+            with open(f'/proc/{child}/status') as handle:
+                peaks += [int(line.split()[1]) for line in handle if line.startswith('VmHWM:')]
+        return max(peaks) if peaks else None
+    except OSError:
+        return None
+
+
+@contextmanager
+def local_server(kind, workers):
+    """在空闲端口上启动 gunicorn，产出 (根地址, 主进程 pid)"""
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), SERVE_ASGI=SERVERS[kind])
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--log-level', 'warning',
+    ]
+    process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        wait_ready(base, process)
+        yield base, process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def wait_ready(base, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('服务启动失败')
+        try:
+            urllib.request.urlopen(base + '/', timeout=5).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise CommandError('服务启动超时')
+
+
+def fetch(base, method, path, headers):
+    """发送一个请求，返回 (耗时, 是否成功)"""
+    request = urllib.request.Request(base + path, method=method, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+        ok = True
+    except (urllib.error.URLError, ConnectionError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_concurrently(base, requests, concurrency):
+    """requests 为 (method, path, headers) 列表，返回 (总耗时, [(耗时, 是否成功)])"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda item: fetch(base, *item), requests))
+    return time.perf_counter() - start, results
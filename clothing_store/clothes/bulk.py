@@ -0,0 +1,234 @@
+"""
+服装批量写入
+
+导入时先整体校验（关联 id 和款式号用几条集合查询预检），全部通过后在一个事务中
+用 bulk_create 写入服装、标签/面料关联、检索文档和历史记录；任一行有误则整批不写入。
+
+批量状态变更（发布、归档、公开、修改分类/季节）先查出有权限的服装，再 UPDATE 修改、bulk_create 写入历史；
+id 列表按 IN_CHUNK_SIZE 分块，每块一条查询和一条 UPDATE。
+bulk_create / update 不触发信号，写入后手动更新缓存版本号（一次写入全部作用域）、记录变更并更新设计师统计。
+"""
+import csv
+import io
+import json
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump
+from .changes import record
+from .models import Category, Clothing, ClothingHistory, Material, Season, Tag
+from .permissions import PermissionResolver
+from .search import index_rows
+from .serializers import ClothingImportSerializer
+from .stats import apply_changes, state
+from .tasks import generate_image_variants
+
+BATCH_SIZE = 1000
+# IN 查询的参数个数上限（低版本 SQLite 为 999）
+IN_CHUNK_SIZE = 900
+
+
+def parse_csv(upload):
+    """解析 CSV 上传文件：表头为 ClothingCreateSerializer 的字段名，标签/面料 id 用 | 分隔"""
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError('CSV 文件必须使用 UTF-8 编码')
+    rows = []
+    for number, record in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+        row = {}
+        for name, value in record.items():
+            if name is None:
+                continue
+            value = value or ''
+            if name in ('tags', 'materials'):
+                row[name] = [item for item in value.split('|') if item.strip()]
+            elif name in ('category', 'season'):
+                row[name] = value or None
+            elif name == 'additional_images':
+                try:
+                    row[name] = json.loads(value) if value else []
+                except ValueError:
+                    raise ValueError(f'第 {number} 行 additional_images 不是合法的 JSON')
+            else:
+                row[name] = value
+        rows.append(row)
+    return rows
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def pks_by_style_number(numbers):
+    """按款式号分批查询已存在的服装，返回 {款式号: id}"""
+    numbers = list(set(numbers))
+    found = {}
+    for chunk in chunked(numbers, IN_CHUNK_SIZE):
+        found.update(Clothing.objects.filter(style_number__in=chunk).values_list('style_number', 'pk'))
+    return found
+
+
+def known_references(rows):
+    """预先查出校验所需的集合：参考数据 id、已存在和批内重复的款式号"""
+    numbers = [str(row['style_number']) for row in rows if isinstance(row, dict) and row.get('style_number')]
+    existing = set(pks_by_style_number(numbers))
+    return {
+        'category': set(Category.objects.values_list('pk', flat=True)),
+        'season': set(Season.objects.values_list('pk', flat=True)),
+        'tags': set(Tag.objects.values_list('pk', flat=True)),
+        'materials': set(Material.objects.values_list('pk', flat=True)),
+        'existing_style_numbers': existing,
+        'duplicate_style_numbers': {number for number, count in Counter(numbers).items() if count > 1},
+    }
+
+
+def import_clothes(rows, designer):
+    """校验并批量创建服装，返回 (新建 id 列表, 逐行错误列表)；有错误时不写入任何数据"""
+    serializer = ClothingImportSerializer(data=rows, many=True, context={'known': known_references(rows)})
+    if not serializer.is_valid():
+        return [], [{'row': number, 'errors': errors} for number, errors in enumerate(serializer.errors, 1) if errors]
+    with transaction.atomic():
+        clothes = create_clothes(serializer.validated_data, designer)
+    bump('catalog')
+    return [clothing.pk for clothing in clothes], []
+
+
+def create_clothes(validated_rows, designer):
+    now = timezone.now()
+    clothes, relations = [], []
+    for attrs in validated_rows:
+        attrs = dict(attrs)
+        relations.append((list(dict.fromkeys(attrs.pop('tags'))), list(dict.fromkeys(attrs.pop('materials')))))
+        clothing = Clothing(
+            designer=designer, category_id=attrs.pop('category', None), season_id=attrs.pop('season', None), **attrs
+        )
+        # bulk_create 不调用 save()，在这里补上发布时间
+        if clothing.status == 'published':
+            clothing.published_at = now
+        clothes.append(clothing)
+
+    Clothing.objects.bulk_create(clothes, batch_size=BATCH_SIZE)
+    if clothes and clothes[0].pk is None:
+        # 数据库不支持 INSERT ... RETURNING 时按款式号取回主键
+        pks = pks_by_style_number([clothing.style_number for clothing in clothes])
+        for clothing in clothes:
+            clothing.pk = pks[clothing.style_number]
+
+    tag_through, material_through = Clothing.tags.through, Clothing.materials.through
+    tag_through.objects.bulk_create([
+        tag_through(clothing_id=clothing.pk, tag_id=tag_id)
+        for clothing, (tags, _) in zip(clothes, relations) for tag_id in tags
+    ], batch_size=BATCH_SIZE)
+    material_through.objects.bulk_create([
+        material_through(clothing_id=clothing.pk, material_id=material_id)
+        for clothing, (_, materials) in zip(clothes, relations) for material_id in materials
+    ], batch_size=BATCH_SIZE)
+
+    for start in range(0, len(clothes), BATCH_SIZE):
+        index_rows([
+            (clothing.pk, clothing.name, clothing.style_number, clothing.description)
+            for clothing in clothes[start:start + BATCH_SIZE]
+        ])
+
+    ClothingHistory.objects.bulk_create([
+        ClothingHistory(clothing=clothing, designer=designer, action='创建', description='批量导入')
+        for clothing in clothes
+    ], batch_size=BATCH_SIZE)
+
+    record([clothing.pk for clothing in clothes])
+    apply_changes([(None, state(clothing)) for clothing in clothes])
+
+    # bulk_create 不调用 save()，带图片的服装在提交后生成衍生图
+    for clothing in clothes:
+        if clothing.missing_variants():
+            transaction.on_commit(lambda pk=clothing.pk: generate_image_variants.delay(pk))
+    return clothes
+
+
+# 批量操作：名称 -> (所需权限, 修改的字段, 历史记录的操作类型)
+BULK_OPERATIONS = {
+    'publish': ('publish', 'status', '发布'),
+    'archive': ('edit', 'status', '归档'),
+    'make_public': ('edit', 'is_public', '公开'),
+    'make_private': ('edit', 'is_public', '取消公开'),
+    'set_category': ('edit', 'category_id', '修改分类'),
+    'set_season': ('edit', 'season_id', '修改季节'),
+}
+
+
+def operation_value(operation, value):
+    """操作对应的字段新值，参数无效时抛出 ValueError"""
+    if operation == 'publish':
+        return 'published'
+    if operation == 'archive':
+        return 'archived'
+    if operation in ('make_public', 'make_private'):
+        return operation == 'make_public'
+    model = Category if operation == 'set_category' else Season
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'无效的 id: {value}')
+    if not model.objects.filter(pk=value).exists():
+        raise ValueError(f'无效的 id: {value}')
+    return value
+
+
+def bulk_transition(user, clothing_ids, operation, value=None):
+    """对一组服装执行批量操作
+
+    返回 {'updated': 修改的 id, 'unchanged': 已处于目标状态的 id, 'denied': 无权限或不存在的 id}。
+    """
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f'不支持的操作，可选: {", ".join(BULK_OPERATIONS)}')
+    perm, field, history_action = BULK_OPERATIONS[operation]
+    new_value = operation_value(operation, value)
+
+    resolver = PermissionResolver(user)
+    # 发布时间用于更新设计师统计；id 按 IN_CHUNK_SIZE 分块查询，结果仍按 id 排序
+    rows = []
+    for chunk in chunked(sorted(set(clothing_ids)), IN_CHUNK_SIZE):
+        rows += resolver.filter(Clothing.objects.filter(pk__in=chunk), perm).order_by('pk').values_list(
+            'pk', 'designer_id', field, 'published_at'
+        )
+    permitted = {pk for pk, _, _, _ in rows}
+    targets = [row for row in rows if row[2] != new_value]
+    result = {
+        'updated': [pk for pk, _, _, _ in targets],
+        'unchanged': [pk for pk, _, old, _ in rows if old == new_value],
+        'denied': sorted(set(clothing_ids) - permitted),
+    }
+    if not targets:
+        return result
+
+    now = timezone.now()
+    fields = {field: new_value, 'updated_at': now}
+    if operation == 'publish':
+        fields['published_at'] = now
+    # 管理员没有设计师档案时，历史记在服装的设计师名下
+    designer = resolver.designer
+    with transaction.atomic():
+        for chunk in chunked(result['updated'], IN_CHUNK_SIZE):
+            Clothing.objects.filter(pk__in=chunk).update(**fields)
+        ClothingHistory.objects.bulk_create([
+            ClothingHistory(
+                clothing_id=pk, designer_id=designer.pk if designer else designer_id,
+                action=history_action, description='批量操作',
+                changes={field: {'old': str(old), 'new': str(new_value)}},
+            )
+            for pk, designer_id, old, _ in targets
+        ], batch_size=BATCH_SIZE)
+        record(result['updated'])
+        if field == 'status':
+            apply_changes([
+                ((designer_id, old, published_at), (designer_id, new_value, fields.get('published_at', published_at)))
+                for _, designer_id, old, published_at in targets
+            ])
+    bump('catalog', *[f'clothing:{pk}' for pk in result['updated']])
+    return result
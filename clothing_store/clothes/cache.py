@@ -0,0 +1,230 @@
+"""
+服装目录响应缓存
+
+两级缓存：L1 为进程内 LRU，L2 为 Django 的 'catalog' 缓存（生产环境 Redis，测试/开发为 locmem）。
+缓存键 = 接口 + 规范化查询参数 + 调用者可见性类别 + 相关作用域的版本号。
+数据变更时由 signals.py 更新对应作用域的版本号（见 bump），旧键自然失效，L1 也不会读到过期数据：
+- 'catalog'        任意服装或参考数据变更，列表类接口依赖
+- 'clothing:<id>'  单件服装变更，详情接口依赖
+- 'reference'      分类/季节/标签/面料/设计师变更，详情接口依赖
+- 'vis:<user_id>'  用户授权变更或到期，该用户的私有可见性依赖
+- 'refdata'        分类/季节/标签/面料变更，进程内参考数据副本（reference.py）依赖
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .metrics import CACHE_LOOKUPS
+from .visibility import next_expiry, visibility_class
+
+KEY_PREFIX = 'catalog'
+
+
+class LRUCache:
+    """线程安全的进程内 LRU 缓存"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+l1 = LRUCache(getattr(settings, 'CATALOG_CACHE_L1_SIZE', 1000))
+
+
+def l2():
+    return caches['catalog']
+
+
+def clear():
+    """清空两级缓存（测试和运维使用）"""
+    l1.clear()
+    l2().clear()
+
+
+def version_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def get_versions(scopes):
+    """一次读取多个作用域的版本号
+
+    缺失的版本号（首次使用或被缓存淘汰）以当前时间初始化，保证不会与淘汰前的旧键重合。
+    """
+    backend = l2()
+    keys = [version_key(scope) for scope in scopes]
+    found = backend.get_many(keys)
+    for key in keys:
+        if key not in found:
+            backend.add(key, time.time_ns(), timeout=None)
+            found[key] = backend.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    """更新作用域版本号，使依赖这些作用域的缓存全部失效
+
+    新版本号取当前时间（纳秒），一次 set_many 写入全部作用域（Redis 上为一次往返），
+    批量操作涉及上万件服装时也只访问一次缓存。
+    """
+    version = time.time_ns()
+    l2().set_many({version_key(scope): version for scope in set(scopes)}, timeout=None)
+
+
+def cached_visibility_class(user):
+    """缓存用户的可见性类别，授权或设计师档案变更时由 forget_visibility 清除
+
+    同时缓存最早的授权过期时间：过期后的第一次请求清除该用户的可见性缓存，
+    不依赖定时任务，授权到期后不会再返回包含该服装的缓存响应。
+    """
+    if user.is_staff or not user.is_authenticated:
+        return visibility_class(user)
+    key = f'{KEY_PREFIX}:visibility:{user.pk}'
+    cached = l2().get(key)
+    if cached is not None:
+        value, expires = cached
+        if expires is None or expires > timezone.now():
+            return value
+        forget_visibility(user.pk)
+    value = visibility_class(user)
+    expires = next_expiry(user) if value.startswith('user:') else None
+    l2().set(key, (value, expires), timeout=None)
+    return value
+
+
+def forget_visibility(user_id):
+    l2().delete(f'{KEY_PREFIX}:visibility:{user_id}')
+    bump(f'vis:{user_id}')
+
+
+def scopes_for(user, scopes):
+    """私有可见性的用户额外依赖自己的授权版本"""
+    vis = cached_visibility_class(user)
+    if vis.startswith('user:'):
+        scopes = list(scopes) + [f'vis:{user.pk}']
+    return vis, scopes
+
+
+def build_key(endpoint, request, vis, scopes):
+    params = sorted((name, value) for name, values in request.GET.lists() for value in values)
+    raw = urlencode([('host', request.get_host())] + params)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    versions = '.'.join(str(v) for v in get_versions(scopes))
+    return f'{KEY_PREFIX}:{endpoint}:{vis}:{digest}:{versions}'
+
+
+def lookup(key):
+    """先查 L1 再查 L2，返回 (值, 命中层级)"""
+    value = l1.get(key)
+    if value is not None:
+        CACHE_LOOKUPS.labels('l1', 'hit').inc()
+        return value, 'HIT-L1'
+    CACHE_LOOKUPS.labels('l1', 'miss').inc()
+    value = l2().get(key)
+    if value is not None:
+        CACHE_LOOKUPS.labels('l2', 'hit').inc()
+        l1.set(key, value)
+        return value, 'HIT-L2'
+    CACHE_LOOKUPS.labels('l2', 'miss').inc()
+    return None, 'MISS'
+
+
+def store(key, value):
+    l1.set(key, value)
+    l2().set(key, value, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+
+
+def cached_api_response(request, endpoint, scopes, build):
+    """缓存 DRF 响应数据，只缓存 200 响应"""
+    vis, scopes = scopes_for(request.user, scopes)
+    key = build_key(endpoint, request, vis, scopes)
+    data, status = lookup(key)
+    if data is not None:
+        response = Response(data)
+    else:
+        response = build()
+        if response.status_code == 200:
+            store(key, response.data)
+    response['X-Cache'] = status
+    return response
+
+
+def cache_page(endpoint, scopes):
+    """缓存页面视图的 HTML，scopes(request, **kwargs) 返回依赖的作用域
+
+    页面包含当前用户名，登录用户按用户单独缓存；有待显示消息时不使用缓存。
+    同时支持同步和异步视图，异步视图的缓存读写在线程中执行。
+    """
+    def decorator(view):
+        def find(request, *args, **kwargs):
+            """返回 (缓存键, 缓存的响应, 命中层级)，不使用缓存时返回 None"""
+            if request.method != 'GET' or len(messages.get_messages(request)):
+                return None
+            owner = f'user:{request.user.pk}' if request.user.is_authenticated else 'anon'
+            _, page_scopes = scopes_for(request.user, scopes(request, **kwargs))
+            key = build_key(endpoint, request, owner, page_scopes)
+            cached, status = lookup(key)
+            response = None
+            if cached is not None:
+                response = HttpResponse(cached['content'], content_type=cached['content_type'])
+            return key, response, status
+
+        def keep(key, response):
+            if response.status_code == 200 and not response.streaming:
+                store(key, {'content': response.content, 'content_type': response['Content-Type']})
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                found = await sync_to_async(find)(request, *args, **kwargs)
+                if found is None:
+                    return await view(request, *args, **kwargs)
+                key, response, status = found
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                    await sync_to_async(keep)(key, response)
+                response['X-Cache'] = status
+                return response
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                found = find(request, *args, **kwargs)
+                if found is None:
+                    return view(request, *args, **kwargs)
+                key, response, status = found
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                    keep(key, response)
+                response['X-Cache'] = status
+                return response
+        return wrapper
+    return decorator
@@ -0,0 +1,74 @@
+"""
+分类树（闭包表）
+
+CategoryClosure 保存每对 (祖先, 后代) 及层级差，Category.save() 负责维护：
+- 新建：复制父分类的祖先路径，再加上自身
+- 改变父分类：删除子树与原祖先之间的行，再插入新祖先 × 子树的组合
+- 删除：父分类外键级联删除子分类，闭包行随外键级联删除
+"某分类及其全部子分类"只需一次索引查询；分类树和面包屑直接由进程内参考数据（见 reference.py）生成。
+QuerySet.update(parent=...) 不会维护闭包表。
+"""
+from .models import CategoryClosure
+from .reference import reference, reference_for
+
+
+def insert_node(category):
+    rows = [CategoryClosure(ancestor_id=category.pk, descendant_id=category.pk, depth=0)]
+    if category.parent_id:
+        rows += [
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=category.pk, depth=depth + 1)
+            for ancestor_id, depth in CategoryClosure.objects.filter(
+                descendant_id=category.parent_id
+            ).values_list('ancestor_id', 'depth')
+        ]
+    CategoryClosure.objects.bulk_create(rows)
+
+
+def move_subtree(category):
+    subtree = list(CategoryClosure.objects.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth'))
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    if category.parent_id:
+        ancestors = CategoryClosure.objects.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth')
+        CategoryClosure.objects.bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ])
+
+
+def creates_cycle(category_id, parent_id):
+    """parent_id 是否是该分类自身或其后代"""
+    return CategoryClosure.objects.filter(ancestor_id=category_id, descendant_id=parent_id).exists()
+
+
+def descendants_q(category_id, field='category_id'):
+    """用于 filter(**...) 的条件：分类属于 category_id 的子树（含自身）"""
+    return {f'{field}__in': CategoryClosure.objects.filter(ancestor_id=category_id).values('descendant_id')}
+
+
+def in_category_tree(queryset, category_id):
+    return queryset.filter(**descendants_q(category_id))
+
+
+def category_path(category_id):
+    """从根到该分类的路径（面包屑），沿进程内参考数据的 parent_id 向上查找"""
+    categories = reference_for(categories=[category_id]).categories
+    path, node = [], categories.get(category_id)
+    while node is not None:
+        path.append({'id': node['id'], 'name': node['name']})
+        node = categories.get(node['parent_id'])
+    return path[::-1]
+
+
+def category_tree():
+    """完整的分类树，取自进程内参考数据，按名称排序"""
+    nodes = {
+        pk: {'id': pk, 'name': row['name'], 'description': row['description'], 'children': [], 'parent': row['parent_id']}
+        for pk, row in reference().categories.items()
+    }
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.pop('parent'))
+        (parent['children'] if parent else roots).append(node)
+    return roots
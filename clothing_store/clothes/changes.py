@@ -0,0 +1,106 @@
+"""
+服装增量同步（changes since）
+
+服装及其关联数据的每次变更都在 ClothingChange 中追加一条记录，记下写入事务的事务号 txid，
+游标是 (txid, id)，序列化为 "txid-id"（旧的纯数字游标按 (0, id) 解析）。
+
+自增 id 在插入时分配，长事务可能晚于更大的 id 提交，按 id 推进游标会跳过它们。
+PostgreSQL 上只返回 txid 低于当前快照 xmin（pg_snapshot_xmin）的记录：低于 xmin 的事务都已结束，
+之后不会再出现排在游标之前的记录；仍在进行的事务的记录连同其后事务的记录一起留到下次轮询。
+SQLite 的写事务串行提交，txid 恒为 0，id 顺序即提交顺序，不需要上界。
+
+非管理员分两次扫描公共记录（user 为空）和本人的记录（授权获得或失去），
+各走 (user, txid, id) 索引取前 limit 条后合并；没有变更时只是索引探测。
+
+一批变更按服装去重后，按调用者当前的可见性分为两类：
+- changed：当前可见，返回与列表接口相同的数据
+- deleted：已删除或不再可见（取消公开、授权撤销），只返回 id 作为墓碑
+"""
+from heapq import merge
+from itertools import islice
+
+from django.db import connection
+from django.db.models import BigIntegerField, Func, Q
+
+from .models import ClothingChange
+from .serializers import ClothingListFastSerializer
+from .visibility import visible_clothes
+
+
+class CurrentTransaction(Func):
+    """写入记录的事务号（PostgreSQL 13+ 的 pg_current_xact_id()）；其他数据库写事务串行提交，记为 0"""
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor != 'postgresql':
+            return '0', []
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+def record(clothing_ids, kind='upsert', user_id=None):
+    """追加变更记录"""
+    ClothingChange.objects.bulk_create([
+        ClothingChange(clothing_id=pk, kind=kind, user_id=user_id, txid=CurrentTransaction())
+        for pk in dict.fromkeys(clothing_ids)
+    ], batch_size=1000)
+
+
+def watermark():
+    """已结束事务的上界：PostgreSQL 当前快照的 xmin，低于它的事务都已提交或回滚；其他数据库返回 None"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+        return cursor.fetchone()[0]
+
+
+def parse_cursor(value):
+    """"txid-id" 或旧的纯数字游标，无效时抛出 ValueError"""
+    txid, _, pk = value.rpartition('-')
+    return int(txid or 0), int(pk)
+
+
+def format_cursor(cursor):
+    return '%d-%d' % cursor
+
+
+def latest_cursor():
+    """当前游标：PostgreSQL 上是 (xmin, 0)，之后提交的事务都排在它之后；否则是最后一条记录"""
+    bound = watermark()
+    if bound is not None:
+        return (bound, 0)
+    return ClothingChange.objects.order_by('-txid', '-id').values_list('txid', 'id').first() or (0, 0)
+
+
+def pending_events(user, since, limit):
+    """游标 since 之后、事务已结束的变更记录（最多 limit 条），返回 (服装 id 列表, 新游标, 是否还有更多)"""
+    txid, pk = since
+    events = ClothingChange.objects.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=pk))
+    bound = watermark()
+    if bound is not None:
+        events = events.filter(txid__lt=bound)
+    scans = [events] if user.is_staff else [events.filter(user__isnull=True), events.filter(user_id=user.pk)]
+    rows = list(islice(merge(*(
+        list(scan.order_by('txid', 'id').values_list('txid', 'id', 'clothing_id')[:limit + 1]) for scan in scans
+    )), limit + 1))
+
+    batch = rows[:limit]
+    cursor = batch[-1][:2] if batch else since
+    return list(dict.fromkeys(clothing_id for _, _, clothing_id in batch)), cursor, len(rows) > limit
+
+
+def changes_since(user, since, limit, context=None):
+    """增量同步的响应数据"""
+    clothing_ids, cursor, has_more = pending_events(user, since, limit)
+    changed = []
+    if clothing_ids:
+        rows = ClothingListFastSerializer.values(visible_clothes(user).filter(pk__in=clothing_ids).order_by('pk'))
+        changed = ClothingListFastSerializer(rows, context=context).data
+    visible_ids = {item['id'] for item in changed}
+    return {
+        'cursor': format_cursor(cursor),
+        'has_more': has_more,
+        'changed': changed,
+        'deleted': [pk for pk in clothing_ids if pk not in visible_ids],
+    }
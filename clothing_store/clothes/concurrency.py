@@ -0,0 +1,44 @@
+"""
+ASGI 下的 DRF 视图
+
+Django 在 ASGI 下把所有同步视图放到同一个线程中串行执行（thread_sensitive），
+而 DRF 3.14 没有异步视图，目录 API 在 ASGI 下反而只能一次处理一个请求。
+offload_reads 把只读请求（GET/HEAD）放到线程池中执行：每个线程使用自己的数据库连接，
+请求结束后按 CONN_MAX_AGE 关闭；写请求仍在共享线程中执行。
+只在 ASGI 下启用（SERVE_ASGI，由 clothing_store/asgi.py 设置），默认的 WSGI 部署下保持原样。
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .metrics import timed_render
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def run_view(view, request, *args, **kwargs):
+    """在当前线程中执行视图并渲染响应，结束后处理本线程的数据库连接"""
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            with timed_render():
+                response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def offload_reads(view, enabled=None):
+    if enabled is None:
+        enabled = getattr(settings, 'SERVE_ASGI', False)
+    if not enabled:
+        return view
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return await sync_to_async(run_view, thread_sensitive=False)(view, request, *args, **kwargs)
+        return await sync_to_async(view)(request, *args, **kwargs)
+    return wrapper
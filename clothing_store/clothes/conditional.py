@@ -0,0 +1,95 @@
+"""
+条件请求与 HTTP 缓存头
+
+ETag 只用 updated_at 和缓存版本号计算，不渲染响应体；客户端带 If-None-Match 命中时直接返回 304。
+响应不带 Last-Modified：列表删除或失去授权后 max(updated_at) 不变甚至变小，详情的标签/面料修改和参考数据改名
+也不改变 updated_at，时间戳无法表示响应的修改时间，变化完全由版本号体现在 ETag 中。
+匿名用户访问的公开服装页面带 Cache-Control: public，nginx 可以做短时缓存；其他响应为 private 并要求重新验证。
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .cache import get_versions
+
+VARY_HEADERS = ('Accept', 'Cookie', 'Authorization')
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def list_validators(request, scopes, owner=''):
+    """列表：版本号 + 查询参数"""
+    params = sorted((name, value) for name, values in request.GET.lists() for value in values)
+    return make_etag(get_versions(scopes), params, owner, request.META.get('HTTP_ACCEPT', ''))
+
+
+def detail_validators(request, updated_at, scopes, owner=''):
+    """详情：服装的 updated_at + 服装和关联参考数据的版本号"""
+    return make_etag(updated_at, get_versions(scopes), owner, request.META.get('HTTP_ACCEPT', ''))
+
+
+def conditional_response(request, etag, build, public=False):
+    """满足条件时返回 304，否则调用 build() 生成响应，并补充验证器和缓存头"""
+    response = not_modified(request, etag)
+    if response is None:
+        response = build()
+    return add_validators(request, response, etag, public)
+
+
+def not_modified(request, etag):
+    return get_conditional_response(request, etag=etag)
+
+
+def add_validators(request, response, etag, public=False):
+    if response.status_code not in (200, 304):
+        return response
+
+    response['ETag'] = etag
+    if public and not request.user.is_authenticated:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'PUBLIC_PAGE_MAX_AGE', 30))
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, VARY_HEADERS)
+    return response
+
+
+def page_owner(request):
+    """页面包含当前用户名，验证器按用户区分"""
+    return f'user:{request.user.pk}' if request.user.is_authenticated else 'anon'
+
+
+def conditional_page(validators):
+    """页面视图装饰器，validators(request, **kwargs) 返回 (etag, public) 或 None
+
+    同时支持同步和异步视图，异步视图的验证器（需要查询数据库）在线程中执行。
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                found = None
+                if request.method in ('GET', 'HEAD'):
+                    found = await sync_to_async(validators)(request, *args, **kwargs)
+                if found is None:
+                    return await view(request, *args, **kwargs)
+                etag, public = found
+                response = not_modified(request, etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return await sync_to_async(add_validators)(request, response, etag, public)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                found = validators(request, *args, **kwargs) if request.method in ('GET', 'HEAD') else None
+                if found is None:
+                    return view(request, *args, **kwargs)
+                etag, public = found
+                return conditional_response(request, etag, lambda: view(request, *args, **kwargs), public=public)
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+"""
+服装目录导出
+
+按 NDJSON 或 CSV 流式输出，数据库端使用服务端游标（iterator），每个分块用两条查询取出标签和面料的关联，
+分类、季节、标签、面料的名称取自进程内参考数据（见 reference.py），
+内存占用只与分块大小有关，与目录规模无关。
+ASGI 下 StreamingHttpResponse 会把同步迭代器一次读完再发送，因此改用 astream 按批从同步生成器取数据。
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from rest_framework import serializers
+
+from .models import Clothing
+from .reference import reference_for
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+EXPORT_FIELDS = [
+    'id', 'name', 'style_number', 'description', 'designer_name', 'category_name', 'season_name',
+    'gender', 'color', 'size_range', 'price_range', 'status', 'is_public', 'tags', 'materials',
+    'created_at', 'updated_at', 'published_at',
+]
+DATETIME_FIELDS = ('created_at', 'updated_at', 'published_at')
+
+
+def export_values(queryset):
+    return queryset.order_by('pk').values(
+        'id', 'name', 'style_number', 'description', 'gender', 'color', 'size_range', 'price_range',
+        'status', 'is_public', 'created_at', 'updated_at', 'published_at', 'category_id', 'season_id',
+        designer_name=F('designer__name'),
+    )
+
+
+def links_by_clothing(through, target, ids):
+    """一个分块内每件服装关联的标签/面料 id"""
+    links = {}
+    rows = through.objects.filter(clothing_id__in=ids).order_by('id').values_list('clothing_id', f'{target}_id')
+    for clothing_id, pk in rows:
+        links.setdefault(clothing_id, []).append(pk)
+    return links
+
+
+def export_rows(queryset, chunk_size=None):
+    """逐行产出导出记录（字典），按分块补充标签和面料"""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    to_datetime = serializers.DateTimeField().to_representation
+    rows = export_values(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        ids = [row['id'] for row in chunk]
+        tags = links_by_clothing(Clothing.tags.through, 'tag', ids)
+        materials = links_by_clothing(Clothing.materials.through, 'material', ids)
+        # 名称取自进程内参考数据
+        ref = reference_for(
+            categories=[row['category_id'] for row in chunk],
+            seasons=[row['season_id'] for row in chunk],
+            tags=[pk for pks in tags.values() for pk in pks],
+            materials=[pk for pks in materials.values() for pk in pks],
+        )
+        for row in chunk:
+            row['category_name'] = ref.category_name(row['category_id'])
+            row['season_name'] = ref.season_name(row['season_id'])
+            row['tags'] = [ref.tags[pk]['name'] for pk in tags.get(row['id'], [])]
+            row['materials'] = [ref.materials[pk]['name'] for pk in materials.get(row['id'], [])]
+            for name in DATETIME_FIELDS:
+                row[name] = to_datetime(row[name]) if row[name] else None
+            yield {name: row[name] for name in EXPORT_FIELDS}
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """csv.writer 的伪文件对象，writerow 直接返回写入的文本"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """CSV 以 BOM 开头，Excel 可正确识别中文；多值字段用 | 连接"""
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            '|'.join(row[name]) if name in ('tags', 'materials') else ('' if row[name] is None else row[name])
+            for name in EXPORT_FIELDS
+        ])
+
+
+def stream(queryset, export_format):
+    rows = export_rows(queryset)
+    return csv_lines(rows) if export_format == 'csv' else ndjson_lines(rows)
+
+
+async def astream(lines, batch_size=500):
+    """异步迭代器：每次在同一个同步线程中取一批行（服务端游标始终使用同一连接），取完一批发送一批"""
+    take = sync_to_async(lambda: ''.join(islice(lines, batch_size)), thread_sensitive=True)
+    try:
+        while chunk := await take():
+            yield chunk
+    finally:
+        # 客户端提前断开时关闭生成器，释放游标
+        await sync_to_async(lines.close, thread_sensitive=True)()
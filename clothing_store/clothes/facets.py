@@ -0,0 +1,86 @@
+"""
+服装分面统计
+
+分类、季节、性别、标签、面料的计数在一条 UNION ALL 查询中完成，
+每个分面是对同一个已过滤查询集的 GROUP BY，名称取自进程内参考数据。结果按 (可见性类别, 过滤条件) 缓存，
+目录数据变更后随版本号失效。
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import CharField, Count, F, Value
+
+from .cache import get_versions, l2, scopes_for
+from .models import Clothing
+from .reference import reference_for
+
+FACETS = ['category', 'season', 'gender', 'tags', 'materials']
+# 决定分面结果的查询参数，其余参数（分页、排序）不影响计数
+FACET_PARAMS = ['q', 'category', 'category__descendants_of', 'gender', 'season', 'color', 'tags', 'materials']
+
+
+def facet_querysets(queryset):
+    """每个分面的分组计数查询，列统一为 (facet, key, count)；名称由 compute_facets 从参考数据补充"""
+    base = queryset.order_by().values('pk')
+    tag_through = Clothing.tags.through.objects.filter(clothing_id__in=base)
+    material_through = Clothing.materials.through.objects.filter(clothing_id__in=base)
+    sources = [
+        ('category', queryset.order_by(), 'category_id'),
+        ('season', queryset.order_by(), 'season_id'),
+        ('gender', queryset.order_by(), 'gender'),
+        ('tags', tag_through, 'tag_id'),
+        ('materials', material_through, 'material_id'),
+    ]
+    return [
+        source.annotate(
+            facet=Value(name, output_field=CharField()),
+            key=F(key),
+        ).values('facet', 'key').annotate(count=Count('*')).values_list('facet', 'key', 'count')
+        for name, source, key in sources
+    ]
+
+
+# 分面 -> ReferenceData 上的映射
+REFERENCE_FACETS = {'category': 'categories', 'season': 'seasons', 'tags': 'tags', 'materials': 'materials'}
+
+
+def compute_facets(queryset):
+    """单次查询计算全部分面计数"""
+    first, *rest = facet_querysets(queryset)
+    rows = [row for row in first.union(*rest, all=True) if row[1] is not None]
+    ids = {}
+    for facet, key, _ in rows:
+        if facet in REFERENCE_FACETS:
+            ids.setdefault(REFERENCE_FACETS[facet], []).append(key)
+    ref = reference_for(**ids)
+    gender_labels = dict(Clothing.GENDER_CHOICES)
+    result = {name: [] for name in FACETS}
+    for facet, key, count in rows:
+        if facet == 'gender':
+            label = gender_labels.get(key, key)
+        else:
+            label = getattr(ref, REFERENCE_FACETS[facet])[key]['name']
+        result[facet].append({'id': key, 'name': label, 'count': count})
+    for values in result.values():
+        values.sort(key=lambda item: (-item['count'], str(item['name'])))
+    return result
+
+
+def facet_cache_key(user, params):
+    """缓存键：可见性类别 + 规范化后的过滤参数 + 目录版本号"""
+    vis, scopes = scopes_for(user, ['catalog'])
+    items = sorted((name, value) for name in FACET_PARAMS for value in params.getlist(name) if value)
+    digest = hashlib.md5(urlencode(items).encode()).hexdigest()
+    versions = '.'.join(str(v) for v in get_versions(scopes))
+    return f'clothes:facets:{vis}:{digest}:{versions}'
+
+
+def get_facets(user, params, queryset):
+    """读取或计算分面计数"""
+    key = facet_cache_key(user, params)
+    facets = l2().get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        l2().set(key, facets, getattr(settings, 'FACET_CACHE_TIMEOUT', 300))
+    return facets
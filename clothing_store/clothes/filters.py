@@ -0,0 +1,19 @@
+"""
+服装接口的过滤器
+"""
+import django_filters
+
+from .categories import in_category_tree
+from .models import Clothing
+
+
+class ClothingFilter(django_filters.FilterSet):
+    """在 filterset_fields 的基础上增加按分类子树过滤"""
+    category__descendants_of = django_filters.NumberFilter(method='filter_category_tree', label='分类及其子分类')
+
+    class Meta:
+        model = Clothing
+        fields = ['category', 'gender', 'season', 'designer', 'status', 'is_public']
+
+    def filter_category_tree(self, queryset, name, value):
+        return in_category_tree(queryset, value)
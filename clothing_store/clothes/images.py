@@ -0,0 +1,97 @@
+"""
+服装图片衍生图
+
+上传的原图（main_image 和 additional_images 中的每一项）由 Celery 任务生成多种尺寸、
+多种格式的衍生图，保存在原图目录下的 variants/ 中，存储名记录在 Clothing.image_variants：
+{原图存储名: {尺寸: {格式: 存储名}}}。页面和接口按需要的尺寸选用，没有衍生图时回退到原图。
+无法生成的原图记为 {原图存储名: {'error': 原因}}，不再重试。
+AVIF 需要安装 pillow-avif-plugin，不可用时跳过。
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  注册 AVIF 编码器
+except ImportError:
+    pass
+
+# 格式 -> (Pillow 格式名, 扩展名, MIME 类型, 保存参数)
+FORMATS = {
+    'avif': ('AVIF', 'avif', 'image/avif', {'quality': 60}),
+    'webp': ('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_sizes():
+    return getattr(settings, 'IMAGE_VARIANT_SIZES', {'thumb': 320, 'medium': 960})
+
+
+def variant_formats():
+    """配置的格式中当前 Pillow 能编码的部分"""
+    Image.init()
+    return [
+        name for name in getattr(settings, 'IMAGE_VARIANT_FORMATS', ['avif', 'webp', 'jpeg'])
+        if name in FORMATS and FORMATS[name][0] in Image.SAVE
+    ]
+
+
+def image_storage():
+    from .models import Clothing
+
+    return Clothing._meta.get_field('main_image').storage
+
+
+def variant_name(source, size, fmt):
+    directory, filename = os.path.split(source)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'variants', f'{stem}-{size}.{FORMATS[fmt][1]}')
+
+
+def image_sources(main_image, additional_images):
+    """需要生成衍生图的原图存储名"""
+    sources = [main_image] if main_image else []
+    sources += [item for item in additional_images or [] if isinstance(item, str) and item]
+    return list(dict.fromkeys(sources))
+
+
+def generate_variants(source, storage=None):
+    """为一张原图生成全部尺寸和格式的衍生图，返回 {尺寸: {格式: 存储名}}"""
+    storage = storage or image_storage()
+    with storage.open(source, 'rb') as handle:
+        original = ImageOps.exif_transpose(Image.open(handle))
+        original.load()
+
+    variants = {}
+    for size, max_side in variant_sizes().items():
+        image = original.copy()
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        variants[size] = {}
+        for fmt in variant_formats():
+            pil_format, _, _, options = FORMATS[fmt]
+            converted = image.convert('RGB') if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA') else image
+            buffer = BytesIO()
+            converted.save(buffer, pil_format, **options)
+            name = variant_name(source, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[size][fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_urls(variants, source, request=None):
+    """某张原图的衍生图地址 {尺寸: {格式: url}}，没有衍生图时为空字典"""
+    if not source or source not in (variants or {}) or 'error' in variants[source]:
+        return {}
+    storage = image_storage()
+    urls = {}
+    for size, formats in variants[source].items():
+        urls[size] = {}
+        for fmt, name in formats.items():
+            url = storage.url(name)
+            urls[size][fmt] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,27 @@
+"""
+归档过期的服装历史
+
+与定时任务 archive_clothing_history 相同，但一次处理完全部过期历史。
+用法: python manage.py archive_history [--days 180] [--chunk-size 1000]
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clothes.retention import archive_history
+
+
+class Command(BaseCommand):
+    help = '把早于保留期限的服装历史分块归档到 ClothingHistoryArchive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='保留天数，默认使用 HISTORY_RETENTION_DAYS')
+        parser.add_argument('--chunk-size', type=int, help='每个事务处理的历史条数')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days']) if options['days'] is not None else None
+        start = time.perf_counter()
+        total, _ = archive_history(cutoff=cutoff, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'已归档 {total} 条历史，耗时 {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,78 @@
+"""
+WSGI / ASGI 并发吞吐对比
+
+依次以 gunicorn 同步工作进程（WSGI，默认部署方式）和 uvicorn 工作进程（ASGI，SERVE_ASGI=true）
+在本地启动服务，用多个并发连接请求列表页和目录 API（列表、详情、检索），报告吞吐量和延迟分位数。
+使用当前数据库中的数据，应先准备接近生产规模的数据；API 请求以 --user 的会话身份发送。
+默认每个请求带不同的查询参数绕过响应缓存，测量的是实际的查询和渲染。
+用法: python manage.py benchmark_asgi --workers 3 --concurrency 50 --requests 2000 [--user 用户名]
+"""
+import urllib.parse
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from clothes.benchmarking import SERVERS, auth_headers, create_session, local_server, run_concurrently, summarize
+from clothes.models import Clothing
+
+
+class Command(BaseCommand):
+    help = '对比 WSGI 与 ASGI 部署下目录接口的并发吞吐'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=3, help='工作进程数')
+        parser.add_argument('--concurrency', type=int, default=50, help='并发连接数')
+        parser.add_argument('--requests', type=int, default=2_000, help='每种部署发送的请求数')
+        parser.add_argument('--user', help='发送 API 请求的用户，默认使用第一个管理员')
+        parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+        parser.add_argument('--allow-cache', action='store_true', help='不绕过响应缓存')
+
+    def handle(self, *args, **options):
+        clothing = Clothing.objects.filter(is_public=True).order_by('-created_at').first()
+        if clothing is None:
+            raise CommandError('没有公开的服装，请先准备数据')
+        session = create_session(self.get_user(options['user']))
+        paths = [
+            '/',
+            '/api/clothes/',
+            f'/api/clothes/{clothing.pk}/',
+            f'/api/clothes/search/?q={urllib.parse.quote(clothing.style_number)}',
+        ]
+        headers = auth_headers(session.session_key)
+        requests = []
+        for n in range(options['requests']):
+            path = paths[n % len(paths)]
+            if not options['allow_cache']:
+                path += ('&' if '?' in path else '?') + f'bench={n}'
+            # 页面以匿名用户请求，API 带会话
+            requests.append(('GET', path, headers if path.startswith('/api/') else {}))
+        try:
+            for kind in options['servers']:
+                with local_server(kind, options['workers']) as (base, _):
+                    elapsed, results = run_concurrently(base, requests, options['concurrency'])
+                self.report(kind, elapsed, results)
+        finally:
+            session.delete()
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'用户不存在: {username}')
+        user = User.objects.filter(is_staff=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('没有管理员用户，请用 --user 指定')
+        return user
+
+    def report(self, kind, elapsed, results):
+        latencies = [latency for latency, ok in results if ok]
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f'[{kind}] 全部请求失败'))
+            return
+        errors = len(results) - len(latencies)
+        summary = summarize(latencies)
+        self.stdout.write(self.style.SUCCESS(
+            f'[{kind}] {len(results) / elapsed:.1f} 请求/秒, 失败 {errors}, '
+            f'p50 {summary["p50"]:.0f}ms, p95 {summary["p95"]:.0f}ms, p99 {summary["p99"]:.0f}ms'
+        ))
@@ -0,0 +1,192 @@
+"""
+接口基准测试
+
+在可复现的数据集（见 clothes/seeding.py，1k / 100k / 1m）上测试主要接口，分两种方式运行：
+- client: Django 测试客户端逐个请求，记录延迟分位数、每个请求的 SQL 查询数、本进程峰值内存
+- http:   本地启动 gunicorn（--server，默认与生产相同的 WSGI），并发请求，记录延迟分位数、吞吐量、工作进程峰值内存
+结果与基线 JSON 比较，任一指标退化超过 --threshold（查询数为任何增加）时命令失败。
+
+应在专用数据库上运行（DATABASE_URL=sqlite:////tmp/bench.sqlite3 或 PostgreSQL），
+数据集不存在时自动生成；数据库中已有其他数据时拒绝运行。发布接口改动的数据在结束后恢复。
+SQLite 不支持并发写，http 方式的发布请求会出现 database is locked，写接口应在 PostgreSQL 上测量。
+用法:
+    python manage.py benchmark_endpoints --size 100k --save-baseline
+    python manage.py benchmark_endpoints --size 100k --threshold 0.2
+"""
+import json
+import time
+import urllib.parse
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from clothes import cache, stats
+from clothes.benchmarking import (
+    SERVERS, auth_headers, create_session, local_server, own_peak_rss_kb, run_concurrently, server_peak_rss_kb,
+    summarize,
+)
+from clothes.models import Clothing, ClothingHistory
+from clothes.seeding import CatalogSeeder, dataset_name, existing_dataset, parse_size
+
+ENDPOINTS = ['clothes_list', 'search', 'history', 'clothing_list', 'publish']
+# 数值越大越差的指标；吞吐量越小越差
+HIGHER_IS_WORSE = ['p50', 'p95', 'p99', 'peak_rss_kb']
+
+
+class Command(BaseCommand):
+    help = '在可复现数据集上测试主要接口并与基线比较'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', default='1k', help='数据规模：1k / 100k / 1m 或服装数量')
+        parser.add_argument('--seed', type=int, default=42, help='数据生成的随机种子')
+        parser.add_argument('--requests', type=int, default=200, help='每个接口每种方式的请求数')
+        parser.add_argument('--concurrency', type=int, default=20, help='http 方式的并发连接数')
+        parser.add_argument('--workers', type=int, default=3, help='http 方式的工作进程数')
+        parser.add_argument('--server', choices=list(SERVERS), default='wsgi', help='http 方式的部署方式')
+        parser.add_argument('--modes', nargs='+', choices=['client', 'http'], default=['client', 'http'])
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS)
+        parser.add_argument('--baseline', help='基线文件，默认 benchmarks/baseline-<size>.json')
+        parser.add_argument('--save-baseline', action='store_true', help='把本次结果写为基线')
+        parser.add_argument('--threshold', type=float, default=0.2, help='允许的退化比例，默认 20%%')
+        parser.add_argument('--output', help='另外把本次结果写入该文件')
+
+    def handle(self, *args, **options):
+        size = parse_size(options['size'])
+        self.ensure_dataset(size, options['seed'])
+        self.prepare(size, options)
+
+        results = {'size': size, 'seed': options['seed'], 'database': connection.vendor, 'endpoints': {}}
+        try:
+            for name in options['endpoints']:
+                results['endpoints'][name] = {}
+                if 'client' in options['modes']:
+                    results['endpoints'][name]['client'] = self.run_client(name, options['requests'])
+                    self.restore()
+            if 'http' in options['modes']:
+                self.run_http(results, options)
+        finally:
+            self.restore()
+            self.session.delete()
+
+        for name, modes in results['endpoints'].items():
+            for mode, values in modes.items():
+                self.stdout.write(f'{name:14} {mode:6} ' + ', '.join(f'{k}={v}' for k, v in values.items()))
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, ensure_ascii=False, indent=2))
+
+        baseline = Path(options['baseline'] or settings.BASE_DIR / 'benchmarks' / f'baseline-{options["size"]}.json')
+        if options['save_baseline']:
+            baseline.parent.mkdir(parents=True, exist_ok=True)
+            baseline.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+            self.stdout.write(self.style.SUCCESS(f'基线已写入 {baseline}'))
+        elif baseline.exists():
+            self.compare(json.loads(baseline.read_text()), results, options['threshold'])
+        else:
+            self.stdout.write(self.style.WARNING(f'没有基线 {baseline}，使用 --save-baseline 生成'))
+
+    def ensure_dataset(self, size, seed):
+        name = dataset_name(size, seed)
+        found = existing_dataset()
+        if found == name:
+            return
+        if found is not None or Clothing.objects.exists():
+            raise CommandError(f'数据库中已有其他数据（{found or "非基准数据"}），请使用专用数据库')
+        start = time.perf_counter()
+        counts = CatalogSeeder(size, seed).run()
+        self.stdout.write(f'已生成数据集 {name}: {counts}，耗时 {time.perf_counter() - start:.1f}s')
+
+    def prepare(self, size, options):
+        """固定的测试对象：第一位设计师、其第一件服装（历史）、其草稿（发布）"""
+        self.user = User.objects.get(username='designer00000')
+        designer = self.user.designer_profile
+        own = Clothing.objects.filter(designer=designer)
+        self.history_id = own.order_by('pk').values_list('pk', flat=True).first()
+        self.publish_ids = list(
+            own.filter(status='draft').order_by('pk').values_list('pk', flat=True)[:options['requests']]
+        )
+        if not self.publish_ids:
+            raise CommandError('数据集中没有可发布的草稿')
+        sample = Clothing.objects.order_by('pk').values_list('name', flat=True).first()
+        self.search_query = urllib.parse.quote(sample)
+        self.session = create_session(self.user)
+        self.headers = auth_headers(self.session.session_key)
+
+    def request_for(self, name, n):
+        """第 n 个请求的 (方法, 路径, 是否登录)；GET 带不同参数绕过响应缓存"""
+        if name == 'publish':
+            return 'POST', f'/api/clothes/{self.publish_ids[n % len(self.publish_ids)]}/publish/', True
+        path = {
+            'clothes_list': '/api/clothes/',
+            'search': f'/api/clothes/search/?q={self.search_query}',
+            'history': f'/api/clothes/{self.history_id}/history/',
+            # 列表页以匿名用户访问
+            'clothing_list': '/',
+        }[name]
+        return 'GET', path + ('&' if '?' in path else '?') + f'bench={n}', name != 'clothing_list'
+
+    def run_client(self, name, count):
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        anonymous, logged_in = Client(HTTP_HOST=host), Client(HTTP_HOST=host)
+        logged_in.force_login(self.user)
+        latencies, queries = [], []
+        for n in range(count):
+            method, path, auth = self.request_for(name, n)
+            client = logged_in if auth else anonymous
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.generic(method, path)
+            latencies.append(time.perf_counter() - start)
+            queries.append(len(ctx.captured_queries))
+            if response.status_code >= 400:
+                raise CommandError(f'{name} 返回 {response.status_code}: {path}')
+        return {**summarize(latencies), 'queries': max(queries), 'peak_rss_kb': own_peak_rss_kb()}
+
+    def run_http(self, results, options):
+        with local_server(options['server'], options['workers']) as (base, pid):
+            for name in options['endpoints']:
+                requests = []
+                for n in range(options['requests']):
+                    method, path, auth = self.request_for(name, n)
+                    requests.append((method, path, self.headers if auth else {}))
+                elapsed, outcomes = run_concurrently(base, requests, options['concurrency'])
+                latencies = [latency for latency, ok in outcomes if ok]
+                results['endpoints'][name]['http'] = {
+                    **summarize(latencies),
+                    'rps': round(len(outcomes) / elapsed, 1),
+                    'errors': len(outcomes) - len(latencies),
+                    'peak_rss_kb': server_peak_rss_kb(pid),
+                }
+
+    def restore(self):
+        """撤销发布接口造成的改动，保证多次运行的数据一致"""
+        Clothing.objects.filter(pk__in=self.publish_ids).update(status='draft', published_at=None)
+        ClothingHistory.objects.filter(clothing_id__in=self.publish_ids, action='发布').delete()
+        stats.rebuild([self.user.designer_profile.pk])
+        cache.clear()
+
+    def compare(self, baseline, results, threshold):
+        if (baseline.get('size'), baseline.get('seed')) != (results['size'], results['seed']):
+            raise CommandError('基线的数据集与本次不同')
+        regressions = []
+        for name, modes in results['endpoints'].items():
+            for mode, values in modes.items():
+                base = baseline['endpoints'].get(name, {}).get(mode)
+                if not base:
+                    continue
+                for metric in HIGHER_IS_WORSE:
+                    if base.get(metric) and values.get(metric) and values[metric] > base[metric] * (1 + threshold):
+                        regressions.append(f'{name}/{mode} {metric}: {base[metric]} -> {values[metric]}')
+                if 'queries' in base and values['queries'] > base['queries']:
+                    regressions.append(f'{name}/{mode} queries: {base["queries"]} -> {values["queries"]}')
+                if base.get('rps') and values['rps'] < base['rps'] * (1 - threshold):
+                    regressions.append(f'{name}/{mode} rps: {base["rps"]} -> {values["rps"]}')
+                if values.get('errors'):
+                    regressions.append(f'{name}/{mode} 失败请求: {values["errors"]}')
+        if regressions:
+            raise CommandError('性能退化超过阈值:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'未超过基线 {threshold:.0%} 的退化阈值'))
@@ -0,0 +1,79 @@
+"""
+列表序列化基准测试
+
+在事务中生成测试数据（结束后回滚），对比 ClothingListSerializer 与 values() 快速序列化的每行耗时。
+用法: python manage.py benchmark_serializers --sizes 100 1000 10000
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from clothes.models import Category, Clothing, Designer, Season, Tag
+from clothes.serializers import ClothingListFastSerializer, ClothingListSerializer
+from clothes.views import with_eager_loading
+
+
+class Rollback(Exception):
+    """用于在基准测试结束后回滚事务"""
+
+
+class Command(BaseCommand):
+    help = '对比服装列表两种序列化方式的性能'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000], help='每轮序列化的行数')
+        parser.add_argument('--repeat', type=int, default=3, help='每种方式重复次数')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                designer = self.seed(max(options['sizes']), options['batch_size'])
+                for size in options['sizes']:
+                    self.report(designer, size, options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('测试数据已回滚')
+
+    def seed(self, count, batch_size):
+        owner = User.objects.create(username='bench_serializer_owner')
+        designer = Designer.objects.create(user=owner, name='bench', email='bench@example.com')
+        category = Category.objects.create(name='bench-category')
+        season = Season.objects.create(name='bench-season')
+        tags = Tag.objects.bulk_create([Tag(name=f'bench-tag-{i}') for i in range(3)])
+        for offset in range(0, count, batch_size):
+            Clothing.objects.bulk_create([
+                Clothing(
+                    name=f'bench-{i}', style_number=f'BENCH-S-{i:08d}', description='', color='red',
+                    designer=designer, category=category, season=season,
+                    main_image='clothing_images/bench.jpg',
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+        through = Clothing.tags.through
+        ids = Clothing.objects.filter(designer=designer).values_list('pk', flat=True)
+        through.objects.bulk_create(
+            [through(clothing_id=pk, tag_id=tag.pk) for pk in ids for tag in tags], batch_size=batch_size
+        )
+        return designer
+
+    def report(self, designer, size, repeat):
+        queryset = Clothing.objects.filter(designer=designer).order_by('-created_at', '-id')
+        builders = [
+            ('ClothingListSerializer', lambda: ClothingListSerializer(
+                with_eager_loading(queryset, 'list')[:size], many=True).data),
+            ('values() 快速序列化', lambda: ClothingListFastSerializer(
+                ClothingListFastSerializer.values(queryset)[:size]).data),
+        ]
+        for label, build in builders:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                build()
+                times.append(time.perf_counter() - start)
+            median = sorted(times)[repeat // 2]
+            self.stdout.write(
+                f'{size} 行 {label}: 中位数 {median * 1000:.1f}ms, 每行 {median / size * 1e6:.1f}µs'
+            )
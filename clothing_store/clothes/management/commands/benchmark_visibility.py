@@ -0,0 +1,103 @@
+"""
+可见性查询基准测试
+
+在事务中生成测试数据（结束后回滚），对比旧的 OR + DISTINCT 实现与 EXISTS 谓词的耗时。
+用法: python manage.py benchmark_visibility --clothes 1000000 --grants 100000
+"""
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from clothes.models import Clothing, Designer, UserPermission
+from clothes.visibility import visible_clothes
+
+
+class Rollback(Exception):
+    """用于在基准测试结束后回滚事务"""
+
+
+def legacy_visible_clothes(user):
+    """旧实现：多个查询集 OR 合并后 DISTINCT"""
+    queryset = Clothing.objects.filter(is_public=True)
+    try:
+        queryset = queryset | Clothing.objects.filter(designer=user.designer_profile)
+    except Designer.DoesNotExist:
+        pass
+    user_permissions = UserPermission.objects.filter(user=user, can_view=True, expires_at__isnull=True)
+    if user_permissions.exists():
+        queryset = queryset | Clothing.objects.filter(userpermission__in=user_permissions)
+    return queryset.distinct()
+
+
+class Command(BaseCommand):
+    help = '对比服装可见性查询新旧实现的性能'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clothes', type=int, default=1_000_000, help='服装数量')
+        parser.add_argument('--grants', type=int, default=100_000, help='授权记录数量')
+        parser.add_argument('--users', type=int, default=1_000, help='被授权用户数量')
+        parser.add_argument('--repeat', type=int, default=5, help='每个查询重复次数')
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options)
+                self.report(user, options['repeat'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write('测试数据已回滚')
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+
+        owner = User.objects.create(username='bench_owner')
+        designer = Designer.objects.create(user=owner, name='bench', email='bench@example.com')
+        users = User.objects.bulk_create(
+            [User(username=f'bench_user_{i}') for i in range(options['users'])], batch_size=batch_size
+        )
+
+        for offset in range(0, options['clothes'], batch_size):
+            Clothing.objects.bulk_create([
+                Clothing(
+                    name=f'bench-{i}', style_number=f'BENCH-{i:08d}', description='', color='',
+                    designer=designer, main_image='', is_public=rng.random() < 0.3,
+                )
+                for i in range(offset, min(offset + batch_size, options['clothes']))
+            ])
+
+        clothing_ids = list(Clothing.objects.filter(designer=designer).values_list('pk', flat=True))
+        pairs = set()
+        while len(pairs) < min(options['grants'], len(users) * len(clothing_ids)):
+            pairs.add((rng.choice(users).pk, rng.choice(clothing_ids)))
+        UserPermission.objects.bulk_create(
+            [UserPermission(user_id=u, clothing_id=c, can_view=True) for u, c in pairs], batch_size=batch_size
+        )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        self.stdout.write(f'数据生成耗时 {time.perf_counter() - start:.1f}s')
+        return users[0]
+
+    def report(self, user, repeat):
+        for label, build in [('旧实现 OR+DISTINCT', legacy_visible_clothes), ('EXISTS 谓词', visible_clothes)]:
+            count_times, page_times = [], []
+            for _ in range(repeat):
+                queryset = build(user)
+                start = time.perf_counter()
+                total = queryset.count()
+                count_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                list(queryset.order_by('-created_at')[:20])
+                page_times.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{label}: 共 {total} 条, COUNT 中位数 {sorted(count_times)[repeat // 2] * 1000:.1f}ms, '
+                f'首页 中位数 {sorted(page_times)[repeat // 2] * 1000:.1f}ms'
+            )
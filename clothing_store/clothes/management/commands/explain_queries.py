@@ -0,0 +1,89 @@
+"""
+检查各接口典型查询的执行计划
+
+对每个接口的代表性查询执行 EXPLAIN，报告其中的全表扫描。
+数据量很小时数据库可能仍然选择全表扫描，应在接近生产规模的数据上运行。
+用法: python manage.py explain_queries [--user 用户名] [--verbose-plans]
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from clothes.models import Clothing, ClothingChange, ClothingHistory, UserPermission
+from clothes.pagination import KeysetPagination
+from clothes.views import with_eager_loading
+from clothes.visibility import unexpired_q, visible_clothes
+
+# PostgreSQL: "Seq Scan on clothes_clothing"；SQLite: "SCAN clothes_clothing"（不含 USING INDEX）
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)'),
+}
+
+
+class Command(BaseCommand):
+    help = '对各接口的典型查询执行 EXPLAIN 并报告全表扫描'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='以该用户的可见性规则生成查询，默认使用第一个非管理员用户')
+        parser.add_argument('--verbose-plans', action='store_true', help='输出完整执行计划')
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'不支持的数据库: {connection.vendor}')
+
+        user = self.get_user(options['user'])
+        queries = self.canonical_queries(user)
+        problems = 0
+        for name, queryset in queries:
+            plan = queryset.explain()
+            scans = sorted(set(pattern.findall(plan)))
+            if scans:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f'[全表扫描] {name}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'[索引] {name}'))
+            if options['verbose_plans']:
+                self.stdout.write(plan + '\n')
+
+        self.stdout.write(f'共检查 {len(queries)} 个查询，{problems} 个存在全表扫描')
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'用户不存在: {username}')
+        # 没有用户时使用未保存的普通用户，仅用于生成查询
+        return User.objects.filter(is_staff=False).first() or User(pk=0, username='explain')
+
+    def canonical_queries(self, user):
+        visible = visible_clothes(user)
+        sample = Clothing.objects.order_by('-created_at').first()
+        created_at = sample.created_at if sample else timezone.now()
+        page_size = KeysetPagination.page_size
+
+        return [
+            ('clothes list (staff)', Clothing.objects.order_by('-created_at', '-id')[:page_size]),
+            ('clothes list (visible)', visible.order_by('-created_at', '-id')[:page_size]),
+            ('clothes list filter status', visible.filter(status='published').order_by('-created_at')[:page_size]),
+            ('clothes list filter category', visible.filter(category_id=1).order_by('-created_at')[:page_size]),
+            ('clothes list filter season', visible.filter(season_id=1).order_by('-created_at')[:page_size]),
+            ('clothes list filter designer', visible.filter(designer_id=1).order_by('-created_at')[:page_size]),
+            ('clothes list filter gender', visible.filter(gender='F').order_by('-created_at')[:page_size]),
+            ('clothes public', Clothing.objects.filter(is_public=True).order_by('-created_at', '-id')[:page_size]),
+            ('clothes keyset deep page',
+             visible.filter(created_at__lt=created_at).order_by('-created_at', '-id')[:page_size]),
+            ('clothes order by updated_at', visible.order_by('-updated_at', '-id')[:page_size]),
+            ('clothes order by name', visible.order_by('name', 'id')[:page_size]),
+            ('clothes retrieve', with_eager_loading(visible, 'retrieve').filter(pk=1)),
+            ('clothes history', ClothingHistory.objects.filter(clothing_id=1).order_by('-created_at')),
+            ('history list', ClothingHistory.objects.order_by('-created_at', '-id')[:page_size]),
+            ('permission check', UserPermission.objects.filter(unexpired_q(), user_id=user.pk, clothing_id=1, can_view=True)),
+            ('changes since', ClothingChange.objects.filter(Q(user__isnull=True), Q(txid__gt=0) | Q(txid=0, id__gt=0)).order_by('txid', 'id')[:500]),
+        ]
@@ -0,0 +1,24 @@
+"""
+全量重算设计师统计
+
+统计由服装的保存、删除和批量操作增量维护；直接修改数据库或绕过 stats.apply_changes 的写入会造成漂移，
+用本命令按服装表重算全部（或指定）设计师的统计行。
+用法: python manage.py rebuild_designer_stats [--designer 1 2 ...]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from clothes.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = '按服装表重算设计师统计（DesignerStats）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--designer', type=int, nargs='+', help='只重算这些设计师，默认全部')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = rebuild(options['designer'])
+        self.stdout.write(self.style.SUCCESS(f'已重算 {count} 位设计师的统计，耗时 {time.perf_counter() - start:.1f}s'))
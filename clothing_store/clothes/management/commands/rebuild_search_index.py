@@ -0,0 +1,22 @@
+"""
+重建服装全文检索索引
+
+用法: python manage.py rebuild_search_index [--batch-size 1000]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from clothes.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = '重建服装全文检索文档（PostgreSQL tsvector / SQLite FTS5）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的服装数量')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        total = rebuild_index(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'检索索引重建完成：{total} 件服装，耗时 {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,177 @@
+"""
+请求指标
+
+MetricsMiddleware 为每个请求记录：耗时（按视图、方法、状态码）、SQL 查询数和 SQL 耗时、
+序列化耗时（视图中 DRF serializer.data，见 timed_serialize）、响应渲染耗时（转为 JSON / 模板渲染）、
+响应大小，并以 Server-Timing 头返回给客户端。
+目录缓存（cache.py）按层级记录命中和未命中次数。指标汇总在 /metrics（Prometheus 文本格式）。
+
+SQL 通过 connection.execute_wrapper 统计：每个新建的数据库连接都安装 record_query，
+当前请求的统计对象放在 contextvar 中，ASGI 下在线程池执行的视图（见 concurrency.py）也能计入。
+gunicorn 多进程时设置 PROMETHEUS_MULTIPROC_DIR（gunicorn.conf.py 负责），
+各进程把指标写入该目录下的 mmap 文件，/metrics 汇总全部进程。
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+
+REQUEST_SECONDS = Histogram(
+    'clothing_request_duration_seconds', '请求耗时', ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'clothing_request_queries', '每个请求的 SQL 查询数', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200, float('inf')),
+)
+REQUEST_SQL_SECONDS = Histogram('clothing_request_sql_seconds', '每个请求的 SQL 总耗时', ['view'])
+REQUEST_SERIALIZE_SECONDS = Histogram('clothing_request_serialize_seconds', '每个请求的序列化耗时', ['view'])
+REQUEST_RENDER_SECONDS = Histogram('clothing_request_render_seconds', '每个请求的响应渲染耗时', ['view'])
+RESPONSE_BYTES = Histogram(
+    'clothing_response_size_bytes', '响应大小', ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float('inf')),
+)
+
+CACHE_LOOKUPS = Counter('clothing_cache_lookups', '目录缓存查找次数', ['layer', 'result'])
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+current = ContextVar('clothing_request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed(field):
+    """把代码块的耗时计入当前请求的 field（serialize_seconds / render_seconds）"""
+    stats = current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            setattr(stats, field, getattr(stats, field) + time.perf_counter() - start)
+
+
+def timed_serialize():
+    """计入当前请求的序列化耗时（包住视图中的 serializer.data）"""
+    return timed('serialize_seconds')
+
+
+def timed_render():
+    """计入当前请求的渲染耗时（不经过中间件渲染的响应使用，见 concurrency.run_view）"""
+    return timed('render_seconds')
+
+
+def view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+def finish(request, response, stats):
+    total = time.perf_counter() - stats.started
+    view = view_label(request)
+    REQUEST_SECONDS.labels(view, request.method, str(response.status_code)).observe(total)
+    REQUEST_QUERIES.labels(view).observe(stats.queries)
+    REQUEST_SQL_SECONDS.labels(view).observe(stats.sql_seconds)
+    REQUEST_SERIALIZE_SECONDS.labels(view).observe(stats.serialize_seconds)
+    REQUEST_RENDER_SECONDS.labels(view).observe(stats.render_seconds)
+    if not response.streaming:
+        RESPONSE_BYTES.labels(view).observe(len(response.content))
+    response['Server-Timing'] = ', '.join([
+        f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.queries} queries"',
+        f'serialize;dur={stats.serialize_seconds * 1000:.1f}',
+        f'render;dur={stats.render_seconds * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+    return response
+
+
+class MetricsMiddleware:
+    """应放在 MIDDLEWARE 的最前面，使耗时覆盖其他中间件"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        stats = current.get()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.render_seconds += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def registry():
+    """多进程模式下汇总 PROMETHEUS_MULTIPROC_DIR 中全部进程的指标"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def metrics_view(request):
+    """Prometheus 抓取接口；设置了 METRICS_TOKEN 时要求 Authorization: Bearer <token>"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
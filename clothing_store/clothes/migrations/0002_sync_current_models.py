@@ -0,0 +1,279 @@
+# Generated by Django 5.0 on 2026-10-18 01:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Material',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='面料名称')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='面料描述')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '面料',
+                'verbose_name_plural': '面料',
+            },
+        ),
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='季节名称')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='季节描述')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '季节',
+                'verbose_name_plural': '季节',
+            },
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='标签名称')),
+                ('color', models.CharField(default='#007bff', max_length=7, verbose_name='标签颜色')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '标签',
+                'verbose_name_plural': '标签',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='clothing',
+            options={'ordering': ['-created_at'], 'verbose_name': '服装', 'verbose_name_plural': '服装'},
+        ),
+        migrations.AlterModelOptions(
+            name='designer',
+            options={'verbose_name': '设计师', 'verbose_name_plural': '设计师'},
+        ),
+        migrations.RemoveField(
+            model_name='clothing',
+            name='excel_file',
+        ),
+        migrations.RemoveField(
+            model_name='clothing',
+            name='image',
+        ),
+        migrations.RemoveField(
+            model_name='clothing',
+            name='import_date',
+        ),
+        migrations.RemoveField(
+            model_name='clothing',
+            name='material',
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='additional_images',
+            field=models.JSONField(blank=True, default=list, verbose_name='附加图片'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='创建时间'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='description',
+            field=models.TextField(default='', verbose_name='服装描述'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='gender',
+            field=models.CharField(choices=[('M', '男装'), ('F', '女装'), ('U', '中性')], default='U', max_length=1, verbose_name='性别'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='is_public',
+            field=models.BooleanField(default=False, verbose_name='是否公开'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='main_image',
+            field=models.ImageField(default='', upload_to='clothing_images/', verbose_name='主图'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='price_range',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='价格范围'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='发布时间'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='size_range',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='尺码范围'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='status',
+            field=models.CharField(choices=[('draft', '草稿'), ('published', '已发布'), ('archived', '已归档')], default='draft', max_length=20, verbose_name='状态'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='更新时间'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='view_permissions',
+            field=models.ManyToManyField(blank=True, related_name='viewable_clothes', to=settings.AUTH_USER_MODEL, verbose_name='查看权限'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, upload_to='designer_avatars/', verbose_name='头像'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='bio',
+            field=models.TextField(blank=True, null=True, verbose_name='个人简介'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='是否激活'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='电话'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='更新时间'),
+        ),
+        migrations.AddField(
+            model_name='designer',
+            name='user',
+            field=models.OneToOneField(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='designer_profile', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='clothing',
+            name='color',
+            field=models.CharField(max_length=100, verbose_name='颜色'),
+        ),
+        migrations.AlterField(
+            model_name='clothing',
+            name='designer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clothes', to='clothes.designer', verbose_name='设计师'),
+        ),
+        migrations.AlterField(
+            model_name='clothing',
+            name='name',
+            field=models.CharField(max_length=200, verbose_name='服装名称'),
+        ),
+        migrations.AlterField(
+            model_name='clothing',
+            name='style_number',
+            field=models.CharField(max_length=50, unique=True, verbose_name='款式号'),
+        ),
+        migrations.AlterField(
+            model_name='designer',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='创建时间'),
+        ),
+        migrations.AlterField(
+            model_name='designer',
+            name='email',
+            field=models.EmailField(max_length=254, unique=True, verbose_name='邮箱'),
+        ),
+        migrations.AlterField(
+            model_name='designer',
+            name='name',
+            field=models.CharField(max_length=100, verbose_name='设计师姓名'),
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='分类名称')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='分类描述')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='clothes.category', verbose_name='父分类')),
+            ],
+            options={
+                'verbose_name': '服装分类',
+                'verbose_name_plural': '服装分类',
+            },
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='clothes.category', verbose_name='服装分类'),
+        ),
+        migrations.CreateModel(
+            name='ClothingHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=50, verbose_name='操作类型')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='修改描述')),
+                ('changes', models.JSONField(default=dict, verbose_name='修改内容')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='修改时间')),
+                ('clothing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='clothes.clothing', verbose_name='服装')),
+                ('designer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clothes.designer', verbose_name='设计师')),
+            ],
+            options={
+                'verbose_name': '服装修改历史',
+                'verbose_name_plural': '服装修改历史',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='materials',
+            field=models.ManyToManyField(blank=True, to='clothes.material', verbose_name='面料'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='season',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='clothes.season', verbose_name='适用季节'),
+        ),
+        migrations.AddField(
+            model_name='clothing',
+            name='tags',
+            field=models.ManyToManyField(blank=True, to='clothes.tag', verbose_name='标签'),
+        ),
+        migrations.CreateModel(
+            name='UserPermission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('can_view', models.BooleanField(default=False, verbose_name='可查看')),
+                ('can_edit', models.BooleanField(default=False, verbose_name='可编辑')),
+                ('can_delete', models.BooleanField(default=False, verbose_name='可删除')),
+                ('granted_at', models.DateTimeField(auto_now_add=True, verbose_name='授权时间')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='过期时间')),
+                ('clothing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clothes.clothing', verbose_name='服装')),
+                ('granted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='granted_permissions', to=settings.AUTH_USER_MODEL, verbose_name='授权人')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '用户权限',
+                'verbose_name_plural': '用户权限',
+                'unique_together': {('user', 'clothing')},
+            },
+        ),
+    ]
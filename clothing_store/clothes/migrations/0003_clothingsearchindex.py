@@ -0,0 +1,118 @@
+# Generated by Django 5.0 on 2026-10-18 02:03
+
+import re
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+# 迁移时的切分规则副本（clothes/search.py 的 tokenize / build_document），之后修改 search.py 不影响本迁移
+TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9a-zA-Z]+')
+CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def tokenize(text):
+    tokens = []
+    for run in TOKEN_RE.findall(text or ''):
+        if CJK_RE.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def build_document(name, style_number, description):
+    return ' '.join(tokenize(name) + tokenize(style_number)), ' '.join(tokenize(description))
+
+SQLITE_FTS_SQL = [
+    # 外部内容 FTS5 表，rowid 对应 clothing_id，由触发器与索引表保持同步
+    "CREATE VIRTUAL TABLE clothes_clothing_fts USING fts5("
+    "title, body, content='clothes_clothingsearchindex', content_rowid='clothing_id')",
+    "CREATE TRIGGER clothes_clothing_fts_ai AFTER INSERT ON clothes_clothingsearchindex BEGIN "
+    "INSERT INTO clothes_clothing_fts(rowid, title, body) VALUES (new.clothing_id, new.title, new.body); END",
+    "CREATE TRIGGER clothes_clothing_fts_ad AFTER DELETE ON clothes_clothingsearchindex BEGIN "
+    "INSERT INTO clothes_clothing_fts(clothes_clothing_fts, rowid, title, body) "
+    "VALUES ('delete', old.clothing_id, old.title, old.body); END",
+    "CREATE TRIGGER clothes_clothing_fts_au AFTER UPDATE ON clothes_clothingsearchindex BEGIN "
+    "INSERT INTO clothes_clothing_fts(clothes_clothing_fts, rowid, title, body) "
+    "VALUES ('delete', old.clothing_id, old.title, old.body); "
+    "INSERT INTO clothes_clothing_fts(rowid, title, body) VALUES (new.clothing_id, new.title, new.body); END",
+]
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS clothes_clothing_fts_ai",
+    "DROP TRIGGER IF EXISTS clothes_clothing_fts_ad",
+    "DROP TRIGGER IF EXISTS clothes_clothing_fts_au",
+    "DROP TABLE IF EXISTS clothes_clothing_fts",
+]
+POSTGRES_VECTOR_SQL = (
+    "UPDATE clothes_clothingsearchindex SET vector = "
+    "setweight(array_to_tsvector(string_to_array(title, ' ')), 'A') || "
+    "setweight(array_to_tsvector(string_to_array(body, ' ')), 'B')"
+)
+
+
+def create_search_backend(apps, schema_editor):
+    """按数据库建立检索结构：PostgreSQL 建 GIN 索引，SQLite 建 FTS5 表（不支持 FTS5 时跳过）"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX clothes_search_vector_gin ON clothes_clothingsearchindex USING gin (vector)"
+        )
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        for sql in SQLITE_FTS_SQL:
+            schema_editor.execute(sql)
+
+
+def drop_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS clothes_search_vector_gin")
+    elif vendor == 'sqlite':
+        for sql in SQLITE_FTS_DROP_SQL:
+            schema_editor.execute(sql)
+
+
+def populate_search_index(apps, schema_editor):
+    Clothing = apps.get_model('clothes', 'Clothing')
+    ClothingSearchIndex = apps.get_model('clothes', 'ClothingSearchIndex')
+    rows = Clothing.objects.values_list('pk', 'name', 'style_number', 'description').iterator(chunk_size=1000)
+    batch = []
+    for pk, name, style_number, description in rows:
+        title, body = build_document(name, style_number, description)
+        batch.append(ClothingSearchIndex(clothing_id=pk, title=title, body=body))
+        if len(batch) >= 1000:
+            ClothingSearchIndex.objects.bulk_create(batch)
+            batch = []
+    ClothingSearchIndex.objects.bulk_create(batch)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0002_sync_current_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClothingSearchIndex',
+            fields=[
+                ('clothing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='clothes.clothing', verbose_name='服装')),
+                ('title', models.TextField(blank=True, default='', verbose_name='标题检索词')),
+                ('body', models.TextField(blank=True, default='', verbose_name='描述检索词')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True, verbose_name='检索向量')),
+            ],
+            options={
+                'verbose_name': '服装检索文档',
+                'verbose_name_plural': '服装检索文档',
+            },
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.0 on 2026-10-18 02:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0003_clothingsearchindex'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['-created_at', '-id'], name='clothing_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['-updated_at', '-id'], name='clothing_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['name', 'id'], name='clothing_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['status', '-created_at'], name='clothing_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['designer', '-created_at'], name='clothing_designer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['category', '-created_at'], name='clothing_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['season', '-created_at'], name='clothing_season_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(fields=['gender', '-created_at'], name='clothing_gender_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='clothing_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothing',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at'], name='clothing_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothinghistory',
+            index=models.Index(fields=['clothing', '-created_at'], name='history_clothing_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothinghistory',
+            index=models.Index(fields=['designer', '-created_at'], name='history_designer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothinghistory',
+            index=models.Index(fields=['-created_at', '-id'], name='history_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpermission',
+            index=models.Index(condition=models.Q(('can_view', True)), fields=['user', 'clothing', 'expires_at'], name='perm_user_view_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpermission',
+            index=models.Index(fields=['user', 'can_view', 'expires_at'], name='perm_user_expiry_idx'),
+        ),
+    ]
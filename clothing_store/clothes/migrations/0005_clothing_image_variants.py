@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0004_index_pack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clothing',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='图片衍生图'),
+        ),
+    ]
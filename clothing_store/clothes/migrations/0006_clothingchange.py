@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 02:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0005_clothing_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClothingChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clothing_id', models.BigIntegerField(verbose_name='服装ID')),
+                ('kind', models.CharField(choices=[('upsert', '新增或修改'), ('delete', '删除')], default='upsert', max_length=10, verbose_name='变更类型')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='变更时间')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='相关用户')),
+            ],
+            options={
+                'verbose_name': '服装变更日志',
+                'verbose_name_plural': '服装变更日志',
+                'ordering': ['id'],
+            },
+        ),
+    ]
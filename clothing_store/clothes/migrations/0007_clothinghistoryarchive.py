@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 02:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0006_clothingchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClothingHistoryArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='条目数')),
+                ('first_at', models.DateTimeField(verbose_name='最早时间')),
+                ('last_at', models.DateTimeField(verbose_name='最晚时间')),
+                ('data', models.BinaryField(verbose_name='压缩数据')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('clothing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history_archives', to='clothes.clothing', verbose_name='服装')),
+            ],
+            options={
+                'verbose_name': '服装历史归档',
+                'verbose_name_plural': '服装历史归档',
+                'indexes': [models.Index(fields=['clothing', '-last_at'], name='history_archive_clothing_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-18 02:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    """为已有分类生成闭包行：沿 parent 链向上遍历"""
+    Category = apps.get_model('clothes', 'Category')
+    CategoryClosure = apps.get_model('clothes', 'CategoryClosure')
+    parents = dict(Category.objects.values_list('pk', 'parent_id'))
+    rows = []
+    for pk in parents:
+        ancestor, depth, seen = pk, 0, set()
+        while ancestor is not None and ancestor not in seen:
+            seen.add(ancestor)
+            rows.append(CategoryClosure(ancestor_id=ancestor, descendant_id=pk, depth=depth))
+            ancestor, depth = parents.get(ancestor), depth + 1
+    CategoryClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0007_clothinghistoryarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField(verbose_name='层级差')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='clothes.category', verbose_name='祖先')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='clothes.category', verbose_name='后代')),
+            ],
+            options={
+                'verbose_name': '分类闭包',
+                'verbose_name_plural': '分类闭包',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='category_closure_desc_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='categoryclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='category_closure_unique'),
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
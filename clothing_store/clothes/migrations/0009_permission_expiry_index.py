@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0008_category_closure'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userpermission',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False)), fields=['expires_at'], name='perm_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0 on 2026-10-18 03:13
+
+from datetime import date, datetime, time
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+
+def populate_stats(apps, schema_editor):
+    """为已有设计师按服装表生成统计行（与 stats.rebuild 相同的规则）"""
+    Designer = apps.get_model('clothes', 'Designer')
+    DesignerStats = apps.get_model('clothes', 'DesignerStats')
+    day = timezone.localdate()
+    month = day.month - day.month % 3
+    current = date(day.year, month, 1) if month else date(day.year - 1, 12, 1)
+    published = Q(clothes__status='published')
+    rows = Designer.objects.values('pk').annotate(
+        total=Count('clothes'),
+        draft=Count('clothes', filter=Q(clothes__status='draft')),
+        published=Count('clothes', filter=published),
+        archived=Count('clothes', filter=Q(clothes__status='archived')),
+        season=Count('clothes', filter=published & Q(
+            clothes__published_at__gte=timezone.make_aware(datetime.combine(current, time.min))
+        )),
+        last=Max('clothes__published_at', filter=published),
+    )
+    DesignerStats.objects.bulk_create([
+        DesignerStats(
+            designer_id=row['pk'], total_count=row['total'], draft_count=row['draft'],
+            published_count=row['published'], archived_count=row['archived'], season_start=current,
+            season_published_count=row['season'], last_published_at=row['last'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0009_permission_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignerStats',
+            fields=[
+                ('designer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='clothes.designer', verbose_name='设计师')),
+                ('total_count', models.IntegerField(default=0, verbose_name='服装总数')),
+                ('draft_count', models.IntegerField(default=0, verbose_name='草稿数')),
+                ('published_count', models.IntegerField(default=0, verbose_name='已发布数')),
+                ('archived_count', models.IntegerField(default=0, verbose_name='已归档数')),
+                ('season_start', models.DateField(blank=True, null=True, verbose_name='本季开始日期')),
+                ('season_published_count', models.IntegerField(default=0, verbose_name='本季发布数')),
+                ('last_published_at', models.DateTimeField(blank=True, null=True, verbose_name='最近发布时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '设计师统计',
+                'verbose_name_plural': '设计师统计',
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
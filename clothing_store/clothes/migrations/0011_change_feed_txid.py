@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 03:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0010_designer_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='clothingchange',
+            options={'ordering': ['txid', 'id'], 'verbose_name': '服装变更日志', 'verbose_name_plural': '服装变更日志'},
+        ),
+        migrations.AddField(
+            model_name='clothingchange',
+            name='txid',
+            field=models.BigIntegerField(default=0, verbose_name='事务号'),
+        ),
+        migrations.AddIndex(
+            model_name='clothingchange',
+            index=models.Index(fields=['txid', 'id'], name='change_txid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clothingchange',
+            index=models.Index(fields=['user', 'txid', 'id'], name='change_user_txid_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 03:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clothes', '0011_change_feed_txid'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['id'], 'verbose_name': '标签', 'verbose_name_plural': '标签'},
+        ),
+    ]
@@ -1,6 +1,9 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
+from django.utils.functional import cached_property
 import uuid
 
 class Designer(models.Model):
@@ -22,6 +25,36 @@ class Designer(models.Model):
     def __str__(self):
         return self.name
 
+class DesignerStats(models.Model):
+    """设计师统计：按状态的服装数、本季发布数、最近发布时间
+
+    由 stats.py 随服装的保存、删除和状态变更增量维护，rebuild_designer_stats 命令全量重算。
+    """
+    designer = models.OneToOneField(
+        Designer, on_delete=models.CASCADE, primary_key=True, related_name='stats', verbose_name='设计师'
+    )
+    total_count = models.IntegerField(default=0, verbose_name='服装总数')
+    draft_count = models.IntegerField(default=0, verbose_name='草稿数')
+    published_count = models.IntegerField(default=0, verbose_name='已发布数')
+    archived_count = models.IntegerField(default=0, verbose_name='已归档数')
+    season_start = models.DateField(blank=True, null=True, verbose_name='本季开始日期')
+    season_published_count = models.IntegerField(default=0, verbose_name='本季发布数')
+    last_published_at = models.DateTimeField(blank=True, null=True, verbose_name='最近发布时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '设计师统计'
+        verbose_name_plural = '设计师统计'
+
+    def __str__(self):
+        return f"{self.designer_id}: {self.published_count}/{self.total_count}"
+
+    @property
+    def published_this_season(self):
+        """本季（3/6/9/12 月起的三个月）发布且仍处于发布状态的服装数，跨季后未更新的行为 0"""
+        from .stats import season_start
+        return self.season_published_count if self.season_start == season_start() else 0
+
 class Category(models.Model):
     """服装分类模型"""
     name = models.CharField(max_length=100, unique=True, verbose_name='分类名称')
@@ -36,6 +69,48 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from .categories import creates_cycle
+
+        if self.pk and self.parent_id and creates_cycle(self.pk, self.parent_id):
+            raise ValidationError({'parent': '不能把分类移动到它自己或它的子分类下'})
+
+    def save(self, *args, **kwargs):
+        """保存时同步闭包表（新建插入祖先路径，改变父分类时整体移动子树）"""
+        from .categories import creates_cycle, insert_node, move_subtree
+
+        creating = self._state.adding
+        old_parent_id = None
+        if not creating:
+            old_parent_id = Category.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            if self.parent_id != old_parent_id and self.parent_id and creates_cycle(self.pk, self.parent_id):
+                raise ValueError('不能把分类移动到它自己或它的子分类下')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                insert_node(self)
+            elif self.parent_id != old_parent_id:
+                move_subtree(self)
+
+class CategoryClosure(models.Model):
+    """分类闭包表：每对 (祖先, 后代) 一行，包括自身（depth=0）"""
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links', verbose_name='祖先')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links', verbose_name='后代')
+    depth = models.PositiveIntegerField(verbose_name='层级差')
+
+    class Meta:
+        verbose_name = '分类闭包'
+        verbose_name_plural = '分类闭包'
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='category_closure_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='category_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
 class Tag(models.Model):
     """标签模型"""
     name = models.CharField(max_length=50, unique=True, verbose_name='标签名称')
@@ -45,6 +120,8 @@ class Tag(models.Model):
     class Meta:
         verbose_name = '标签'
         verbose_name_plural = '标签'
+        # 服装的标签列表按此排序（ClothingListFastSerializer 与模型序列化器一致）
+        ordering = ['id']
 
     def __str__(self):
         return self.name
@@ -112,6 +189,7 @@ class Clothing(models.Model):
     # 媒体文件
     main_image = models.ImageField(upload_to='clothing_images/', verbose_name='主图')
     additional_images = models.JSONField(default=list, blank=True, verbose_name='附加图片')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='图片衍生图')
     
     # 状态和时间
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name='状态')
@@ -127,15 +205,82 @@ class Clothing(models.Model):
         verbose_name = '服装'
         verbose_name_plural = '服装'
         ordering = ['-created_at']
+        # 覆盖 ClothingViewSet 的 filterset_fields 与 ordering_fields，id 作为游标分页的次级排序键
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='clothing_created_idx'),
+            models.Index(fields=['-updated_at', '-id'], name='clothing_updated_idx'),
+            models.Index(fields=['name', 'id'], name='clothing_name_idx'),
+            models.Index(fields=['status', '-created_at'], name='clothing_status_created_idx'),
+            models.Index(fields=['designer', '-created_at'], name='clothing_designer_created_idx'),
+            models.Index(fields=['category', '-created_at'], name='clothing_category_created_idx'),
+            models.Index(fields=['season', '-created_at'], name='clothing_season_created_idx'),
+            models.Index(fields=['gender', '-created_at'], name='clothing_gender_created_idx'),
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_public=True),
+                name='clothing_public_created_idx'
+            ),
+            models.Index(
+                fields=['-published_at'], condition=models.Q(status='published'),
+                name='clothing_published_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.style_number})"
 
+    SEARCH_FIELDS = {'name', 'style_number', 'description'}
+    STATS_FIELDS = ('designer_id', 'status', 'published_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记下加载时的统计状态，保存时据此增量更新设计师统计（见 stats.py）；有延迟加载的字段时不记录
+        if all(name in instance.__dict__ for name in cls.STATS_FIELDS):
+            instance._stats_state = tuple(instance.__dict__[name] for name in cls.STATS_FIELDS)
+        return instance
+
     def save(self, *args, **kwargs):
         if self.status == 'published' and not self.published_at:
             self.published_at = timezone.now()
         super().save(*args, **kwargs)
 
+        # 同步全文检索文档
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.SEARCH_FIELDS.intersection(update_fields):
+            from .search import index_clothing
+            index_clothing(self)
+
+        # 有尚未生成衍生图的图片时，提交后交给后台任务处理
+        if self.missing_variants():
+            from .tasks import generate_image_variants
+            transaction.on_commit(lambda: generate_image_variants.delay(self.pk))
+
+    def missing_variants(self):
+        from .images import image_sources
+
+        sources = image_sources(self.main_image.name, self.additional_images)
+        return [source for source in sources if source not in (self.image_variants or {})]
+
+    @cached_property
+    def main_thumbnail(self):
+        """主图缩略图 {格式: url}，供列表页的 <picture> 使用"""
+        from .images import variant_urls
+
+        return variant_urls(self.image_variants, self.main_image.name).get('thumb', {})
+
+class ClothingSearchIndex(models.Model):
+    """服装全文检索文档（PostgreSQL 使用 vector 列，SQLite 使用 FTS5 表）"""
+    clothing = models.OneToOneField(
+        Clothing, on_delete=models.CASCADE, primary_key=True, related_name='search_index', verbose_name='服装'
+    )
+    title = models.TextField(blank=True, default='', verbose_name='标题检索词')
+    body = models.TextField(blank=True, default='', verbose_name='描述检索词')
+    vector = SearchVectorField(null=True, verbose_name='检索向量')
+
+    class Meta:
+        verbose_name = '服装检索文档'
+        verbose_name_plural = '服装检索文档'
+
 class ClothingHistory(models.Model):
     """服装修改历史模型"""
     clothing = models.ForeignKey(Clothing, on_delete=models.CASCADE, related_name='history', verbose_name='服装')
@@ -149,10 +294,38 @@ class ClothingHistory(models.Model):
         verbose_name = '服装修改历史'
         verbose_name_plural = '服装修改历史'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['clothing', '-created_at'], name='history_clothing_created_idx'),
+            models.Index(fields=['designer', '-created_at'], name='history_designer_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='history_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.clothing.name} - {self.action} - {self.created_at}"
 
+class ClothingHistoryArchive(models.Model):
+    """归档的服装历史
+
+    每行保存一件服装若干条历史（最新在前），格式与 ClothingHistorySerializer 的输出相同，zlib 压缩的 JSON。
+    """
+    clothing = models.ForeignKey(Clothing, on_delete=models.CASCADE, related_name='history_archives', verbose_name='服装')
+    entry_count = models.PositiveIntegerField(default=0, verbose_name='条目数')
+    first_at = models.DateTimeField(verbose_name='最早时间')
+    last_at = models.DateTimeField(verbose_name='最晚时间')
+    data = models.BinaryField(verbose_name='压缩数据')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '服装历史归档'
+        verbose_name_plural = '服装历史归档'
+        indexes = [
+            models.Index(fields=['clothing', '-last_at'], name='history_archive_clothing_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.clothing_id} {self.first_at:%Y-%m-%d} ~ {self.last_at:%Y-%m-%d} ({self.entry_count})"
+
 class UserPermission(models.Model):
     """用户权限模型"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='用户')
@@ -168,6 +341,44 @@ class UserPermission(models.Model):
         verbose_name = '用户权限'
         verbose_name_plural = '用户权限'
         unique_together = ['user', 'clothing']
+        indexes = [
+            # 可见性 EXISTS 子查询只关心 can_view=True 的授权
+            models.Index(
+                fields=['user', 'clothing', 'expires_at'], condition=models.Q(can_view=True),
+                name='perm_user_view_idx'
+            ),
+            models.Index(fields=['user', 'can_view', 'expires_at'], name='perm_user_expiry_idx'),
+            # 定时清理按过期时间扫描
+            models.Index(fields=['expires_at'], condition=models.Q(expires_at__isnull=False), name='perm_expires_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.clothing.name}"
+
+class ClothingChange(models.Model):
+    """服装变更日志，(事务号, 自增主键) 即增量同步的游标
+
+    不使用外键，服装删除后记录作为墓碑保留；user 非空的记录只对该用户有意义（授权获得或失去）。
+    """
+    KIND_CHOICES = [
+        ('upsert', '新增或修改'),
+        ('delete', '删除'),
+    ]
+
+    clothing_id = models.BigIntegerField(verbose_name='服装ID')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='upsert', verbose_name='变更类型')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, verbose_name='相关用户')
+    txid = models.BigIntegerField(default=0, verbose_name='事务号')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='变更时间')
+
+    class Meta:
+        verbose_name = '服装变更日志'
+        verbose_name_plural = '服装变更日志'
+        ordering = ['txid', 'id']
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='change_txid_idx'),
+            models.Index(fields=['user', 'txid', 'id'], name='change_user_txid_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.kind} {self.clothing_id}"
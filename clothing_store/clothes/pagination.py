@@ -0,0 +1,160 @@
+"""
+分页器
+
+KeysetPagination 按 (排序字段, id) 做游标分页：
+每页只执行一次 WHERE (field, id) < (v, pk) ... LIMIT n+1 查询，不做 COUNT，也不使用 OFFSET，
+深分页与首页代价相同。需要总数时传 with_total=1，PostgreSQL 下返回查询计划估算值。
+"""
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """基于 (排序字段, id) 的游标分页"""
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    total_query_param = 'with_total'
+    default_ordering = '-created_at'
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, view)
+        self.with_total = request.query_params.get(self.total_query_param) in ('1', 'true')
+        self.total = self.estimate_total(queryset) if self.with_total else None
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor['d'] == 'prev'
+
+        # 向前翻页时反转排序方向，取到结果后再翻转回来
+        descending = self.descending != backwards
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'id')
+        if cursor is not None:
+            queryset = queryset.filter(self.after_q(cursor['v'], descending))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.next_key = self.previous_key = None
+        if rows:
+            if has_more or backwards:
+                self.next_key = self.key_for(rows[-1])
+            if cursor is not None and (has_more or not backwards):
+                self.previous_key = self.key_for(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.with_total:
+            payload['count'] = self.total
+        payload['next'] = self.build_link(self.next_key, 'next')
+        payload['previous'] = self.build_link(self.previous_key, 'prev')
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_ordering(self, request, view):
+        """排序字段限定在视图的 ordering_fields 内，id 作为唯一的次级排序
+
+        视图可以通过 keyset_ordering 指定本次请求的默认排序（如搜索相关度 -rank）。
+        """
+        default = getattr(view, 'keyset_ordering', None) or self.default_ordering
+        allowed = list(getattr(view, 'ordering_fields', None) or []) + [default.lstrip('-')]
+        ordering = request.query_params.get(self.ordering_query_param, '').split(',')[0].strip()
+        if ordering.lstrip('-') not in allowed:
+            ordering = default
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def after_q(self, key, descending):
+        value, pk = key
+        lookup = 'lt' if descending else 'gt'
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': pk})
+
+    def key_for(self, obj):
+        # 支持模型实例和 values() 返回的字典行
+        if isinstance(obj, dict):
+            value, pk = obj[self.field], obj['id']
+        else:
+            value, pk = getattr(obj, self.field), obj.pk
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return [value, pk]
+
+    def build_link(self, key, direction):
+        if key is None:
+            return None
+        token = b64encode(json.dumps({'v': key, 'd': direction}).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(b64decode(token.encode()).decode())
+            value, pk = cursor['v']
+            if cursor['d'] not in ('next', 'prev'):
+                raise ValueError
+            return {'v': [value, int(pk)], 'd': cursor['d']}
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def estimate_total(self, queryset):
+        """PostgreSQL 使用查询计划的行数估算，其他数据库回退为精确 COUNT"""
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'integer'}},
+            {'name': self.total_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'boolean'}},
+        ]
+
+
+class CatalogPagination(KeysetPagination):
+    """服装/历史接口分页：默认游标分页，带 page 参数的旧客户端仍使用页码分页"""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.legacy = None
+        if PageNumberPagination.page_query_param in request.query_params:
+            self.legacy = PageNumberPagination()
+            return self.legacy.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.legacy is not None:
+            return self.legacy.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class HistoryPagination(PageNumberPagination):
+    """单件服装历史（热表 + 归档）的页码分页"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,6 +1,7 @@
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import permissions
-from django.utils import timezone
-from .models import UserPermission
+from .models import Clothing, Designer, UserPermission
+from .visibility import unexpired_q
 
 class IsDesignerOrReadOnly(permissions.BasePermission):
     """
@@ -33,9 +34,12 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        # 检查用户是否是对象所有者
-        if hasattr(obj, 'designer'):
-            return obj.designer.user == request.user
+        # 服装：设计师本人或持有对应授权（编辑/删除）
+        if isinstance(obj, Clothing):
+            action = 'delete' if request.method == 'DELETE' else 'edit'
+            return get_resolver(request).has_perm(obj, action)
+        if hasattr(obj, 'designer_id'):
+            return get_resolver(request).is_owner(obj.designer_id)
         elif hasattr(obj, 'user'):
             return obj.user == request.user
         
@@ -52,7 +56,7 @@ class IsDesignerOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # 检查用户是否是服装的设计师
-        return obj.designer.user == request.user
+        return get_resolver(request).is_owner(obj.designer_id)
 
 class CanViewClothing(permissions.BasePermission):
     """
@@ -60,29 +64,92 @@ class CanViewClothing(permissions.BasePermission):
     """
     
     def has_object_permission(self, request, view, obj):
-        # 管理员可以查看所有服装
-        if request.user.is_staff:
+        # 公开、本人设计或有有效查看授权的服装可以查看，规则与列表接口一致
+        return get_resolver(request).has_perm(obj, 'view')
+
+
+class PermissionResolver:
+    """
+    按请求缓存的服装权限解析器
+
+    用户的设计师身份和全部有效授权（查看/编辑/删除）各只查询一次，
+    之后的单个或批量判断都在内存中完成。
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._designer = None
+        self._grants = None
+
+    @property
+    def designer(self):
+        """当前用户的设计师档案，没有则为 None"""
+        if self._designer is None:
+            designer = None
+            if self.user.is_authenticated:
+                designer = Designer.objects.filter(user=self.user).first()
+            self._designer = designer or False
+        return self._designer or None
+
+    @property
+    def grants(self):
+        """{clothing_id: {'view': bool, 'edit': bool, 'delete': bool}}"""
+        if self._grants is None:
+            self._grants = {}
+            if self.user.is_authenticated:
+                rows = UserPermission.objects.filter(unexpired_q(), user=self.user).values_list(
+                    'clothing_id', 'can_view', 'can_edit', 'can_delete'
+                )
+                self._grants = {
+                    clothing_id: {'view': can_view, 'edit': can_edit, 'delete': can_delete}
+                    for clothing_id, can_view, can_edit, can_delete in rows
+                }
+        return self._grants
+
+    def is_owner(self, designer_id):
+        designer = self.designer
+        return designer is not None and designer.pk == designer_id
+
+    def allows(self, action, clothing_id, designer_id, is_public):
+        """判断单件服装的 view / edit / delete / publish 权限"""
+        if self.user.is_staff or self.is_owner(designer_id):
             return True
-        
-        # 公开的服装所有人都可以查看
-        if obj.is_public:
+        if action == 'view' and is_public:
             return True
-        
-        # 设计师可以查看自己设计的服装
-        if hasattr(request.user, 'designer_profile') and obj.designer.user == request.user:
-            return True
-        
-        # 检查是否有特殊查看权限
-        try:
-            permission = UserPermission.objects.get(
-                user=request.user,
-                clothing=obj,
-                can_view=True
-            )
-            # 检查权限是否过期
-            if permission.expires_at is None or permission.expires_at > timezone.now():
-                return True
-        except UserPermission.DoesNotExist:
-            pass
-        
-        return False
+        return self.grants.get(clothing_id, {}).get(action, False)
+
+    def has_perm(self, clothing, action='view'):
+        return self.allows(action, clothing.pk, clothing.designer_id, clothing.is_public)
+
+    def check(self, clothing_ids, action='view'):
+        """批量判断，返回允许的服装 id 集合（一次查询）"""
+        rows = Clothing.objects.filter(pk__in=clothing_ids).order_by().values_list('pk', 'designer_id', 'is_public')
+        return {pk for pk, designer_id, is_public in rows if self.allows(action, pk, designer_id, is_public)}
+
+    def filter(self, queryset, action='view'):
+        """把服装查询集限制为有 action 权限的部分，判断在数据库中完成（用于批量写操作）"""
+        if self.user.is_staff:
+            return queryset
+        if not self.user.is_authenticated:
+            return queryset.none()
+        q = Q(designer__user_id=self.user.pk)
+        if action in ('view', 'edit', 'delete'):
+            grants = UserPermission.objects.filter(unexpired_q(), user_id=self.user.pk, **{f'can_{action}': True})
+            q |= Exists(grants.filter(clothing=OuterRef('pk')))
+        if action == 'view':
+            q |= Q(is_public=True)
+        return queryset.filter(q)
+
+
+def get_resolver(request):
+    """获取当前请求的权限解析器，同一请求内复用"""
+    resolver = getattr(request, '_permission_resolver', None)
+    if resolver is None or resolver.user is not request.user:
+        resolver = PermissionResolver(request.user)
+        request._permission_resolver = resolver
+    return resolver
+
+
+def check(user, clothing_ids, action='view'):
+    """批量权限判断，返回允许的服装 id 集合"""
+    return PermissionResolver(user).check(clothing_ids, action)
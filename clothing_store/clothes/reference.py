@@ -0,0 +1,92 @@
+"""
+参考数据注册表（分类、季节、标签、面料）
+
+这些表很少变更，每个进程加载一次完整副本，之后按 id 取名称不再查询数据库。
+副本用共享版本号（'catalog' 缓存中的 refdata 作用域，生产环境为 Redis）校验：
+- 本进程内的保存/删除由 signals.py 直接使副本失效
+- 其他进程的变更最多 REFERENCE_CHECK_INTERVAL 秒后发现版本号变化并重新加载
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .cache import bump, get_versions
+from .models import Category, Material, Season, Tag
+
+SCOPE = 'refdata'
+
+
+class ReferenceData:
+    """某一版本的参考数据：{id: 字典}，以及按名称排序的列表（下拉框使用）"""
+
+    def __init__(self):
+        self.categories = self.load(Category.objects.values('id', 'name', 'description', 'parent_id'))
+        self.seasons = self.load(Season.objects.values('id', 'name', 'description'))
+        self.tags = self.load(Tag.objects.values('id', 'name', 'color', 'created_at'))
+        self.materials = self.load(Material.objects.values('id', 'name', 'description'))
+
+    @staticmethod
+    def load(queryset):
+        return {row['id']: row for row in queryset.order_by('name')}
+
+    @staticmethod
+    def name(mapping, pk):
+        row = mapping.get(pk)
+        return row['name'] if row else None
+
+    def category_name(self, pk):
+        return self.name(self.categories, pk)
+
+    def season_name(self, pk):
+        return self.name(self.seasons, pk)
+
+
+class ReferenceRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, force=False):
+        now = time.monotonic()
+        interval = getattr(settings, 'REFERENCE_CHECK_INTERVAL', 5)
+        if not force and self._data is not None and now - self._checked_at < interval:
+            return self._data
+        version = get_versions([SCOPE])[0]
+        with self._lock:
+            if force or self._data is None or self._version != version:
+                self._data = ReferenceData()
+                self._version = version
+            self._checked_at = now
+            return self._data
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+
+registry = ReferenceRegistry()
+
+
+def reference():
+    """当前进程的参考数据副本"""
+    return registry.get()
+
+
+def reference_for(**ids):
+    """确保副本包含给定的 id（如 tags=[1, 2]），否则强制重新加载一次
+
+    其他进程刚新增的数据在下次检查版本号之前不在副本中，按 id 取名称的调用方用它兜底。
+    """
+    data = registry.get()
+    if any({pk for pk in pks if pk is not None} - getattr(data, name).keys() for name, pks in ids.items()):
+        data = registry.get(force=True)
+    return data
+
+
+def reference_changed():
+    """参考数据变更：本进程立即失效，其他进程通过版本号发现"""
+    registry.invalidate()
+    bump(SCOPE)
@@ -0,0 +1,189 @@
+"""
+服装历史保留与归档
+
+早于保留期限（HISTORY_RETENTION_DAYS）的 ClothingHistory 按主键分块移入 ClothingHistoryArchive：
+每块在独立的短事务中完成，按服装合并进最近一个未满的归档（压缩），再删除热表中的行。
+读取时 HistoryTimeline 把热表和归档拼接成一个按时间倒序的序列，可直接交给分页器。
+
+已过期的 UserPermission 同样按块删除（purge_expired_grants），删除信号照常记录失去授权并使可见性缓存失效。
+"""
+import json
+import zlib
+from datetime import timedelta
+from functools import cached_property
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ClothingHistory, ClothingHistoryArchive, UserPermission
+from .serializers import ClothingHistorySerializer
+
+# 单个归档最多保存的条目数，超过后新建归档
+ARCHIVE_MAX_ENTRIES = 500
+
+
+def pack(entries):
+    return zlib.compress(json.dumps(entries, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def retention_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'HISTORY_RETENTION_DAYS', 180))
+
+
+def merge_into(archive, entries):
+    """把新条目并入归档，保持最新在前"""
+    merged = sorted(unpack(archive.data) + entries if archive.data else entries, key=lambda e: e['id'], reverse=True)
+    archive.data = pack(merged)
+    archive.entry_count = len(merged)
+    archive.first_at = parse_datetime(merged[-1]['created_at'])
+    archive.last_at = parse_datetime(merged[0]['created_at'])
+    archive.updated_at = timezone.now()
+    return archive
+
+
+def archive_chunk(cutoff, chunk_size):
+    """归档一块过期历史，返回处理的行数"""
+    with transaction.atomic():
+        rows = list(
+            ClothingHistory.objects.filter(created_at__lt=cutoff).select_related('designer').order_by('id')[:chunk_size]
+        )
+        if not rows:
+            return 0
+        by_clothing = {}
+        for entry in ClothingHistorySerializer(rows, many=True).data:
+            by_clothing.setdefault(entry['clothing'], []).append(dict(entry))
+
+        # 每件服装并入最新的未满归档（压缩合并），否则新建
+        open_archives = {}
+        for archive in ClothingHistoryArchive.objects.filter(
+            clothing_id__in=by_clothing, entry_count__lt=ARCHIVE_MAX_ENTRIES
+        ).order_by('last_at'):
+            open_archives[archive.clothing_id] = archive
+        updated, created = [], []
+        for clothing_id, entries in by_clothing.items():
+            archive = open_archives.get(clothing_id)
+            if archive is not None and archive.entry_count + len(entries) <= ARCHIVE_MAX_ENTRIES:
+                updated.append(merge_into(archive, entries))
+            else:
+                created.append(merge_into(ClothingHistoryArchive(clothing_id=clothing_id), entries))
+        ClothingHistoryArchive.objects.bulk_update(
+            updated, ['data', 'entry_count', 'first_at', 'last_at', 'updated_at']
+        )
+        ClothingHistoryArchive.objects.bulk_create(created)
+        ClothingHistory.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def archive_history(cutoff=None, chunk_size=None, max_chunks=None):
+    """分块归档过期历史，返回 (归档行数, 是否已全部完成)"""
+    cutoff = cutoff or retention_cutoff()
+    chunk_size = chunk_size or getattr(settings, 'HISTORY_ARCHIVE_CHUNK_SIZE', 1000)
+    total = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        count = archive_chunk(cutoff, chunk_size)
+        total += count
+        chunks += 1
+        if count < chunk_size:
+            return total, True
+    return total, False
+
+
+def purge_grants_chunk(now, chunk_size):
+    """删除一块已过期的授权，返回处理的行数；删除信号负责记录失去授权并使可见性缓存失效"""
+    with transaction.atomic():
+        pks = list(
+            UserPermission.objects.filter(expires_at__lte=now).order_by('expires_at', 'pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if pks:
+            UserPermission.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def purge_expired_grants(now=None, chunk_size=None, max_chunks=None):
+    """分块删除已过期的授权，返回 (删除行数, 是否已全部完成)"""
+    now = now or timezone.now()
+    chunk_size = chunk_size or getattr(settings, 'GRANT_PURGE_CHUNK_SIZE', 1000)
+    total = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        count = purge_grants_chunk(now, chunk_size)
+        total += count
+        chunks += 1
+        if count < chunk_size:
+            return total, True
+    return total, False
+
+
+class HistoryTimeline:
+    """
+    单件服装的完整历史（热表在前、归档在后，均为最新在前）
+
+    支持 count() 和切片，元素为 ClothingHistorySerializer 格式的字典；只解压切片用到的归档。
+    designer / action 过滤同时作用于热表和归档。
+    """
+
+    def __init__(self, clothing_id, designer=None, action=None):
+        self.clothing_id = clothing_id
+        self.designer = int(designer) if designer else None
+        self.action = action or None
+        hot = ClothingHistory.objects.filter(clothing_id=clothing_id).select_related('designer')
+        if self.designer:
+            hot = hot.filter(designer_id=self.designer)
+        if self.action:
+            hot = hot.filter(action=self.action)
+        self.hot = hot.order_by('-created_at', '-id')
+
+    @property
+    def filtered(self):
+        return self.designer is not None or self.action is not None
+
+    def matches(self, entry):
+        return (self.designer is None or entry['designer'] == self.designer) and \
+            (self.action is None or entry['action'] == self.action)
+
+    @cached_property
+    def hot_count(self):
+        return self.hot.count()
+
+    @cached_property
+    def archives(self):
+        """[(归档 id, 条目数)]，最新在前；有过滤条件时条目数为过滤后的数量"""
+        queryset = ClothingHistoryArchive.objects.filter(clothing_id=self.clothing_id).order_by('-last_at')
+        if not self.filtered:
+            return list(queryset.values_list('id', 'entry_count'))
+        self._entries = {pk: [e for e in unpack(data) if self.matches(e)] for pk, data in queryset.values_list('id', 'data')}
+        return [(pk, len(entries)) for pk, entries in self._entries.items()]
+
+    def archive_entries(self, archive_id):
+        if self.filtered:
+            return self._entries[archive_id]
+        return unpack(ClothingHistoryArchive.objects.filter(pk=archive_id).values_list('data', flat=True).get())
+
+    def count(self):
+        return self.hot_count + sum(count for _, count in self.archives)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop if index.stop is not None else self.count()
+        result = []
+        if start < self.hot_count:
+            hot = self.hot[start:min(stop, self.hot_count)]
+            result.extend(ClothingHistorySerializer(hot, many=True).data)
+        offset = self.hot_count
+        for archive_id, count in self.archives:
+            if offset >= stop:
+                break
+            if offset + count > start:
+                entries = self.archive_entries(archive_id)
+                result.extend(entries[max(start - offset, 0):stop - offset])
+            offset += count
+        return result
@@ -0,0 +1,158 @@
+"""
+服装全文检索
+
+名称、款式号和描述在写入时切分为检索词，保存在 ClothingSearchIndex 中：
+- 中文按单字 + 相邻二字切分（无需词典，短查询和词组都能命中）
+- 英文/数字按单词切分并转为小写
+
+PostgreSQL 使用 tsvector 列 + GIN 索引；SQLite 使用 FTS5 虚拟表（由触发器与索引表同步），
+两者都按相关度排序。其他数据库回退为 icontains 查询。
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+INDEX_TABLE = 'clothes_clothingsearchindex'
+FTS_TABLE = 'clothes_clothing_fts'
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 2.0
+
+TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9a-zA-Z]+')
+CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+def tokenize(text):
+    """切分文档文本：中文输出单字和二字组，其他输出小写单词"""
+    tokens = []
+    for run in TOKEN_RE.findall(text or ''):
+        if CJK_RE.match(run):
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def tokenize_query(text):
+    """切分查询文本：中文词组只用二字组匹配，英文/数字按前缀匹配
+
+    返回 (token, is_prefix) 列表。
+    """
+    terms = []
+    for run in TOKEN_RE.findall(text or ''):
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                terms.append((run, False))
+            else:
+                terms.extend((run[i:i + 2], False) for i in range(len(run) - 1))
+        else:
+            terms.append((run.lower(), True))
+    return list(dict.fromkeys(terms))
+
+
+def build_document(name, style_number, description):
+    """生成索引文档 (title, body)"""
+    title = ' '.join(tokenize(name) + tokenize(style_number))
+    body = ' '.join(tokenize(description))
+    return title, body
+
+
+_fts5_tables = {}
+
+
+def fts5_available():
+    """当前 SQLite 数据库是否已建立 FTS5 表（按数据库缓存结果）"""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_tables:
+        _fts5_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_tables[name]
+
+
+# 检索词已在 Python 中切分好，直接构造 tsvector，绕过 PostgreSQL 的分词器（其不支持中文）
+PG_VECTOR_SQL = (
+    "setweight(array_to_tsvector(string_to_array(title, ' ')), 'A') || "
+    "setweight(array_to_tsvector(string_to_array(body, ' ')), 'B')"
+)
+
+
+def index_clothing(clothing):
+    """写入或更新一件服装的检索文档"""
+    from .models import ClothingSearchIndex
+
+    title, body = build_document(clothing.name, clothing.style_number, clothing.description)
+    ClothingSearchIndex.objects.update_or_create(clothing_id=clothing.pk, defaults={'title': title, 'body': body})
+    if connection.vendor == 'postgresql':
+        ClothingSearchIndex.objects.filter(clothing_id=clothing.pk).update(vector=RawSQL(PG_VECTOR_SQL, []))
+
+
+def index_rows(rows):
+    """批量写入检索文档，rows 为 (pk, name, style_number, description) 列表"""
+    from .models import ClothingSearchIndex
+
+    ids = [row[0] for row in rows]
+    ClothingSearchIndex.objects.filter(clothing_id__in=ids).delete()
+    ClothingSearchIndex.objects.bulk_create([
+        ClothingSearchIndex(clothing_id=pk, title=title, body=body)
+        for pk, (title, body) in ((row[0], build_document(*row[1:])) for row in rows)
+    ])
+    if connection.vendor == 'postgresql':
+        ClothingSearchIndex.objects.filter(clothing_id__in=ids).update(vector=RawSQL(PG_VECTOR_SQL, []))
+
+
+def rebuild_index(batch_size=1000, stdout=None):
+    """重建全部检索文档，按主键分批处理，返回处理数量"""
+    from .models import Clothing, ClothingSearchIndex
+
+    total, last_pk = 0, 0
+    while True:
+        rows = list(
+            Clothing.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'name', 'style_number', 'description')[:batch_size]
+        )
+        if not rows:
+            break
+        index_rows(rows)
+        total += len(rows)
+        last_pk = rows[-1][0]
+        if stdout is not None:
+            stdout.write(f'已索引 {total} 件服装')
+    ClothingSearchIndex.objects.exclude(clothing_id__in=Clothing.objects.values('pk')).delete()
+    return total
+
+
+def fallback_q(query):
+    return Q(name__icontains=query) | Q(style_number__icontains=query) | Q(description__icontains=query)
+
+
+def search_clothes(queryset, query):
+    """按关键词过滤服装查询集，并标注相关度 rank（越大越相关）、按相关度排序"""
+    terms = tokenize_query(query)
+    if not terms:
+        return queryset.filter(fallback_q(query)) if query.strip() else queryset
+
+    if connection.vendor == 'postgresql':
+        # tsquery 字面量不经过分词器，与写入时的检索词一一对应
+        tsquery = ' & '.join(f"'{token}'" + (':*' if prefix else '') for token, prefix in terms)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f'SELECT clothing_id FROM {INDEX_TABLE} WHERE vector @@ %s::tsquery', [tsquery])
+        ).annotate(rank=RawSQL(
+            f'SELECT ts_rank(vector, %s::tsquery)::float8 FROM {INDEX_TABLE} '
+            f'WHERE clothing_id = clothes_clothing.id',
+            [tsquery], output_field=FloatField()
+        ))
+    elif fts5_available():
+        match = ' '.join(f'"{token}"' + ('*' if prefix else '') for token, prefix in terms)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = clothes_clothing.id',
+            [match], output_field=FloatField()
+        ))
+    else:
+        return queryset.filter(fallback_q(query))
+    return queryset.order_by('-rank', '-id')
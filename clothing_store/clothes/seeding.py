@@ -0,0 +1,252 @@
+"""
+可复现的目录数据生成
+
+同一 (规模, 随机种子) 总是生成相同的数据：设计师、分类树、季节/标签/面料、服装及其标签/面料关联、
+历史记录和查看授权。服装及关联数据用 bulk_create 分批写入，不经过 save() 和信号，
+每批写入变更记录（增量同步的客户端能看到生成的服装），结束后统一重算设计师统计，
+使缓存和进程内参考数据失效（见 signals.py 的说明）。
+授权不单独记录：服装的变更记录已经覆盖，增量同步按读取时的可见性返回。
+生成的数据集以标记用户 seed-<规模>-<种子> 识别，基准测试据此复用已有数据。
+
+BASE_REFERENCE 是 init_data.py / docker-init.py 初始化的基础参考数据，用 upsert_reference 批量补齐，可重复执行。
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache, categories, changes, reference, search, stats
+from .models import Category, CategoryClosure, Clothing, ClothingHistory, Designer, Material, Season, Tag, UserPermission
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+CATEGORY_TREE = {
+    '上装': ['衬衫', 'T恤', '卫衣', '针织衫'],
+    '下装': ['牛仔裤', '休闲裤', '短裤'],
+    '外套': ['风衣', '夹克', '羽绒服', '大衣'],
+    '裙装': ['连衣裙', '半身裙'],
+    '配饰': ['围巾', '帽子'],
+}
+SEASONS = ['春季', '夏季', '秋季', '冬季']
+STYLES = ['复古', '通勤', '休闲', '运动', '街头', '简约', '优雅', '学院', '度假', '工装']
+TAGS = [f'{style}{suffix}' for style in STYLES for suffix in ('', '风', '款', '系列')]
+MATERIALS = ['棉质', '麻', '真丝', '羊毛', '羊绒', '涤纶', '锦纶', '牛仔布', '皮革', '雪纺', '灯芯绒', '针织']
+COLORS = ['黑色', '白色', '灰色', '藏青', '米色', '卡其', '红色', '酒红', '墨绿', '天蓝', '浅粉', '驼色']
+PHRASES = [
+    '经典版型', '宽松剪裁', '修身设计', '透气面料', '亲肤舒适', '做工精细', '百搭单品', '手感柔软',
+    '抗皱易打理', '立体剪裁', '细节考究', '适合日常通勤', '季节限定', '轻盈保暖', '垂感好',
+]
+BASE_REFERENCE = {
+    Category: [
+        {'name': '上衣', 'description': '各种上衣类型'},
+        {'name': '裤子', 'description': '各种裤子类型'},
+        {'name': '裙子', 'description': '各种裙子类型'},
+        {'name': '外套', 'description': '各种外套类型'},
+        {'name': '内衣', 'description': '各种内衣类型'},
+        {'name': '配饰', 'description': '各种配饰类型'},
+    ],
+    Season: [
+        {'name': '春季', 'description': '春季服装'},
+        {'name': '夏季', 'description': '夏季服装'},
+        {'name': '秋季', 'description': '秋季服装'},
+        {'name': '冬季', 'description': '冬季服装'},
+        {'name': '四季', 'description': '四季通用服装'},
+    ],
+    Material: [
+        {'name': '棉质', 'description': '天然棉质面料'},
+        {'name': '丝绸', 'description': '天然丝绸面料'},
+        {'name': '羊毛', 'description': '天然羊毛面料'},
+        {'name': '聚酯纤维', 'description': '合成纤维面料'},
+        {'name': '尼龙', 'description': '合成尼龙面料'},
+        {'name': '牛仔布', 'description': '牛仔面料'},
+        {'name': '针织', 'description': '针织面料'},
+        {'name': '蕾丝', 'description': '蕾丝面料'},
+    ],
+    Tag: [
+        {'name': '时尚', 'color': '#FF6B6B'},
+        {'name': '经典', 'color': '#4ECDC4'},
+        {'name': '休闲', 'color': '#45B7D1'},
+        {'name': '商务', 'color': '#96CEB4'},
+        {'name': '运动', 'color': '#FFEAA7'},
+        {'name': '优雅', 'color': '#DDA0DD'},
+        {'name': '可爱', 'color': '#FFB6C1'},
+        {'name': '复古', 'color': '#DEB887'},
+        {'name': '简约', 'color': '#F0F8FF'},
+        {'name': '奢华', 'color': '#FFD700'},
+    ],
+}
+# 发布状态的比例：已发布 / 草稿 / 已归档
+STATUS_WEIGHTS = (('published', 6), ('draft', 3), ('archived', 1))
+
+
+def parse_size(value):
+    """'1k' / '100k' / '1m' 或整数"""
+    return SIZES.get(str(value).lower()) or int(value)
+
+
+def dataset_name(size, seed):
+    return f'seed-{size}-{seed}'
+
+
+def existing_dataset():
+    """当前数据库中已生成的数据集名称，没有时返回 None"""
+    return User.objects.filter(username__startswith='seed-').values_list('username', flat=True).first()
+
+
+def upsert_reference(model, rows):
+    """
+    按唯一的 name 批量补齐参考数据，已存在的行保持不变（与 get_or_create 语义相同）。
+    返回 (name -> 对象, 新建的名称列表)；没有新建时只有两次查询，新建分类另外写入闭包行。
+    """
+    names = [row['name'] for row in rows]
+    existing = set(model.objects.filter(name__in=names).values_list('name', flat=True))
+    missing = [row for row in rows if row['name'] not in existing]
+    # 并发初始化时另一进程可能刚插入同名行，忽略冲突
+    model.objects.bulk_create([model(**row) for row in missing], ignore_conflicts=True)
+    objects = model.objects.in_bulk(names, field_name='name')
+    created = [row['name'] for row in missing]
+    if created:
+        if model is Category:
+            # 批量写入不经过 Category.save()，按先父后子的顺序补上闭包行
+            linked = set(CategoryClosure.objects.filter(
+                depth=0, descendant__name__in=created
+            ).values_list('descendant_id', flat=True))
+            for name in created:
+                if objects[name].pk not in linked:
+                    categories.insert_node(objects[name])
+        cache.bump('catalog', 'reference')
+        reference.reference_changed()
+    return objects, created
+
+
+def seed_base_reference():
+    """初始化基础参考数据，返回 {模型: 新建的名称列表}"""
+    with transaction.atomic():
+        return {model: upsert_reference(model, rows)[1] for model, rows in BASE_REFERENCE.items()}
+
+
+class CatalogSeeder:
+    """按规模生成目录数据：每 1000 件服装一名设计师，每 20 件服装一条查看授权"""
+
+    def __init__(self, size, seed=42, batch_size=5_000, progress=None):
+        self.size = size
+        self.seed = seed
+        self.batch_size = batch_size
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.counts = {}
+
+    def run(self):
+        with transaction.atomic():
+            User.objects.create(username=dataset_name(self.size, self.seed), password=make_password(None))
+            self.seed_reference()
+            self.seed_users()
+            self.seed_clothes()
+            self.seed_grants()
+            stats.rebuild([designer.pk for designer in self.designers])
+        # 批量写入不触发信号
+        cache.clear()
+        reference.reference_changed()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return self.counts
+
+    def seed_reference(self):
+        roots = upsert_reference(Category, [{'name': name} for name in CATEGORY_TREE])[0]
+        children = upsert_reference(Category, [
+            {'name': name, 'parent': roots[root]} for root, names in CATEGORY_TREE.items() for name in names
+        ])[0]
+        self.categories = [children[name] for names in CATEGORY_TREE.values() for name in names]
+        self.seasons = self.named(Season, SEASONS)
+        self.tags = self.named(Tag, TAGS)
+        self.materials = self.named(Material, MATERIALS)
+
+    def named(self, model, names):
+        """补齐并按名称列表的顺序返回，保证随机选择可复现"""
+        objects = upsert_reference(model, [{'name': name} for name in names])[0]
+        return [objects[name] for name in names]
+
+    def seed_users(self):
+        password = make_password(None)
+        designer_count = max(1, self.size // 1_000)
+        viewer_count = max(10, self.size // 1_000)
+        users = User.objects.bulk_create(
+            [User(username=f'designer{i:05d}', password=password) for i in range(designer_count)]
+            + [User(username=f'viewer{i:05d}', password=password) for i in range(viewer_count)],
+            batch_size=self.batch_size,
+        )
+        self.designers = Designer.objects.bulk_create([
+            Designer(user=user, name=f'设计师{i:05d}', email=f'{user.username}@example.com')
+            for i, user in enumerate(users[:designer_count])
+        ], batch_size=self.batch_size)
+        self.viewers = users[designer_count:]
+        self.counts.update(designers=designer_count, viewers=viewer_count)
+        self.report('users', len(users), len(users))
+
+    def clothing(self, i):
+        rng = self.rng
+        category = rng.choice(self.categories)
+        status = rng.choices([name for name, _ in STATUS_WEIGHTS], [weight for _, weight in STATUS_WEIGHTS])[0]
+        return Clothing(
+            name=f'{rng.choice(STYLES)}{category.name}',
+            style_number=f'S{self.seed}-{i:07d}',
+            description='，'.join(rng.sample(PHRASES, 3)),
+            category=category,
+            season=rng.choice(self.seasons),
+            gender=rng.choice('MFU'),
+            designer=self.designers[i % len(self.designers)],
+            color=rng.choice(COLORS),
+            main_image='',
+            status=status,
+            published_at=timezone.now() if status == 'published' else None,
+            is_public=rng.random() < 0.4,
+        )
+
+    def seed_clothes(self):
+        self.clothing_ids = []
+        history = 0
+        for offset in range(0, self.size, self.batch_size):
+            clothes = Clothing.objects.bulk_create(
+                [self.clothing(i) for i in range(offset, min(offset + self.batch_size, self.size))]
+            )
+            self.clothing_ids += [clothing.pk for clothing in clothes]
+            Clothing.tags.through.objects.bulk_create([
+                Clothing.tags.through(clothing_id=clothing.pk, tag_id=tag.pk)
+                for clothing in clothes for tag in self.rng.sample(self.tags, 2)
+            ])
+            Clothing.materials.through.objects.bulk_create([
+                Clothing.materials.through(clothing_id=clothing.pk, material_id=material.pk)
+                for clothing in clothes for material in self.rng.sample(self.materials, self.rng.randint(1, 2))
+            ])
+            entries = [
+                ClothingHistory(clothing_id=clothing.pk, designer_id=clothing.designer_id, action='创建')
+                for clothing in clothes
+            ] + [
+                ClothingHistory(clothing_id=clothing.pk, designer_id=clothing.designer_id, action='发布')
+                for clothing in clothes if clothing.status == 'published'
+            ]
+            ClothingHistory.objects.bulk_create(entries)
+            history += len(entries)
+            search.index_rows([(c.pk, c.name, c.style_number, c.description) for c in clothes])
+            changes.record([clothing.pk for clothing in clothes])
+            self.report('clothes', len(self.clothing_ids), self.size)
+        self.counts.update(clothes=len(self.clothing_ids), history=history)
+
+    def seed_grants(self):
+        pairs = set()
+        target = min(self.size // 20, len(self.viewers) * len(self.clothing_ids))
+        while len(pairs) < target:
+            pairs.add((self.rng.choice(self.viewers).pk, self.rng.choice(self.clothing_ids)))
+        UserPermission.objects.bulk_create(
+            [UserPermission(user_id=user_id, clothing_id=clothing_id, can_view=True) for user_id, clothing_id in pairs],
+            batch_size=self.batch_size,
+        )
+        self.counts['grants'] = len(pairs)
+        self.report('grants', len(pairs), len(pairs))
+
+    def report(self, stage, done, total):
+        if self.progress is not None:
+            self.progress(stage, done, total)
@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import F
+from .images import variant_urls
+from .reference import reference_for
 from .models import (
-    Designer, Category, Tag, Season, Material, 
+    Designer, DesignerStats, Category, Tag, Season, Material, 
     Clothing, ClothingHistory, UserPermission
 )
 
@@ -12,16 +15,29 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_staff']
         read_only_fields = ['id', 'is_staff']
 
+class DesignerStatsSerializer(serializers.ModelSerializer):
+    """设计师统计序列化器"""
+    published_this_season = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = DesignerStats
+        fields = [
+            'total_count', 'draft_count', 'published_count', 'archived_count',
+            'published_this_season', 'last_published_at'
+        ]
+
 class DesignerSerializer(serializers.ModelSerializer):
     """设计师序列化器"""
     user = UserSerializer(read_only=True)
     user_id = serializers.IntegerField(write_only=True)
+    # 增量维护的统计行，查询集需 select_related('stats')
+    stats = DesignerStatsSerializer(read_only=True)
     
     class Meta:
         model = Designer
         fields = [
             'id', 'user', 'user_id', 'name', 'email', 'phone', 'bio', 
-            'avatar', 'is_active', 'created_at', 'updated_at'
+            'avatar', 'is_active', 'stats', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -34,6 +50,13 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'parent', 'parent_name', 'created_at']
         read_only_fields = ['id', 'created_at']
 
+    def validate_parent(self, parent):
+        from .categories import creates_cycle
+
+        if parent is not None and self.instance is not None and creates_cycle(self.instance.pk, parent.pk):
+            raise serializers.ValidationError('不能把分类移动到它自己或它的子分类下')
+        return parent
+
 class TagSerializer(serializers.ModelSerializer):
     """标签序列化器"""
     class Meta:
@@ -62,6 +85,7 @@ class ClothingSerializer(serializers.ModelSerializer):
     season_name = serializers.CharField(source='season.name', read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     materials = MaterialSerializer(many=True, read_only=True)
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Clothing
@@ -69,26 +93,40 @@ class ClothingSerializer(serializers.ModelSerializer):
             'id', 'name', 'style_number', 'description', 'category', 'category_name',
             'gender', 'season', 'season_name', 'designer', 'designer_name', 'tags',
             'materials', 'color', 'size_range', 'price_range', 'main_image',
-            'additional_images', 'status', 'created_at', 'updated_at', 'published_at',
+            'additional_images', 'image_variants', 'status', 'created_at', 'updated_at', 'published_at',
             'is_public'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'published_at']
 
+    def get_image_variants(self, obj):
+        """主图和各附加图片的衍生图地址，尚未生成时为空字典"""
+        request = self.context.get('request')
+        return {
+            'main_image': variant_urls(obj.image_variants, obj.main_image.name, request),
+            'additional_images': [
+                variant_urls(obj.image_variants, source, request) for source in obj.additional_images or []
+            ],
+        }
+
 class ClothingListSerializer(serializers.ModelSerializer):
     """服装列表序列化器（简化版）"""
     designer_name = serializers.CharField(source='designer.name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     season_name = serializers.CharField(source='season.name', read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    main_image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Clothing
         fields = [
             'id', 'name', 'style_number', 'designer_name', 'category_name',
-            'season_name', 'gender', 'color', 'main_image', 'tags', 'status',
+            'season_name', 'gender', 'color', 'main_image', 'main_image_variants', 'tags', 'status',
             'created_at', 'updated_at', 'is_public'
         ]
 
+    def get_main_image_variants(self, obj):
+        return variant_urls(obj.image_variants, obj.main_image.name, self.context.get('request'))
+
 class ClothingCreateSerializer(serializers.ModelSerializer):
     """服装创建序列化器"""
     class Meta:
@@ -99,6 +137,45 @@ class ClothingCreateSerializer(serializers.ModelSerializer):
             'additional_images', 'status', 'is_public'
         ]
 
+class ClothingImportSerializer(ClothingCreateSerializer):
+    """
+    服装批量导入序列化器
+
+    关联字段只校验 id 格式，引用是否存在、款式号是否重复由 context['known'] 中预先查出的集合判断，
+    避免每行各查一次数据库。主图填写已上传文件的存储路径。
+    """
+    style_number = serializers.CharField(max_length=50)
+    category = serializers.IntegerField(required=False, allow_null=True)
+    season = serializers.IntegerField(required=False, allow_null=True)
+    tags = serializers.ListField(child=serializers.IntegerField(), default=list)
+    materials = serializers.ListField(child=serializers.IntegerField(), default=list)
+    main_image = serializers.CharField(max_length=100, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        known = self.context['known']
+        errors = {}
+        if attrs['style_number'] in known['duplicate_style_numbers']:
+            errors['style_number'] = ['款式号在导入数据中重复']
+        elif attrs['style_number'] in known['existing_style_numbers']:
+            errors['style_number'] = ['款式号已存在']
+        for field in ('category', 'season'):
+            value = attrs.get(field)
+            if value is not None and value not in known[field]:
+                errors[field] = [f'无效的 id: {value}']
+        for field in ('tags', 'materials'):
+            missing = [value for value in attrs[field] if value not in known[field]]
+            if missing:
+                errors[field] = [f'无效的 id: {", ".join(map(str, missing))}']
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+class ClothingBulkActionSerializer(serializers.Serializer):
+    """批量操作参数，operation 的取值见 bulk.BULK_OPERATIONS"""
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=10000)
+    operation = serializers.CharField()
+    value = serializers.IntegerField(required=False, allow_null=True)
+
 class ClothingHistorySerializer(serializers.ModelSerializer):
     """服装历史序列化器"""
     designer_name = serializers.CharField(source='designer.name', read_only=True)
@@ -125,3 +202,92 @@ class UserPermissionSerializer(serializers.ModelSerializer):
             'granted_at', 'expires_at'
         ]
         read_only_fields = ['id', 'granted_at']
+
+class ClothingListFastSerializer:
+    """
+    服装列表快速序列化器
+
+    输入 values() 返回的字典行，输出与 ClothingListSerializer 完全一致的数据；
+    不实例化模型、不做字段自省，标签用一条查询批量取出。
+    """
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, rows, many=True, context=None):
+        self.rows = list(rows)
+        self.context = context or {}
+
+    @staticmethod
+    def values(queryset, *extra):
+        """把服装查询集转换为快速序列化所需的字典行，extra 为额外保留的字段（如游标排序字段）"""
+        return queryset.values(
+            'id', 'name', 'style_number', 'gender', 'color', 'main_image', 'image_variants', 'status',
+            'created_at', 'updated_at', 'is_public', *extra,
+            'category_id', 'season_id',
+            designer_name=F('designer__name'),
+        )
+
+    def tag_links(self):
+        through = Clothing.tags.through.objects.filter(clothing_id__in=[row['id'] for row in self.rows])
+        # order_by('tag') 使用 Tag 的默认排序，与模型序列化器预取的 tags 顺序一致
+        return list(through.order_by('clothing_id', 'tag').values_list('clothing_id', 'tag_id'))
+
+    def tags_by_clothing(self, links, ref):
+        tags = {}
+        for clothing_id, tag_id in links:
+            tag = ref.tags[tag_id]
+            tags.setdefault(clothing_id, []).append({
+                'id': tag_id,
+                'name': tag['name'],
+                'color': tag['color'],
+                'created_at': self.datetime_field.to_representation(tag['created_at']),
+            })
+        return tags
+
+    def image_url(self, name):
+        if not name:
+            return None
+        url = self.storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    @property
+    def data(self):
+        if not self.rows:
+            return []
+        self.storage = Clothing._meta.get_field('main_image').storage
+        links = self.tag_links()
+        # 分类/季节/标签名称取自进程内参考数据，不再连接这些表
+        ref = reference_for(
+            categories=[row['category_id'] for row in self.rows],
+            seasons=[row['season_id'] for row in self.rows],
+            tags=[tag_id for _, tag_id in links],
+        )
+        tags = self.tags_by_clothing(links, ref)
+        to_datetime = self.datetime_field.to_representation
+        request = self.context.get('request')
+        result = []
+        for row in self.rows:
+            item = {
+                'id': row['id'],
+                'name': row['name'],
+                'style_number': row['style_number'],
+                'designer_name': row['designer_name'],
+            }
+            # 与 ClothingListSerializer 一致：分类/季节为空时省略该字段
+            for name, value in (('category_name', ref.category_name(row['category_id'])),
+                                ('season_name', ref.season_name(row['season_id']))):
+                if value is not None:
+                    item[name] = value
+            item.update({
+                'gender': row['gender'],
+                'color': row['color'],
+                'main_image': self.image_url(row['main_image']),
+                'main_image_variants': variant_urls(row['image_variants'], row['main_image'], request),
+                'tags': tags.get(row['id'], []),
+                'status': row['status'],
+                'created_at': to_datetime(row['created_at']),
+                'updated_at': to_datetime(row['updated_at']),
+                'is_public': row['is_public'],
+            })
+            result.append(item)
+        return result
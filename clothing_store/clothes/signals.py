@@ -0,0 +1,131 @@
+"""
+数据变更信号：递增缓存作用域版本号（见 cache.py），使进程内参考数据失效（见 reference.py），
+并记录增量同步的变更日志（见 changes.py）、增量维护设计师统计（见 stats.py）
+
+注意 QuerySet.update() / bulk_create() 不触发信号，批量写入后需要自行调用 cache.bump、changes.record
+和 stats.apply_changes。
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump, forget_visibility
+from .changes import record
+from .models import Category, Clothing, Designer, DesignerStats, Material, Season, Tag, UserPermission
+from .reference import reference_changed as reload_reference
+from .stats import apply_changes, rebuild, state
+
+
+@receiver([post_save, post_delete], sender=Clothing)
+def clothing_changed(sender, instance, **kwargs):
+    bump('catalog', f'clothing:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Clothing.tags.through)
+@receiver(m2m_changed, sender=Clothing.materials.through)
+@receiver(m2m_changed, sender=Clothing.view_permissions.through)
+def clothing_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # 从标签/面料/用户一侧修改时，pk_set 是服装 id（clear 时为 None，整体失效）
+        clothing_ids = pk_set or []
+        bump('catalog', 'reference', *[f'clothing:{pk}' for pk in clothing_ids])
+    else:
+        bump('catalog', f'clothing:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Season)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Material)
+def reference_changed(sender, instance, **kwargs):
+    bump('catalog', 'reference')
+    reload_reference()
+
+
+@receiver([post_save, post_delete], sender=Designer)
+def designer_changed(sender, instance, **kwargs):
+    bump('catalog', 'reference')
+    forget_visibility(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=UserPermission)
+def permission_changed(sender, instance, **kwargs):
+    forget_visibility(instance.user_id)
+
+
+# 变更日志：参考数据 -> Clothing 上引用它的字段
+REFERENCE_LOOKUPS = {Category: 'category', Season: 'season', Tag: 'tags', Material: 'materials', Designer: 'designer'}
+
+
+@receiver([post_save, post_delete], sender=Clothing)
+def log_clothing_change(sender, instance, signal, **kwargs):
+    record([instance.pk], 'delete' if signal is post_delete else 'upsert')
+
+
+@receiver(m2m_changed, sender=Clothing.tags.through)
+@receiver(m2m_changed, sender=Clothing.materials.through)
+def log_relations_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            record([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        record(pk_set)
+    elif action == 'pre_clear':
+        # 清空前记录受影响的服装，之后就查不到了
+        lookup = f'{instance._meta.model_name}_id'
+        record(sender.objects.filter(**{lookup: instance.pk}).values_list('clothing_id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Season)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Material)
+@receiver(post_save, sender=Designer)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Season)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Material)
+def log_reference_change(sender, instance, created=False, **kwargs):
+    """参考数据改名或删除会改变引用它的服装的输出"""
+    if created:
+        return
+    lookup = REFERENCE_LOOKUPS[sender]
+    record(Clothing.objects.filter(**{lookup: instance}).values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=UserPermission)
+def log_permission_change(sender, instance, origin=None, **kwargs):
+    """授权获得或失去只影响被授权用户"""
+    # 删除用户时级联删除的授权不再记录：该用户的变更日志也随之删除，新记录会引用不存在的用户
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    record([instance.clothing_id], user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Designer)
+def create_designer_stats(sender, instance, created, **kwargs):
+    if created:
+        DesignerStats.objects.get_or_create(designer=instance)
+
+
+@receiver(post_save, sender=Clothing)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    new = state(instance)
+    if created:
+        apply_changes([(None, new)])
+    elif hasattr(instance, '_stats_state'):
+        apply_changes([(instance._stats_state, new)])
+    else:
+        # 未从数据库加载的实例不知道原来的状态，重算该设计师
+        rebuild([instance.designer_id])
+    instance._stats_state = new
+
+
+@receiver(post_delete, sender=Clothing)
+def update_stats_on_delete(sender, instance, origin=None, **kwargs):
+    # 删除设计师或用户时统计行随之级联删除
+    if isinstance(origin, (Designer, User)) or getattr(origin, 'model', None) in (Designer, User):
+        return
+    apply_changes([(getattr(instance, '_stats_state', state(instance)), None)])
@@ -0,0 +1,130 @@
+"""
+设计师统计（DesignerStats）的增量维护
+
+服装的统计状态为 (设计师 id, 状态, 发布时间)。服装保存或删除时由 signals.py 传入变更前后的状态，
+按设计师合并成增量，每位设计师一条 UPDATE（F 表达式，并发写入不会丢失计数）：
+- 服装总数和各状态计数 ±1
+- 本季发布数：发布时间在本季内的已发布服装 ±1，行上记录的季度已过期时从 0 开始
+- 最近发布时间：新增已发布服装时取较大值，失去已发布服装时用子查询重算
+变更前的状态在实例从数据库加载时记下（Clothing.from_db），不需要额外查询。
+bulk_create / update 不触发信号，批量写入处直接调用 apply_changes 或 rebuild。
+统计行缺失时按该设计师重算；rebuild_designer_stats 命令全量重算，用于修复漂移。
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time
+
+from django.db.models import Case, Count, F, Max, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import Clothing, Designer, DesignerStats
+
+STATUSES = [status for status, _ in Clothing.STATUS_CHOICES]
+STATS_FIELDS = [
+    'total_count', 'draft_count', 'published_count', 'archived_count',
+    'season_start', 'season_published_count', 'last_published_at', 'updated_at',
+]
+
+
+def season_start(moment=None):
+    """所在季节（3-5 月春、6-8 月夏、9-11 月秋、12-2 月冬）的开始日期"""
+    day = timezone.localdate(moment)
+    month = day.month - day.month % 3
+    return date(day.year, month, 1) if month else date(day.year - 1, 12, 1)
+
+
+def season_start_at(start):
+    return timezone.make_aware(datetime.combine(start, time.min))
+
+
+def state(clothing):
+    """服装的统计状态"""
+    return (clothing.designer_id, clothing.status, clothing.published_at)
+
+
+def apply_changes(changes):
+    """changes 为 [(变更前状态或 None, 变更后状态或 None)]，按设计师合并后各执行一条 UPDATE"""
+    current = season_start()
+    since = season_start_at(current)
+    deltas = defaultdict(lambda: {'counts': Counter(), 'season': 0, 'added': None, 'removed': False})
+    for old, new in changes:
+        if old == new:
+            continue
+        for sign, item in ((-1, old), (1, new)):
+            if item is None:
+                continue
+            designer_id, status, published_at = item
+            delta = deltas[designer_id]
+            delta['counts']['total'] += sign
+            delta['counts'][status] += sign
+            if status != 'published' or published_at is None:
+                continue
+            if published_at >= since:
+                delta['season'] += sign
+            if sign < 0:
+                delta['removed'] = True
+            elif delta['added'] is None or published_at > delta['added']:
+                delta['added'] = published_at
+
+    missing = []
+    for designer_id, delta in deltas.items():
+        fields = {
+            f'{name}_count': F(f'{name}_count') + count
+            for name, count in delta['counts'].items() if count and (name == 'total' or name in STATUSES)
+        }
+        if delta['season']:
+            fields['season_published_count'] = Case(
+                When(season_start=current, then=F('season_published_count') + delta['season']),
+                default=Value(max(delta['season'], 0)),
+            )
+            fields['season_start'] = Value(current)
+        if delta['removed']:
+            fields['last_published_at'] = Subquery(
+                Clothing.objects.filter(designer_id=designer_id, status='published')
+                .order_by('-published_at').values('published_at')[:1]
+            )
+        elif delta['added'] is not None:
+            fields['last_published_at'] = Case(
+                When(Q(last_published_at__isnull=True) | Q(last_published_at__lt=delta['added']),
+                     then=Value(delta['added'])),
+                default=F('last_published_at'),
+            )
+        if not fields:
+            continue
+        fields['updated_at'] = timezone.now()
+        if not DesignerStats.objects.filter(designer_id=designer_id).update(**fields):
+            missing.append(designer_id)
+    if missing:
+        rebuild(missing)
+
+
+def rebuild(designer_ids=None, batch_size=1000):
+    """按服装表重算统计（指定设计师或全部），返回写入的行数"""
+    current = season_start()
+    published = Q(clothes__status='published')
+    designers = Designer.objects.all() if designer_ids is None else Designer.objects.filter(pk__in=designer_ids)
+    rows = designers.order_by('pk').values('pk').annotate(
+        total=Count('clothes'),
+        season=Count('clothes', filter=published & Q(clothes__published_at__gte=season_start_at(current))),
+        last=Max('clothes__published_at', filter=published),
+        **{status: Count('clothes', filter=Q(clothes__status=status)) for status in STATUSES},
+    )
+    now = timezone.now()
+    batch, total = [], 0
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(DesignerStats(
+            designer_id=row['pk'], total_count=row['total'], draft_count=row['draft'],
+            published_count=row['published'], archived_count=row['archived'], season_start=current,
+            season_published_count=row['season'], last_published_at=row['last'], updated_at=now,
+        ))
+        if len(batch) == batch_size:
+            total += write(batch)
+            batch = []
+    return total + write(batch)
+
+
+def write(stats):
+    """插入或覆盖统计行"""
+    DesignerStats.objects.bulk_create(
+        stats, update_conflicts=True, unique_fields=['designer'], update_fields=STATS_FIELDS,
+    )
+    return len(stats)
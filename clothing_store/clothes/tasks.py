@@ -0,0 +1,61 @@
+"""
+服装后台任务
+"""
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from .cache import bump
+from .changes import record
+from .images import generate_variants, image_sources
+from .models import Clothing
+from .retention import archive_history, purge_expired_grants
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_image_variants(clothing_id):
+    """为服装的主图和附加图片生成衍生图，已生成或已失败的原图跳过，已删除的原图移除记录"""
+    clothing = Clothing.objects.filter(pk=clothing_id).values('main_image', 'additional_images', 'image_variants').first()
+    if clothing is None:
+        return
+    sources = image_sources(clothing['main_image'], clothing['additional_images'])
+    current = clothing['image_variants'] or {}
+    variants = {source: current[source] for source in sources if source in current}
+    for source in sources:
+        if source in variants:
+            continue
+        try:
+            variants[source] = generate_variants(source)
+        except (OSError, ValueError) as exc:
+            logger.exception('生成衍生图失败: clothing=%s source=%s', clothing_id, source)
+            # 记下失败，之后保存时不再重试；重新上传的图片存储名不同，会重新生成
+            variants[source] = {'error': str(exc)}
+
+    if variants != current:
+        # 只更新衍生图字段，不触发 save() 和信号，需要手动使缓存失效并记录变更
+        Clothing.objects.filter(pk=clothing_id).update(image_variants=variants)
+        bump('catalog', f'clothing:{clothing_id}')
+        record([clothing_id])
+
+
+@shared_task
+def archive_clothing_history():
+    """由 Celery beat 定时执行：分块归档过期历史，单次最多处理 HISTORY_ARCHIVE_MAX_CHUNKS 块，未完成时排队继续"""
+    total, done = archive_history(max_chunks=getattr(settings, 'HISTORY_ARCHIVE_MAX_CHUNKS', 50))
+    logger.info('归档服装历史 %s 条', total)
+    if not done:
+        archive_clothing_history.delay()
+    return total
+
+
+@shared_task
+def purge_expired_permissions():
+    """由 Celery beat 定时执行：分块删除已过期的授权，单次最多处理 GRANT_PURGE_MAX_CHUNKS 块，未完成时排队继续"""
+    total, done = purge_expired_grants(max_chunks=getattr(settings, 'GRANT_PURGE_MAX_CHUNKS', 50))
+    logger.info('删除过期授权 %s 条', total)
+    if not done:
+        purge_expired_permissions.delay()
+    return total
@@ -1,3 +1,1402 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from . import cache as catalog_cache
+from . import reference
+from .models import (
+    Designer, DesignerStats, Category, CategoryClosure, Tag, Season, Material,
+    Clothing, ClothingChange, ClothingHistory, ClothingHistoryArchive, ClothingSearchIndex, UserPermission
+)
+from .concurrency import offload_reads
+from .metrics import timed_serialize
+from .permissions import (
+    CanViewClothing, IsDesignerOwnerOrReadOnly, IsOwnerOrReadOnly, PermissionResolver, check
+)
+from .retention import archive_history, purge_expired_grants
+from .search import tokenize, tokenize_query
+from .tracking import diff, snapshot
+from .serializers import ClothingListFastSerializer, ClothingListSerializer
+from .visibility import visible_clothes
+
+
+def make_clothes(designer, count, start=0, **kwargs):
+    """批量创建带标签和面料的测试服装"""
+    category = Category.objects.get_or_create(name='上衣')[0]
+    season = Season.objects.get_or_create(name='春季')[0]
+    tag = Tag.objects.get_or_create(name='时尚')[0]
+    material = Material.objects.get_or_create(name='棉质')[0]
+    clothes = []
+    for i in range(start, start + count):
+        clothing = Clothing.objects.create(
+            name=f'服装{i}', style_number=f'SN{designer.pk}-{i:05d}', description='测试描述',
+            category=category, season=season, designer=designer, color='红色',
+            main_image='clothing_images/test.jpg', **kwargs
+        )
+        clothing.tags.add(tag)
+        clothing.materials.add(material)
+        ClothingHistory.objects.create(clothing=clothing, designer=designer, action='创建')
+        clothes.append(clothing)
+    return clothes
+
+
+class ClothingTestCase(TestCase):
+    """服装 API 测试基类"""
+
+    def setUp(self):
+        catalog_cache.clear()
+        # 各测试回滚后 id 会复用，不能沿用上一个测试加载的参考数据
+        reference.registry.invalidate()
+        self.user = User.objects.create_user('designer', password='pass')
+        self.designer = Designer.objects.create(user=self.user, name='设计师', email='d@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        catalog_cache.clear()
+        # 只统计稳定状态的查询，参考数据每个进程只加载一次
+        reference.reference()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+
+class QueryBudgetTests(ClothingTestCase):
+    """查询次数不应随返回行数增长"""
+
+    def assertConstantQueries(self, url, grow):
+        make_clothes(self.designer, 2)
+        small = self.count_queries(url)
+        grow()
+        large = self.count_queries(url)
+        self.assertEqual(small, large)
+
+    def test_list(self):
+        self.assertConstantQueries('/api/clothes/', lambda: make_clothes(self.designer, 15, start=2))
+
+    def test_search(self):
+        self.assertConstantQueries('/api/clothes/search/?q=服装', lambda: make_clothes(self.designer, 15, start=2))
+
+    def test_designer_clothes(self):
+        url = f'/api/designers/{self.designer.pk}/clothes/'
+        self.assertConstantQueries(url, lambda: make_clothes(self.designer, 15, start=2))
+
+    def test_retrieve(self):
+        clothing = make_clothes(self.designer, 1)[0]
+        queries = self.count_queries(f'/api/clothes/{clothing.pk}/')
+        clothing.tags.add(*[Tag.objects.create(name=f'标签{i}') for i in range(5)])
+        clothing.materials.add(*[Material.objects.create(name=f'面料{i}') for i in range(5)])
+        self.assertEqual(queries, self.count_queries(f'/api/clothes/{clothing.pk}/'))
+
+    def test_history(self):
+        clothing = make_clothes(self.designer, 1)[0]
+        url = f'/api/clothes/{clothing.pk}/history/'
+        queries = self.count_queries(url)
+        list_queries = self.count_queries('/api/history/')
+        for _ in range(10):
+            ClothingHistory.objects.create(clothing=clothing, designer=self.designer, action='修改')
+        self.assertEqual(queries, self.count_queries(url))
+        self.assertEqual(list_queries, self.count_queries('/api/history/'))
+
+
+class VisibilityTests(ClothingTestCase):
+    """可见性规则：公开、本人设计、有效授权"""
+
+    def setUp(self):
+        super().setUp()
+        other_user = User.objects.create_user('other', password='pass')
+        other = Designer.objects.create(user=other_user, name='其他设计师', email='o@example.com')
+        self.own = make_clothes(self.designer, 1)[0]
+        self.public, self.granted, self.expired, self.hidden = make_clothes(other, 4, start=10)
+        Clothing.objects.filter(pk=self.public.pk).update(is_public=True)
+        UserPermission.objects.create(user=self.user, clothing=self.granted, can_view=True)
+        UserPermission.objects.create(
+            user=self.user, clothing=self.expired, can_view=True,
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+
+    def test_visible_clothes(self):
+        visible = set(visible_clothes(self.user).values_list('pk', flat=True))
+        self.assertEqual(visible, {self.own.pk, self.public.pk, self.granted.pk})
+        self.assertNotIn('DISTINCT', str(visible_clothes(self.user).query))
+
+    def test_permission_check_matches_queryset(self):
+        # 对象级权限与可见性查询集使用同一条授权有效规则（过期授权不生效）
+        resolver = PermissionResolver(self.user)
+        for clothing in Clothing.objects.all():
+            self.assertEqual(
+                resolver.has_perm(clothing),
+                visible_clothes(self.user).filter(pk=clothing.pk).exists()
+            )
+
+    def test_search_without_duplicates(self):
+        extra = Tag.objects.create(name='经典')
+        self.own.tags.add(extra)
+        tag_ids = [extra.pk, self.own.tags.first().pk]
+        response = self.client.get('/api/clothes/search/', {'tags': tag_ids, 'with_total': 1})
+        self.assertEqual(response.data['count'], 3)
+
+
+class KeysetPaginationTests(ClothingTestCase):
+    """游标分页：逐页遍历不重不漏，支持回翻和排序字段"""
+
+    def setUp(self):
+        super().setUp()
+        make_clothes(self.designer, 7)
+        # 制造 created_at 相同的记录，验证 id 作为次级排序键
+        Clothing.objects.filter(name__in=['服装2', '服装3', '服装4']).update(
+            created_at=Clothing.objects.get(name='服装2').created_at
+        )
+
+    def walk(self, url, params):
+        pages, response = [], self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            if not response.data['next']:
+                return pages
+            response = self.client.get(response.data['next'])
+
+    def test_walk_forward_and_back(self):
+        expected = list(Clothing.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        pages = self.walk('/api/clothes/', {'page_size': 3})
+        self.assertEqual([row['id'] for page in pages for row in page['results']], expected)
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+        previous = self.client.get(pages[-1]['previous']).data
+        self.assertEqual(previous['results'], pages[-2]['results'])
+
+    def test_ordering_field(self):
+        expected = list(Clothing.objects.order_by('style_number', 'id').values_list('id', flat=True))
+        pages = self.walk('/api/clothes/search/', {'page_size': 2, 'ordering': 'style_number'})
+        self.assertEqual([row['id'] for page in pages for row in page['results']], expected)
+
+    def test_history_and_totals(self):
+        pages = self.walk('/api/history/', {'page_size': 4, 'with_total': 'true'})
+        self.assertEqual(pages[0]['count'], 7)
+        self.assertEqual(sum(len(page['results']) for page in pages), 7)
+
+    def test_legacy_page_number(self):
+        response = self.client.get('/api/clothes/', {'page': 1})
+        self.assertEqual(response.data['count'], 7)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/clothes/', {'cursor': 'bad'}).status_code, 404)
+
+
+class FullTextSearchTests(ClothingTestCase):
+    """全文检索：中文切分、相关度排序、保存时同步"""
+
+    def setUp(self):
+        super().setUp()
+        self.dress, self.shirt, self.coat = make_clothes(self.designer, 3)
+        for clothing, name, description in [
+            (self.dress, '碎花连衣裙', '夏季轻薄款'),
+            (self.shirt, '白色衬衫', '搭配连衣裙的外搭'),
+            (self.coat, '羊毛大衣', '冬季保暖 wool coat'),
+        ]:
+            clothing.name, clothing.description = name, description
+            clothing.save()
+
+    def search(self, q):
+        response = self.client.get('/api/clothes/search/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('连衣裙 SN-01'), ['连', '衣', '裙', '连衣', '衣裙', 'sn', '01'])
+        self.assertEqual(tokenize_query('连衣裙'), [('连衣', False), ('衣裙', False)])
+
+    def test_ranking(self):
+        # 名称命中的权重高于描述命中
+        self.assertEqual(self.search('连衣裙'), [self.dress.pk, self.shirt.pk])
+        self.assertEqual(self.search('裙'), [self.dress.pk, self.shirt.pk])
+
+    def test_prefix_and_style_number(self):
+        self.assertEqual(self.search('wo'), [self.coat.pk])
+        self.assertEqual(self.search(self.coat.style_number), [self.coat.pk])
+
+    def test_index_follows_save_and_delete(self):
+        self.coat.name = '羽绒服'
+        self.coat.save()
+        self.assertEqual(self.search('大衣'), [])
+        self.assertEqual(self.search('羽绒'), [self.coat.pk])
+        self.dress.delete()
+        self.assertEqual(self.search('连衣裙'), [self.shirt.pk])
+
+    def test_rebuild(self):
+        ClothingSearchIndex.objects.all().delete()
+        self.assertEqual(self.search('大衣'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('大衣'), [self.coat.pk])
+
+    def test_clothing_list_page(self):
+        response = self.client.get('/', {'q': '连衣裙'})
+        self.assertEqual([c.pk for c in response.context['clothes']], [self.dress.pk, self.shirt.pk])
+
+
+class ExplainQueriesTests(ClothingTestCase):
+    """执行计划检查命令"""
+
+    def test_hot_filters_use_indexes(self):
+        make_clothes(self.designer, 3)
+        out = StringIO()
+        call_command('explain_queries', user='designer', stdout=out)
+        for name in ['clothes list filter status', 'clothes history', 'permission check']:
+            self.assertIn(f'[索引] {name}', out.getvalue())
+
+
+class FacetTests(ClothingTestCase):
+    """分面计数：单条查询、与搜索过滤条件一致、按可见性缓存"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothes = make_clothes(self.designer, 4)
+        self.winter = Season.objects.create(name='冬季')
+        Clothing.objects.filter(pk=self.clothes[0].pk).update(season=self.winter, gender='F')
+        self.clothes[1].tags.add(Tag.objects.create(name='经典'))
+
+    def test_counts_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/clothes/facets/')
+        facets = response.data
+        self.assertEqual(len([q for q in ctx.captured_queries if 'GROUP BY' in q['sql']]), 1)
+        self.assertEqual(facets['category'], [{'id': self.clothes[0].category_id, 'name': '上衣', 'count': 4}])
+        self.assertEqual({s['name']: s['count'] for s in facets['season']}, {'春季': 3, '冬季': 1})
+        self.assertEqual({g['name']: g['count'] for g in facets['gender']}, {'中性': 3, '女装': 1})
+        self.assertEqual({t['name']: t['count'] for t in facets['tags']}, {'时尚': 4, '经典': 1})
+        self.assertEqual(facets['materials'][0]['count'], 4)
+
+    def test_facets_follow_filters_and_visibility(self):
+        other = User.objects.create_user('viewer', password='pass')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/clothes/facets/').data['category'], [])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/clothes/search/', {'season': self.winter.pk, 'facets': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['facets']['gender'], [{'id': 'F', 'name': '女装', 'count': 1}])
+
+        response = self.client.get('/api/clothes/facets/', {'q': '服装', 'tags': self.clothes[1].tags.last().pk})
+        self.assertEqual({t['name']: t['count'] for t in response.data['tags']}, {'时尚': 1, '经典': 1})
+
+    def test_cached_per_filter(self):
+        self.client.get('/api/clothes/facets/', {'gender': 'F'})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/clothes/facets/', {'gender': 'F', 'page_size': 5})
+        self.assertFalse([q for q in ctx.captured_queries if 'GROUP BY' in q['sql']])
+
+
+class PermissionResolverTests(ClothingTestCase):
+    """权限解析器：授权只加载一次，批量判断"""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user('viewer', password='pass')
+        self.clothes = make_clothes(self.designer, 6)
+        UserPermission.objects.create(user=self.viewer, clothing=self.clothes[0], can_view=True, can_edit=True)
+        UserPermission.objects.create(user=self.viewer, clothing=self.clothes[1], can_view=True, can_delete=True)
+        UserPermission.objects.create(
+            user=self.viewer, clothing=self.clothes[2], can_view=True, expires_at=timezone.now() + timedelta(days=1)
+        )
+        Clothing.objects.filter(pk=self.clothes[3].pk).update(is_public=True)
+
+    def test_bulk_check(self):
+        ids = [c.pk for c in self.clothes]
+        resolver = PermissionResolver(self.viewer)
+        # 设计师档案 + 授权各加载一次，每次批量判断一条查询
+        with self.assertNumQueries(4):
+            # 未到期的限时授权同样有效
+            self.assertEqual(resolver.check(ids), {ids[0], ids[1], ids[2], ids[3]})
+            self.assertEqual(resolver.check(ids, 'edit'), {ids[0]})
+        self.assertEqual(check(self.viewer, ids, 'delete'), {ids[1]})
+        self.assertEqual(check(self.user, ids, 'publish'), set(ids))
+
+    def test_object_permissions_reuse_resolver(self):
+        request = APIRequestFactory().put('/')
+        request.user = self.viewer
+        clothes = list(Clothing.objects.all())
+        with self.assertNumQueries(2):
+            allowed = [c.pk for c in clothes if IsOwnerOrReadOnly().has_object_permission(request, None, c)]
+            [IsDesignerOwnerOrReadOnly().has_object_permission(request, None, c) for c in clothes]
+            [CanViewClothing().has_object_permission(request, None, c) for c in clothes]
+        self.assertEqual(allowed, [self.clothes[0].pk])
+
+    def test_publish(self):
+        self.client.force_authenticate(self.viewer)
+        response = self.client.post(f'/api/clothes/{self.clothes[0].pk}/publish/')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(f'/api/clothes/{self.clothes[0].pk}/publish/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.clothes[0].history.filter(action='发布', designer=self.designer).exists())
+
+
+class ResponseCacheTests(ClothingTestCase):
+    """两级响应缓存：命中、按可见性隔离、信号精确失效"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothes = make_clothes(self.designer, 3)
+        self.viewer = User.objects.create_user('viewer', password='pass')
+
+    def get(self, url, user=None):
+        self.client.force_authenticate(user or self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def lookups(self):
+        from prometheus_client import REGISTRY
+        return {
+            (layer, result): REGISTRY.get_sample_value(
+                'clothing_cache_lookups_total', {'layer': layer, 'result': result}
+            ) or 0
+            for layer in ('l1', 'l2') for result in ('hit', 'miss')
+        }
+
+    def test_hit_without_queries(self):
+        before = self.lookups()
+        self.assertEqual(self.get('/api/clothes/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.get('/api/clothes/')
+        self.assertEqual(response['X-Cache'], 'HIT-L1')
+        catalog_cache.l1.clear()
+        self.assertEqual(self.get('/api/clothes/')['X-Cache'], 'HIT-L2')
+        after = self.lookups()
+        self.assertEqual(
+            {key: after[key] - before[key] for key in after},
+            {('l1', 'hit'): 1, ('l1', 'miss'): 2, ('l2', 'hit'): 1, ('l2', 'miss'): 1},
+        )
+
+    def test_params_normalized(self):
+        self.get('/api/clothes/?status=draft&gender=U')
+        self.assertEqual(self.get('/api/clothes/?gender=U&status=draft')['X-Cache'], 'HIT-L1')
+
+    def test_invalidated_by_clothing_and_reference_changes(self):
+        url = f'/api/clothes/{self.clothes[0].pk}/'
+        self.get(url)
+        self.get('/api/clothes/')
+        self.clothes[1].name = '新名称'
+        self.clothes[1].save()
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT-L1')
+        self.assertEqual(self.get('/api/clothes/')['X-Cache'], 'MISS')
+
+        tag = self.clothes[0].tags.first()
+        tag.name = '新标签'
+        tag.save()
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['tags'][0]['name'], '新标签')
+
+        self.clothes[0].materials.clear()
+        self.assertEqual(self.get(url).data['materials'], [])
+
+    def test_visibility_isolation(self):
+        self.assertEqual(len(self.get('/api/clothes/', self.viewer).data['results']), 0)
+        UserPermission.objects.create(user=self.viewer, clothing=self.clothes[0], can_view=True)
+        self.assertEqual(len(self.get('/api/clothes/', self.viewer).data['results']), 1)
+        self.assertEqual(len(self.get('/api/clothes/').data['results']), 3)
+
+    def test_page_cache(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/')['X-Cache'], 'HIT-L1')
+        self.assertEqual(self.client.get('/', {'gender': 'F'})['X-Cache'], 'MISS')
+        Clothing.objects.create(
+            name='新款', style_number='NEW-1', description='', designer=self.designer, main_image=''
+        )
+        self.assertContains(self.client.get('/'), 'NEW-1')
+
+
+class ConditionalRequestTests(ClothingTestCase):
+    """ETag / 304 与缓存头"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothing = make_clothes(self.designer, 2)[0]
+
+    def test_detail_not_modified(self):
+        url = f'/api/clothes/{self.clothing.pk}/'
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        self.clothing.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_etag_follows_reference_data(self):
+        url = f'/api/clothes/{self.clothing.pk}/'
+        etag = self.client.get(url)['ETag']
+        Tag.objects.filter(pk=self.clothing.tags.first().pk).first().save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_not_modified_until_delete(self):
+        response = self.client.get('/api/clothes/', {'status': 'draft'})
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/clothes/', {'status': 'draft'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertNotEqual(self.client.get('/api/clothes/', {'status': 'published'})['ETag'], etag)
+        Clothing.objects.exclude(pk=self.clothing.pk).first().delete()
+        self.assertEqual(self.client.get('/api/clothes/', {'status': 'draft'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_page_cache_headers(self):
+        self.client.logout()
+        response = self.client.get('/')
+        # 列表页包含未公开的服装，不允许共享缓存
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # 只有公开服装的详情页允许共享缓存
+        from .views import clothing_detail_validators
+        request = APIRequestFactory().get(f'/clothing/{self.clothing.pk}/')
+        request.user = AnonymousUser()
+        self.assertFalse(clothing_detail_validators(request, self.clothing.pk)[1])
+        Clothing.objects.filter(pk=self.clothing.pk).update(is_public=True)
+        self.assertTrue(clothing_detail_validators(request, self.clothing.pk)[1])
+
+
+class FastSerializerTests(ClothingTestCase):
+    """values() 快速序列化与 ClothingListSerializer 输出一致"""
+
+    def setUp(self):
+        super().setUp()
+        clothes = make_clothes(self.designer, 3)
+        bare = Clothing.objects.create(
+            name='无分类', style_number='BARE-1', description='', designer=self.designer, main_image=''
+        )
+        bare.tags.add(Tag.objects.create(name='基础'), Tag.objects.create(name='百搭'))
+        Clothing.objects.filter(pk=clothes[0].pk).update(image_variants={
+            'clothing_images/test.jpg': {'thumb': {'webp': 'clothing_images/variants/test-thumb.webp'}},
+        })
+
+    maxDiff = None
+
+    def assertGolden(self, context):
+        queryset = Clothing.objects.order_by('-created_at', '-id')
+        expected = ClothingListSerializer(queryset, many=True, context=context).data
+        actual = ClothingListFastSerializer(ClothingListFastSerializer.values(queryset), context=context).data
+        self.assertEqual(json.loads(json.dumps(expected)), actual)
+
+    def test_golden_output(self):
+        self.assertGolden({})
+
+    def test_golden_output_with_request(self):
+        self.assertGolden({'request': APIRequestFactory().get('/api/clothes/')})
+
+    def test_tag_order_matches_model_serializer(self):
+        clothing = Clothing.objects.get(style_number='BARE-1')
+        # 关联表的插入顺序与标签 id 顺序相反
+        clothing.tags.set([])
+        tags = [Tag.objects.create(name=f'标签{i}') for i in range(3)]
+        clothing.tags.add(tags[2])
+        clothing.tags.add(tags[0], tags[1])
+        queryset = Clothing.objects.filter(pk=clothing.pk).prefetch_related('tags')
+        expected = ClothingListSerializer(queryset, many=True).data[0]['tags']
+        actual = ClothingListFastSerializer(ClothingListFastSerializer.values(queryset)).data[0]['tags']
+        self.assertEqual([tag['id'] for tag in actual], [tag.pk for tag in tags])
+        self.assertEqual(json.loads(json.dumps(expected)), actual)
+
+    def test_list_uses_fast_path(self):
+        response = self.client.get('/api/clothes/')
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertTrue(response.data['results'][-1]['main_image'].startswith('http://testserver/'))
+
+
+class ExportTests(ClothingTestCase):
+    """流式导出"""
+
+    def setUp(self):
+        super().setUp()
+        make_clothes(self.designer, 5)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        response = self.client.get('/api/clothes/export/', {'q': '服装3'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['服装3'])
+        self.assertEqual(rows[0]['tags'], ['时尚'])
+        self.assertEqual(rows[0]['materials'], ['棉质'])
+
+    def test_csv(self):
+        lines = self.read(self.client.get('/api/clothes/export/', {'export_format': 'csv'})).splitlines()
+        self.assertTrue(lines[0].startswith('\ufeffid,name,'))
+        self.assertEqual(len(lines), 6)
+        self.assertIn('时尚', lines[1])
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/api/clothes/export/', {'export_format': 'xml'}).status_code, 400)
+
+    def test_visibility(self):
+        viewer = User.objects.create_user('viewer', password='pass')
+        self.client.force_authenticate(viewer)
+        self.assertEqual(self.read(self.client.get('/api/clothes/export/')), '')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_queries_per_chunk(self):
+        response = self.client.get('/api/clothes/export/')
+        reference.reference()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(self.read(response).splitlines()), 5)
+        # 主查询 + 每个分块（3 个）各两条标签/面料查询
+        self.assertEqual(len(ctx.captured_queries), 1 + 3 * 2)
+
+
+class BulkImportTests(ClothingTestCase):
+    """批量导入"""
+    url = '/api/clothes/bulk-import/'
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='外套')
+        self.tags = [Tag.objects.create(name='通勤'), Tag.objects.create(name='休闲')]
+        self.material = Material.objects.create(name='羊毛')
+
+    def rows(self, count, start=0):
+        return [
+            {
+                'name': f'导入款{i}', 'style_number': f'IMP-{i:05d}', 'description': '批量导入测试',
+                'category': self.category.pk, 'color': '黑色', 'status': 'published',
+                'tags': [tag.pk for tag in self.tags], 'materials': [self.material.pk],
+            }
+            for i in range(start, start + count)
+        ]
+
+    def test_json_import(self):
+        response = self.client.post(self.url, self.rows(3), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 3)
+        clothing = Clothing.objects.get(style_number='IMP-00001')
+        self.assertEqual(clothing.designer, self.designer)
+        self.assertIsNotNone(clothing.published_at)
+        self.assertEqual(set(clothing.tags.values_list('pk', flat=True)), {tag.pk for tag in self.tags})
+        self.assertEqual(list(clothing.materials.all()), [self.material])
+        self.assertEqual(ClothingHistory.objects.filter(clothing__in=response.data['ids']).count(), 3)
+        self.assertEqual(len(self.client.get('/api/clothes/search/', {'q': '导入款2'}).data['results']), 1)
+
+    def test_rejects_whole_batch(self):
+        make_clothes(self.designer, 1)
+        rows = self.rows(4)
+        rows[1]['style_number'] = rows[2]['style_number']
+        rows[3]['style_number'] = Clothing.objects.get().style_number
+        rows[0]['tags'] = [999]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2, 3, 4])
+        self.assertIn('tags', response.data['errors'][0]['errors'])
+        self.assertEqual(Clothing.objects.count(), 1)
+
+    def test_csv_import(self):
+        content = (
+            '\ufeffname,style_number,description,category,color,tags,materials\n'
+            f'CSV款,CSV-1,描述,{self.category.pk},白色,{self.tags[0].pk}|{self.tags[1].pk},\n'
+            'CSV款2,CSV-2,描述,,白色,,\n'
+        ).encode('utf-8')
+        upload = SimpleUploadedFile('clothes.csv', content, content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Clothing.objects.get(style_number='CSV-1').tags.count(), 2)
+        self.assertIsNone(Clothing.objects.get(style_number='CSV-2').category)
+
+    def test_constant_queries(self):
+        def count(rows):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.post(self.url, rows, format='json').status_code, 201)
+            return len(ctx.captured_queries)
+        self.assertEqual(count(self.rows(2)), count(self.rows(30, start=2)))
+
+
+class BulkTransitionTests(ClothingTestCase):
+    """批量状态变更"""
+    url = '/api/clothes/bulk-update/'
+
+    def setUp(self):
+        super().setUp()
+        self.clothes = make_clothes(self.designer, 3)
+        other = Designer.objects.create(
+            user=User.objects.create_user('other', password='pass'), name='其他', email='o@example.com'
+        )
+        self.foreign = make_clothes(other, 2, start=10)
+        self.ids = [clothing.pk for clothing in self.clothes + self.foreign]
+
+    def post(self, operation, value=None, ids=None):
+        data = {'ids': ids or self.ids, 'operation': operation}
+        if value is not None:
+            data['value'] = value
+        return self.client.post(self.url, data, format='json')
+
+    def test_publish_permitted_subset(self):
+        # 查询、设计师、UPDATE、历史、变更日志、设计师统计，外加保存点
+        with self.assertNumQueries(8):
+            response = self.post('publish')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['updated'], [c.pk for c in self.clothes])
+        self.assertEqual(response.data['denied'], [c.pk for c in self.foreign])
+        published = Clothing.objects.filter(status='published')
+        self.assertEqual(published.count(), 3)
+        self.assertFalse(published.filter(published_at__isnull=True).exists())
+        self.assertEqual(ClothingHistory.objects.filter(action='发布').count(), 3)
+
+        again = self.post('publish')
+        self.assertEqual(again.data['updated'], [])
+        self.assertEqual(len(again.data['unchanged']), 3)
+
+    def test_large_batch_in_chunks(self):
+        backend = catalog_cache.l2()
+        with mock.patch('clothes.bulk.IN_CHUNK_SIZE', 2), \
+                mock.patch.object(backend, 'set_many', wraps=backend.set_many) as set_many, \
+                mock.patch.object(backend, 'incr') as incr:
+            response = self.post('archive')
+        self.assertEqual(response.data['updated'], [c.pk for c in self.clothes])
+        self.assertEqual(response.data['denied'], [c.pk for c in self.foreign])
+        self.assertEqual(Clothing.objects.filter(status='archived').count(), 3)
+        # 全部服装的版本号一次写入
+        set_many.assert_called_once()
+        self.assertEqual(len(set_many.call_args.args[0]), 4)
+        incr.assert_not_called()
+
+    def test_edit_grant_allows_archive(self):
+        UserPermission.objects.create(user=self.user, clothing=self.foreign[0], can_edit=True)
+        response = self.post('archive')
+        self.assertEqual(len(response.data['updated']), 4)
+        self.assertEqual(response.data['denied'], [self.foreign[1].pk])
+
+    def test_set_category_and_invalidate_cache(self):
+        category = Category.objects.create(name='裤装')
+        url = f'/api/clothes/{self.clothes[0].pk}/'
+        self.client.get(url)
+        self.post('set_category', category.pk)
+        self.assertEqual(self.client.get(url).data['category'], category.pk)
+        self.assertEqual(self.post('set_category', 999).status_code, 400)
+        self.assertEqual(self.post('explode').status_code, 400)
+
+    def test_admin_action(self):
+        admin_user = User.objects.create_superuser('admin', 'a@example.com', 'pass')
+        client = APIClient()
+        client.force_login(admin_user)
+        response = client.post('/admin/clothes/clothing/', {
+            'action': 'make_public', '_selected_action': self.ids,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Clothing.objects.filter(is_public=True).count(), 5)
+        # 管理员没有设计师档案，历史记在服装的设计师名下
+        self.assertEqual(ClothingHistory.objects.get(clothing=self.foreign[0], action='公开').designer_id,
+                         self.foreign[0].designer_id)
+
+
+class ImageVariantTests(ClothingTestCase):
+    """图片衍生图（Celery 任务以 eager 模式运行）"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = self.settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, name, size=(1200, 800)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_generates_variants_after_commit(self):
+        clothing = Clothing(
+            name='图片款', style_number='IMG-1', description='', designer=self.designer,
+            main_image=self.upload('main.png'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            clothing.save()
+        clothing.refresh_from_db()
+        variants = clothing.image_variants[clothing.main_image.name]
+        self.assertEqual(set(variants), {'thumb', 'medium'})
+        self.assertIn('webp', variants['thumb'])
+        storage = clothing.main_image.storage
+        with storage.open(variants['thumb']['jpeg']) as handle:
+            self.assertEqual(Image.open(handle).size, (320, 213))
+
+        response = self.client.get(f'/api/clothes/{clothing.pk}/')
+        self.assertTrue(response.data['image_variants']['main_image']['thumb']['webp'].endswith('.webp'))
+        listed = self.client.get('/api/clothes/').data['results'][0]
+        self.assertIn('medium', listed['main_image_variants'])
+
+    def test_failed_source_is_not_retried(self):
+        clothing = Clothing(
+            name='坏图款', style_number='IMG-3', description='', designer=self.designer,
+            main_image=SimpleUploadedFile('broken.png', b'not an image', content_type='image/png'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            clothing.save()
+        clothing.refresh_from_db()
+        self.assertIn('error', clothing.image_variants[clothing.main_image.name])
+        self.assertEqual(clothing.missing_variants(), [])
+        self.assertEqual(self.client.get(f'/api/clothes/{clothing.pk}/').data['image_variants']['main_image'], {})
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            clothing.save()
+        self.assertEqual(callbacks, [])
+
+    def test_additional_images_and_idempotence(self):
+        storage = Clothing._meta.get_field('main_image').storage
+        extra = storage.save('clothing_images/extra.png', self.upload('extra.png', (500, 500)))
+        clothing = Clothing(
+            name='多图款', style_number='IMG-2', description='', designer=self.designer,
+            main_image=self.upload('main.png'), additional_images=[extra],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            clothing.save()
+        clothing.refresh_from_db()
+        self.assertIn(extra, clothing.image_variants)
+        self.assertEqual(clothing.missing_variants(), [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            clothing.save()
+        self.assertEqual(callbacks, [])
+
+
+class ChangeFeedTests(ClothingTestCase):
+    """增量同步"""
+    url = '/api/clothes/changes/'
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user('viewer', password='pass')
+        self.viewer_client = APIClient()
+        self.viewer_client.force_authenticate(self.viewer)
+
+    def poll(self, cursor, client=None):
+        response = (client or self.client).get(self.url, {'since': cursor})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_created_updated_deleted(self):
+        cursor = self.client.get(self.url).data['cursor']
+        first, second = make_clothes(self.designer, 2)
+        feed = self.poll(cursor)
+        self.assertEqual([item['id'] for item in feed['changed']], [first.pk, second.pk])
+        self.assertEqual(feed['deleted'], [])
+
+        cursor = feed['cursor']
+        first.name = '改名'
+        first.save()
+        deleted_pk = second.pk
+        second.delete()
+        feed = self.poll(cursor)
+        self.assertEqual([item['name'] for item in feed['changed']], ['改名'])
+        self.assertEqual(feed['deleted'], [deleted_pk])
+        self.assertEqual(self.poll(feed['cursor'])['changed'], [])
+
+    def test_reference_rename(self):
+        clothing = make_clothes(self.designer, 1)[0]
+        cursor = self.client.get(self.url).data['cursor']
+        clothing.category.name = '新分类'
+        clothing.category.save()
+        self.assertEqual(self.poll(cursor)['changed'][0]['category_name'], '新分类')
+
+    def test_grants_gained_and_lost(self):
+        clothing = make_clothes(self.designer, 1)[0]
+        cursor = self.viewer_client.get(self.url).data['cursor']
+        self.assertEqual(self.poll(cursor, self.viewer_client)['changed'], [])
+
+        grant = UserPermission.objects.create(user=self.viewer, clothing=clothing, can_view=True)
+        feed = self.poll(cursor, self.viewer_client)
+        self.assertEqual([item['id'] for item in feed['changed']], [clothing.pk])
+        # 其他用户的授权变更不出现在别人的变更中
+        other = User.objects.create_user('other', password='pass')
+        UserPermission.objects.create(user=other, clothing=clothing, can_view=True)
+        self.assertEqual(self.poll(feed['cursor'], self.viewer_client)['changed'], [])
+
+        cursor = feed['cursor']
+        grant.delete()
+        self.assertEqual(self.poll(cursor, self.viewer_client)['deleted'], [clothing.pk])
+
+        # 删除用户时级联删除的授权不产生引用该用户的变更记录
+        other.delete()
+        connection.check_constraints()
+
+    def test_paging_and_idle_poll(self):
+        cursor = self.client.get(self.url).data['cursor']
+        make_clothes(self.designer, 3)
+        feed = self.client.get(self.url, {'since': cursor, 'limit': 2}).data
+        self.assertTrue(feed['has_more'])
+        feed = self.poll(feed['cursor'])
+        self.assertFalse(feed['has_more'])
+        # 公共记录和本人记录各一次索引探测
+        with self.assertNumQueries(2):
+            self.poll(feed['cursor'])
+
+    def test_running_transactions_hold_back_the_cursor(self):
+        cursor = self.client.get(self.url).data['cursor']
+        first, second = make_clothes(self.designer, 2)
+        # 模拟 PostgreSQL：id 较小的记录属于较晚提交的事务 7，事务 5 已提交
+        ClothingChange.objects.filter(clothing_id=first.pk).update(txid=7)
+        ClothingChange.objects.filter(clothing_id=second.pk).update(txid=5)
+        with mock.patch('clothes.changes.watermark', return_value=7):
+            feed = self.poll(cursor)
+        self.assertEqual([item['id'] for item in feed['changed']], [second.pk])
+        with mock.patch('clothes.changes.watermark', return_value=8):
+            feed = self.poll(feed['cursor'])
+        self.assertEqual([item['id'] for item in feed['changed']], [first.pk])
+        self.assertEqual(feed['cursor'], '7-%d' % ClothingChange.objects.filter(txid=7).latest('id').pk)
+
+    def test_legacy_numeric_cursor(self):
+        make_clothes(self.designer, 1)
+        self.assertEqual(len(self.poll('0')['changed']), 1)
+        self.assertEqual(self.client.get(self.url, {'since': 'x-1'}).status_code, 400)
+
+
+class UpdateTrackingTests(ClothingTestCase):
+    """更新服装时的修改追踪"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothing = make_clothes(self.designer, 1)[0]
+        self.url = f'/api/clothes/{self.clothing.pk}/'
+
+    def test_records_only_changed_fields(self):
+        category = Category.objects.create(name='裙装')
+        response = self.client.patch(self.url, {
+            'name': '新名称', 'color': '红色', 'category': category.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        history = ClothingHistory.objects.get(clothing=self.clothing, action='修改')
+        self.assertEqual(history.changes, {
+            'name': {'old': '服装0', 'new': '新名称'},
+            'category': {'old': self.clothing.category_id, 'new': category.pk},
+        })
+        self.assertEqual(history.designer, self.designer)
+
+        self.client.patch(self.url, {'name': '新名称'}, format='json')
+        self.assertEqual(ClothingHistory.objects.filter(action='修改').count(), 1)
+
+    def test_no_refetch(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(self.url, {'name': '再次修改'}, format='json')
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len([sql for sql in selects if 'FROM "clothes_clothing" ' in sql]), 1)
+        self.assertFalse([sql for sql in selects if 'FROM "clothes_designer"' in sql])
+
+    def test_many_to_many_diff(self):
+        clothing = Clothing.objects.prefetch_related('tags').get(pk=self.clothing.pk)
+        current = list(clothing.tags.all())
+        extra = Tag.objects.create(name='复古')
+        with self.assertNumQueries(0):
+            before = snapshot(clothing, ['tags'])
+            self.assertEqual(diff(clothing, before, {'tags': current}), {})
+        changes = diff(clothing, before, {'tags': current + [extra]})
+        self.assertEqual(changes['tags']['new'], sorted([tag.pk for tag in current] + [extra.pk]))
+
+
+    def test_reupload_with_same_name(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        def upload(color):
+            buffer = BytesIO()
+            Image.new('RGB', (10, 10), color).save(buffer, 'PNG')
+            return SimpleUploadedFile('main.png', buffer.getvalue(), content_type='image/png')
+
+        with self.settings(MEDIA_ROOT=media_root):
+            self.clothing.main_image = upload('red')
+            self.clothing.save()
+            old = self.clothing.main_image.name
+            # 另一张同名图片：存储后端改名保存，历史记录实际的存储名
+            response = self.client.patch(self.url, {'main_image': upload('blue')}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.clothing.refresh_from_db()
+        self.assertNotEqual(self.clothing.main_image.name, old)
+        history = ClothingHistory.objects.get(clothing=self.clothing, action='修改')
+        self.assertEqual(history.changes['main_image'], {'old': old, 'new': self.clothing.main_image.name})
+
+
+class HistoryRetentionTests(ClothingTestCase):
+    """历史归档与热表 + 归档的分页读取"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothing = make_clothes(self.designer, 1)[0]
+        ClothingHistory.objects.bulk_create([
+            ClothingHistory(clothing=self.clothing, designer=self.designer, action='修改', description=str(i))
+            for i in range(30)
+        ])
+        old = list(ClothingHistory.objects.order_by('id').values_list('pk', flat=True)[:26])
+        ClothingHistory.objects.filter(pk__in=old).update(created_at=timezone.now() - timedelta(days=400))
+        self.expected = list(ClothingHistory.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+
+    def ids(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).data
+            ids += [entry['id'] for entry in data['results']]
+            url = data['next']
+        return ids
+
+    def test_archive_in_chunks(self):
+        self.assertEqual(archive_history(chunk_size=7), (26, True))
+        self.assertEqual(ClothingHistory.objects.count(), 5)
+        archive = ClothingHistoryArchive.objects.get()
+        self.assertEqual(archive.entry_count, 26)
+        self.assertEqual(archive_history(chunk_size=7), (0, True))
+
+    def test_history_reads_hot_and_cold(self):
+        url = f'/api/clothes/{self.clothing.pk}/history/?page_size=4'
+        before = self.ids(url)
+        archive_history(chunk_size=10)
+        self.assertEqual(before, self.expected)
+        self.assertEqual(self.ids(url), self.expected)
+        response = self.client.get(f'/api/history/?clothing={self.clothing.pk}&action=创建')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['designer_name'], '设计师')
+
+    @override_settings(HISTORY_ARCHIVE_CHUNK_SIZE=5, HISTORY_ARCHIVE_MAX_CHUNKS=2)
+    def test_beat_task_requeues_until_done(self):
+        from .tasks import archive_clothing_history
+
+        archive_clothing_history.delay()
+        self.assertEqual(ClothingHistory.objects.count(), 5)
+
+
+class CategoryTreeTests(ClothingTestCase):
+    """分类闭包表"""
+
+    def setUp(self):
+        super().setUp()
+        self.root = Category.objects.create(name='服装')
+        self.tops = Category.objects.create(name='上装', parent=self.root)
+        self.shirts = Category.objects.create(name='衬衫', parent=self.tops)
+        self.bottoms = Category.objects.create(name='下装', parent=self.root)
+
+    def closure(self):
+        return set(CategoryClosure.objects.values_list('ancestor__name', 'descendant__name', 'depth'))
+
+    def test_closure_maintained_on_move_and_delete(self):
+        self.assertIn(('服装', '衬衫', 2), self.closure())
+        self.tops.parent = self.bottoms
+        self.tops.save()
+        self.assertIn(('服装', '衬衫', 3), self.closure())
+        self.assertIn(('下装', '衬衫', 2), self.closure())
+        self.assertEqual(len(self.closure()), 4 + 3 + 2 + 1)
+
+        self.bottoms.parent = self.shirts
+        with self.assertRaises(ValueError):
+            self.bottoms.save()
+        response = self.client.patch(f'/api/categories/{self.root.pk}/', {'parent': self.shirts.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        Category.objects.get(pk=self.tops.pk).delete()
+        self.assertEqual(self.closure(), {('服装', '服装', 0), ('下装', '下装', 0), ('服装', '下装', 1)})
+
+    def test_descendant_filter(self):
+        shirt = make_clothes(self.designer, 1)[0]
+        Clothing.objects.filter(pk=shirt.pk).update(category=self.shirts)
+        make_clothes(self.designer, 1, start=1)
+        for query in ({'category__descendants_of': self.root.pk}, {'category__descendants_of': self.tops.pk}):
+            results = self.client.get('/api/clothes/', query).data['results']
+            self.assertEqual([item['id'] for item in results], [shirt.pk])
+        self.assertEqual(self.client.get('/api/clothes/', {'category__descendants_of': self.bottoms.pk}).data['results'], [])
+        search = self.client.get('/api/clothes/search/', {'category__descendants_of': self.root.pk}).data
+        self.assertEqual(len(search['results']), 1)
+
+        self.client.logout()
+        Clothing.objects.update(is_public=True)
+        page = self.client.get('/', {'category__descendants_of': self.tops.pk})
+        self.assertContains(page, shirt.style_number)
+        self.assertNotContains(page, 'SN1-00001')
+
+    def test_tree_and_breadcrumbs(self):
+        reference.reference()
+        with self.assertNumQueries(0):
+            tree = self.client.get('/api/categories/tree/').data
+        root = tree[0]
+        self.assertEqual(root['name'], '服装')
+        self.assertEqual([child['name'] for child in root['children']], ['上装', '下装'])
+        self.assertEqual(root['children'][0]['children'][0]['name'], '衬衫')
+
+        path = self.client.get(f'/api/categories/{self.shirts.pk}/breadcrumbs/').data
+        self.assertEqual([item['name'] for item in path], ['服装', '上装', '衬衫'])
+
+
+class ReferenceRegistryTests(ClothingTestCase):
+    """进程内参考数据"""
+
+    def setUp(self):
+        super().setUp()
+        self.clothes = make_clothes(self.designer, 3)
+
+    def test_loaded_once_then_zero_queries(self):
+        reference.reference()
+        with self.assertNumQueries(0):
+            data = reference.reference()
+        self.assertEqual(data.category_name(self.clothes[0].category_id), '上衣')
+
+    def test_local_save_reloads(self):
+        reference.reference()
+        category = Category.objects.get(pk=self.clothes[0].category_id)
+        category.name = '外衣'
+        category.save()
+        self.assertEqual(reference.reference().category_name(category.pk), '外衣')
+
+    @override_settings(REFERENCE_CHECK_INTERVAL=0)
+    def test_other_process_change_seen_through_version(self):
+        reference.reference()
+        # 模拟其他进程：直接改库并递增共享版本号，不经过本进程的信号
+        Season.objects.filter(pk=self.clothes[0].season_id).update(name='夏季')
+        self.assertEqual(reference.reference().season_name(self.clothes[0].season_id), '春季')
+        catalog_cache.bump(reference.SCOPE)
+        self.assertEqual(reference.reference().season_name(self.clothes[0].season_id), '夏季')
+
+    def test_unknown_id_forces_reload(self):
+        reference.reference()
+        tag = Tag.objects.bulk_create([Tag(name='新品')])[0]
+        self.assertEqual(reference.reference_for(tags=[tag.pk]).tags[tag.pk]['name'], '新品')
+
+    def test_list_page_dropdowns_without_reference_queries(self):
+        self.client.get('/')
+        catalog_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        self.assertContains(response, '春季')
+        for table in ('clothes_category"', 'clothes_season"'):
+            self.assertFalse(any(f'FROM "{table}' in query['sql'] for query in queries.captured_queries))
+
+
+class AsyncServingTests(TransactionTestCase):
+    """ASGI 服务路径：异步页面视图，API 只读请求在线程池中执行（线程各自使用数据库连接，需要提交的数据）"""
+
+    def setUp(self):
+        catalog_cache.clear()
+        reference.registry.invalidate()
+        self.user = User.objects.create_user('designer', password='pass')
+        self.designer = Designer.objects.create(user=self.user, name='设计师', email='d@example.com')
+        # 事务会真正提交，预置衍生图记录，避免提交后生成衍生图的任务去读取不存在的图片
+        self.clothes = make_clothes(
+            self.designer, 3, is_public=True, image_variants={'clothing_images/test.jpg': {}}
+        )
+
+    def test_pages_are_async(self):
+        from . import views
+
+        self.assertTrue(iscoroutinefunction(views.clothing_list))
+        self.assertTrue(iscoroutinefunction(views.clothing_detail))
+        response = self.client.get('/', {'page': 1})
+        self.assertContains(response, self.clothes[0].style_number)
+        self.assertEqual(len(response.context['clothes'].object_list), 3)
+        self.assertEqual(self.client.get('/clothing/999999/').status_code, 404)
+
+    def test_api_reads_offloaded(self):
+        from .views import ClothingViewSet
+
+        view = ClothingViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.assertFalse(iscoroutinefunction(view))
+        view = offload_reads(view, enabled=True)
+        self.assertTrue(iscoroutinefunction(view))
+        request = AsyncRequestFactory().get('/api/clothes/')
+        force_authenticate(request, self.user)
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.content)['results']), 3)
+
+
+    def test_export_streams_under_asgi(self):
+        async def fetch():
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get('/api/clothes/export/')
+            self.assertTrue(response.is_async)
+            return [chunk async for chunk in response.streaming_content]
+
+        chunks = async_to_sync(fetch)()
+        lines = b''.join(chunks).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], sorted(c.pk for c in self.clothes))
+
+    def test_export_pulls_batch_by_batch(self):
+        from .export import astream
+
+        produced = []
+
+        def lines():
+            for n in range(10):
+                produced.append(n)
+                yield f'{n}\n'
+
+        async def first_chunk():
+            iterator = astream(lines(), batch_size=3)
+            chunk = await anext(iterator)
+            await iterator.aclose()
+            return chunk
+
+        self.assertEqual(async_to_sync(first_chunk)(), '0\n1\n2\n')
+        # 只读取了第一批，生成器已关闭
+        self.assertEqual(produced, [0, 1, 2])
+
+
+class MetricsTests(ClothingTestCase):
+    """请求指标与 /metrics"""
+
+    def sample(self, name, view):
+        from prometheus_client import REGISTRY
+
+        return REGISTRY.get_sample_value(name, {'view': view}) or 0
+
+    def test_server_timing_and_query_count(self):
+        make_clothes(self.designer, 3)
+        view = 'clothes:clothing-list'
+        before = self.sample('clothing_request_queries_sum', view), self.sample('clothing_request_queries_count', view)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/clothes/')
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', response['Server-Timing'])
+        self.assertIn('render;dur=', response['Server-Timing'])
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertEqual(self.sample('clothing_request_queries_sum', view) - before[0], len(ctx.captured_queries))
+        self.assertEqual(self.sample('clothing_request_queries_count', view) - before[1], 1)
+
+    def test_serializer_time_measured(self):
+        clothing = make_clothes(self.designer, 1)[0]
+        view = 'clothes:clothing-detail'
+        before = self.sample('clothing_request_serialize_seconds_count', view)
+        with mock.patch('clothes.views.timed_serialize', wraps=timed_serialize) as timer:
+            response = self.client.get(f'/api/clothes/{clothing.pk}/')
+        self.assertEqual(response.status_code, 200)
+        timer.assert_called_once()
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertEqual(self.sample('clothing_request_serialize_seconds_count', view) - before, 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/clothes/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'clothing_request_duration_seconds_bucket{', response.content)
+        self.assertIn(b'view="clothes:clothing-list"', response.content)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+
+class BenchmarkSuiteTests(ClothingTestCase):
+    """可复现数据集与基线比较"""
+
+    def test_seeder_is_deterministic(self):
+        from .seeding import CatalogSeeder, existing_dataset, parse_size
+
+        self.assertEqual(parse_size('100k'), 100_000)
+        counts = CatalogSeeder(40, seed=7, batch_size=15).run()
+        self.assertEqual(existing_dataset(), 'seed-40-7')
+        self.assertEqual(counts['clothes'], 40)
+        self.assertEqual(counts['grants'], 2)
+        # 每件生成的服装都有变更记录，增量同步的客户端能看到
+        seeded = Clothing.objects.filter(style_number__startswith='S7-').values('pk')
+        self.assertEqual(ClothingChange.objects.filter(clothing_id__in=seeded).count(), 40)
+        rows = list(Clothing.objects.filter(style_number__startswith='S7-').order_by('style_number')
+                    .values_list('name', 'color', 'status'))
+        # 删除生成的用户（级联删除设计师、服装、历史和授权）后用同一种子重新生成
+        User.objects.filter(username__regex=r'^(seed-.*|designer\d{5}|viewer\d{5})$').delete()
+        CatalogSeeder(40, seed=7, batch_size=15).run()
+        self.assertEqual(rows, list(
+            Clothing.objects.filter(style_number__startswith='S7-').order_by('style_number')
+            .values_list('name', 'color', 'status')
+        ))
+        self.assertEqual(self.client.get('/api/clothes/search/', {'q': rows[0][0]}).status_code, 200)
+
+    def test_regressions_fail(self):
+        from django.core.management.base import CommandError
+
+        from .management.commands.benchmark_endpoints import Command
+
+        baseline = {'size': 1000, 'seed': 42, 'endpoints': {
+            'search': {'client': {'p50': 10, 'p95': 20, 'p99': 30, 'queries': 5, 'peak_rss_kb': 1000}},
+        }}
+        same = json.loads(json.dumps(baseline))
+        Command(stdout=StringIO()).compare(baseline, same, 0.2)
+
+        slower = json.loads(json.dumps(baseline))
+        slower['endpoints']['search']['client'].update(p95=25, queries=6)
+        with self.assertRaisesMessage(CommandError, 'search/client p95: 20 -> 25'):
+            Command(stdout=StringIO()).compare(baseline, slower, 0.2)
+        slower['endpoints']['search']['client']['p95'] = 20
+        with self.assertRaisesMessage(CommandError, 'queries: 5 -> 6'):
+            Command(stdout=StringIO()).compare(baseline, slower, 0.2)
+
+
+class GrantExpiryTests(ClothingTestCase):
+    """限时授权：到期前有效，到期后缓存失效，过期行分块清理"""
+
+    def setUp(self):
+        super().setUp()
+        self.viewer = User.objects.create_user('viewer', password='pass')
+        self.viewer_client = APIClient()
+        self.viewer_client.force_authenticate(self.viewer)
+        self.clothing = make_clothes(self.designer, 1)[0]
+        UserPermission.objects.create(
+            user=self.viewer, clothing=self.clothing, can_view=True, expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def listed_ids(self):
+        response = self.viewer_client.get('/api/clothes/')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_visible_until_expiry(self):
+        self.assertEqual(self.listed_ids(), [self.clothing.pk])
+        self.assertEqual(self.viewer_client.get(f'/api/clothes/{self.clothing.pk}/').status_code, 200)
+        self.assertEqual(self.listed_ids(), [self.clothing.pk])
+
+        # 授权行仍在表中，到期后的第一次请求不再命中缓存
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(self.listed_ids(), [])
+            self.assertEqual(self.viewer_client.get(f'/api/clothes/{self.clothing.pk}/').status_code, 404)
+
+    @override_settings(GRANT_PURGE_CHUNK_SIZE=2)
+    def test_purge_in_chunks(self):
+        from .tasks import purge_expired_permissions
+
+        others = make_clothes(self.designer, 3, start=10)
+        for clothing in others:
+            UserPermission.objects.create(
+                user=self.viewer, clothing=clothing, can_view=True, expires_at=timezone.now() - timedelta(days=1)
+            )
+        cursor = self.viewer_client.get('/api/clothes/changes/').data['cursor']
+        self.assertEqual(purge_expired_grants(max_chunks=1), (2, False))
+        self.assertEqual(purge_expired_permissions(), 1)
+        self.assertEqual(list(UserPermission.objects.values_list('clothing_id', flat=True)), [self.clothing.pk])
+        # 失去的授权出现在该用户的增量同步中
+        feed = self.viewer_client.get('/api/clothes/changes/', {'since': cursor}).data
+        self.assertEqual(sorted(feed['deleted']), [clothing.pk for clothing in others])
+
+
+class SeedingTests(ClothingTestCase):
+    """基础数据的批量补齐与 seed_catalog 命令"""
+
+    def test_base_reference_upsert_is_idempotent(self):
+        from .seeding import BASE_REFERENCE, seed_base_reference
+
+        created = seed_base_reference()
+        self.assertEqual(created[Season], ['春季', '夏季', '秋季', '冬季', '四季'])
+        self.assertEqual(Tag.objects.get(name='奢华').color, '#FFD700')
+        # 新建的分类有闭包自身行，进程内参考数据已失效重载
+        top = Category.objects.get(name='上衣')
+        self.assertTrue(CategoryClosure.objects.filter(ancestor=top, descendant=top, depth=0).exists())
+        self.assertIn(top.pk, reference.reference().categories)
+
+        Season.objects.filter(name='春季').update(description='已修改')
+        # 每个模型两次查询（已有名称、取回对象），另加事务保存点
+        with self.assertNumQueries(2 * len(BASE_REFERENCE) + 2):
+            created = seed_base_reference()
+        self.assertEqual(created, {model: [] for model in BASE_REFERENCE})
+        self.assertEqual(Season.objects.get(name='春季').description, '已修改')
+
+    def test_seed_catalog_reports_progress(self):
+        from django.core.management.base import CommandError
+
+        out = StringIO()
+        call_command('seed_catalog', size='30', seed=3, batch_size=10, stdout=out)
+        output = out.getvalue()
+        self.assertIn('clothes: 30/30 (100%)', output)
+        self.assertIn('已生成数据集 seed-30-3', output)
+        self.assertIn('行/秒', output)
+        self.assertEqual(Clothing.objects.filter(style_number__startswith='S3-').count(), 30)
+        with self.assertRaisesMessage(CommandError, 'seed-30-3'):
+            call_command('seed_catalog', size='30', seed=4, stdout=StringIO())
+
+
+class DesignerStatsTests(ClothingTestCase):
+    """设计师统计：增量维护与全量重算一致"""
+
+    def setUp(self):
+        super().setUp()
+        self.other = Designer.objects.create(
+            user=User.objects.create_user('other', password='pass'), name='其他', email='o@example.com'
+        )
+
+    def current_stats(self):
+        # 季度开始日期只在有本季发布时更新，比较对外的本季发布数
+        return [
+            (s.designer_id, s.total_count, s.draft_count, s.published_count, s.archived_count,
+             s.published_this_season, s.last_published_at)
+            for s in DesignerStats.objects.order_by('pk')
+        ]
+
+    def assertMatchesRebuild(self):
+        from .stats import rebuild
+
+        incremental = self.current_stats()
+        rebuild()
+        self.assertEqual(incremental, self.current_stats())
+
+    def test_incremental_matches_rebuild(self):
+        clothes = make_clothes(self.designer, 4)
+        self.assertEqual(DesignerStats.objects.get(designer=self.designer).draft_count, 4)
+        self.assertEqual(self.client.post(f'/api/clothes/{clothes[0].pk}/publish/').status_code, 200)
+        self.client.post('/api/clothes/bulk-update/', {'ids': [c.pk for c in clothes[1:3]], 'operation': 'publish'},
+                         format='json')
+        self.client.post('/api/clothes/bulk-update/', {'ids': [clothes[1].pk], 'operation': 'archive'}, format='json')
+        self.assertMatchesRebuild()
+
+        stats = DesignerStats.objects.get(designer=self.designer)
+        self.assertEqual((stats.total_count, stats.draft_count, stats.published_count, stats.archived_count), (4, 1, 2, 1))
+        self.assertEqual(stats.published_this_season, 2)
+
+        # 换设计师、删除最近发布的服装
+        moved = Clothing.objects.get(pk=clothes[3].pk)
+        moved.designer = self.other
+        moved.save()
+        latest = Clothing.objects.filter(status='published').order_by('-published_at').first()
+        latest.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(DesignerStats.objects.get(designer=self.other).total_count, 1)
+
+    def test_stale_season_and_drift_repair(self):
+        make_clothes(self.designer, 2, status='published')
+        DesignerStats.objects.filter(designer=self.designer).update(season_start=date(2000, 3, 1), draft_count=5)
+        stats = DesignerStats.objects.get(designer=self.designer)
+        self.assertEqual(stats.published_this_season, 0)
+
+        out = StringIO()
+        call_command('rebuild_designer_stats', stdout=out)
+        self.assertIn('已重算 2 位设计师', out.getvalue())
+        stats = DesignerStats.objects.get(designer=self.designer)
+        self.assertEqual((stats.draft_count, stats.published_this_season), (0, 2))
+
+    def test_exposed_without_aggregates(self):
+        make_clothes(self.designer, 2, status='published', is_public=True)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/designers/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql'] and 'clothes_clothing' in q['sql']])
+        stats = {item['id']: item['stats'] for item in response.data['results']}
+        self.assertEqual(stats[self.designer.pk]['published_count'], 2)
+        self.assertEqual(stats[self.other.pk]['total_count'], 0)
+
+        # 页面以匿名用户访问，只列出公开服装
+        page = APIClient().get(f'/designer/{self.designer.pk}/')
+        self.assertContains(page, '本季发布')
+        self.assertContains(page, '服装0')
+        self.assertContains(APIClient().get('/designers/'), '已发布 2')
@@ -0,0 +1,58 @@
+"""
+服装修改追踪
+
+更新前从已加载的实例（含预取的多对多缓存）取一次快照，更新后直接用校验后的数据计算新值，
+不再重新查询。外键比较 id，多对多比较 id 集合，文件比较保存后实例上的存储名
+（存储后端为避免重名可能改名，新上传的文件只有保存后才知道实际存储名）。
+"""
+from django.db.models import FileField
+
+
+def json_value(value):
+    """转换为可写入 JSONField 的值"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: json_value(item) for key, item in value.items()}
+    return str(value)
+
+
+def field_value(instance, field):
+    if field.many_to_many:
+        # 优先使用 prefetch_related 的缓存
+        cache = getattr(instance, '_prefetched_objects_cache', {})
+        if field.name in cache:
+            return sorted(obj.pk for obj in cache[field.name])
+        return sorted(getattr(instance, field.name).values_list('pk', flat=True))
+    if isinstance(field, FileField):
+        return getattr(instance, field.attname).name or ''
+    return json_value(getattr(instance, field.attname))
+
+
+def validated_value(instance, field, value):
+    """校验后数据中的新值，表示方式与 field_value 一致；需在 serializer.save() 之后调用"""
+    if field.many_to_many:
+        return sorted(obj.pk for obj in value)
+    if field.is_relation:
+        return value.pk if value is not None else None
+    if isinstance(field, FileField):
+        return getattr(instance, field.attname).name or ''
+    return json_value(value)
+
+
+def snapshot(instance, names):
+    """实例中指定字段的当前值"""
+    model_fields = {field.name: field for field in instance._meta.get_fields() if field.concrete}
+    return {name: field_value(instance, model_fields[name]) for name in names if name in model_fields}
+
+
+def diff(instance, before, validated_data):
+    """{字段: {'old': 旧值, 'new': 新值}}，只包含实际变化的字段"""
+    changes = {}
+    for name, old in before.items():
+        new = validated_value(instance, instance._meta.get_field(name), validated_data[name])
+        if old != new:
+            changes[name] = {'old': old, 'new': new}
+    return changes
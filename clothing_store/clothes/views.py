@@ -2,10 +2,14 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
-from django.shortcuts import get_object_or_404, render
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
 from django.utils import timezone
-from django.db.models import Q
+from django.db import transaction
 from django.core.paginator import Paginator
 from django.contrib import messages
 
@@ -15,35 +19,90 @@ from .models import (
 )
 from .serializers import (
     UserSerializer, DesignerSerializer, CategorySerializer, TagSerializer,
-    SeasonSerializer, MaterialSerializer, ClothingSerializer, ClothingListSerializer,
-    ClothingCreateSerializer, ClothingHistorySerializer, UserPermissionSerializer
+    SeasonSerializer, MaterialSerializer, ClothingSerializer, ClothingListSerializer, ClothingListFastSerializer,
+    ClothingCreateSerializer, ClothingHistorySerializer, UserPermissionSerializer, ClothingBulkActionSerializer
 )
-from .permissions import IsDesignerOrReadOnly, IsOwnerOrReadOnly
+from .bulk import bulk_transition, import_clothes, parse_csv
+from .categories import category_path, category_tree, in_category_tree
+from .cache import cache_page, cached_api_response, scopes_for
+from .changes import changes_since, format_cursor, latest_cursor, parse_cursor
+from .concurrency import offload_reads
+from .conditional import (
+    conditional_page, conditional_response, detail_validators, list_validators, page_owner
+)
+from .export import EXPORT_FORMATS, astream, stream
+from .facets import get_facets
+from .filters import ClothingFilter
+from .metrics import timed_render, timed_serialize
+from .pagination import CatalogPagination, HistoryPagination
+from .permissions import IsDesignerOrReadOnly, IsOwnerOrReadOnly, get_resolver
+from .reference import reference
+from .retention import HistoryTimeline
+from .search import search_clothes
+from .tracking import diff, snapshot
+from .visibility import visible_clothes
 
-# 传统Django视图
-def clothing_list(request):
-    """服装列表页面"""
+# 各 action 需要预加载的关联：(select_related, prefetch_related)
+# 列表序列化器读取 designer/category/season 名称和 tags，详情序列化器还读取 materials
+CLOTHING_LIST_RELATED = (('designer', 'category', 'season'), ('tags',))
+CLOTHING_DETAIL_RELATED = (('designer', 'category', 'season'), ('tags', 'materials'))
+
+CLOTHING_EAGER_LOADING = {
+    'list': CLOTHING_LIST_RELATED,
+    'search': CLOTHING_LIST_RELATED,
+    'retrieve': CLOTHING_DETAIL_RELATED,
+    'update': CLOTHING_DETAIL_RELATED,
+    'partial_update': CLOTHING_DETAIL_RELATED,
+    'publish': (('designer',), ()),
+    'history': ((), ()),
+}
+
+
+def with_eager_loading(queryset, action_name):
+    """按 action 为服装查询集添加 select_related / prefetch_related"""
+    select, prefetch = CLOTHING_EAGER_LOADING.get(action_name, CLOTHING_DETAIL_RELATED)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def clothing_list_validators(request):
+    # 列表页包含未公开的服装（clothing_page_queryset 不按可见性过滤），不能交给共享缓存
+    return list_validators(request, ['catalog', 'reference'], owner=page_owner(request)), False
+
+
+def clothing_detail_validators(request, pk):
+    row = Clothing.objects.filter(pk=pk).values_list('updated_at', 'is_public').first()
+    if row is None:
+        return None
+    return detail_validators(request, row[0], [f'clothing:{pk}', 'reference'], owner=page_owner(request)), row[1]
+
+
+def clothing_page_queryset(params):
+    """列表页的过滤和排序（检索需要检查 FTS 表是否存在，异步视图在线程中调用）"""
     # 获取查询参数
-    q = request.GET.get('q', '')
-    category_id = request.GET.get('category', '')
-    gender = request.GET.get('gender', '')
-    season_id = request.GET.get('season', '')
-    color = request.GET.get('color', '')
+    q = params.get('q', '')
+    category_id = params.get('category', '')
+    category_tree_root = params.get('category__descendants_of', '')
+    gender = params.get('gender', '')
+    season_id = params.get('season', '')
+    color = params.get('color', '')
     
     # 构建查询集
-    queryset = Clothing.objects.all()
+    queryset = with_eager_loading(Clothing.objects.all(), 'list')
     
     # 应用筛选条件
     if q:
-        queryset = queryset.filter(
-            Q(name__icontains=q) |
-            Q(style_number__icontains=q) |
-            Q(description__icontains=q)
-        )
+        queryset = search_clothes(queryset, q)
     
     if category_id:
         queryset = queryset.filter(category_id=category_id)
     
+    if category_tree_root.isdigit():
+        queryset = in_category_tree(queryset, category_tree_root)
+    
     if gender:
         queryset = queryset.filter(gender=gender)
     
@@ -53,17 +112,29 @@ def clothing_list(request):
     if color:
         queryset = queryset.filter(color__icontains=color)
     
-    # 排序
-    queryset = queryset.order_by('-created_at')
+    # 排序：有搜索词时按相关度，否则按创建时间
+    if 'rank' not in queryset.query.annotations:
+        queryset = queryset.order_by('-created_at')
+    return queryset
+
+
+# 传统Django视图（列表和详情页为异步视图，ASGI 下等待数据库时不占用工作线程）
+@conditional_page(clothing_list_validators)
+@cache_page('clothing_list', lambda request: ['catalog'])
+async def clothing_list(request):
+    """服装列表页面"""
+    queryset = await sync_to_async(clothing_page_queryset)(request.GET)
     
-    # 分页
+    # 分页：Paginator 没有异步接口，总数和当前页用异步 ORM 取出
     paginator = Paginator(queryset, 12)  # 每页12个
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator.count = await queryset.acount()
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = [clothing async for clothing in page_obj.object_list]
     
     # 获取筛选选项
-    categories = Category.objects.all()
-    seasons = Season.objects.all()
+    ref = await sync_to_async(reference)()
+    categories = ref.categories.values()
+    seasons = ref.seasons.values()
     
     context = {
         'clothes': page_obj,
@@ -73,23 +144,31 @@ def clothing_list(request):
         'seasons': seasons,
     }
     
-    return render(request, 'clothes/clothing_list.html', context)
+    # 模板中的 user 等上下文是惰性加载的，渲染在线程中执行
+    with timed_render():
+        return await sync_to_async(render)(request, 'clothes/clothing_list.html', context)
 
-def clothing_detail(request, pk):
+def history_page(clothing_id, number):
+    return Paginator(HistoryTimeline(clothing_id), 20).get_page(number)
+
+@conditional_page(clothing_detail_validators)
+@cache_page('clothing_detail', lambda request, pk: [f'clothing:{pk}', 'reference'])
+async def clothing_detail(request, pk):
     """服装详情页面"""
-    clothing = get_object_or_404(Clothing, pk=pk)
-    history = ClothingHistory.objects.filter(clothing=clothing).order_by('-created_at')
+    clothing = await aget_object_or_404(with_eager_loading(Clothing.objects.all(), 'retrieve'), pk=pk)
+    history = await sync_to_async(history_page)(clothing.pk, request.GET.get('history_page'))
     
     context = {
         'clothing': clothing,
         'history': history,
     }
     
-    return render(request, 'clothes/clothing_detail.html', context)
+    with timed_render():
+        return await sync_to_async(render)(request, 'clothes/clothing_detail.html', context)
 
 def designer_list(request):
     """设计师列表页面"""
-    designers = Designer.objects.filter(is_active=True).order_by('name')
+    designers = Designer.objects.filter(is_active=True).select_related('stats').order_by('name')
     
     context = {
         'designers': designers,
@@ -99,11 +178,15 @@ def designer_list(request):
 
 def designer_detail(request, pk):
     """设计师详情页面"""
-    designer = get_object_or_404(Designer, pk=pk)
-    clothes = Clothing.objects.filter(designer=designer).order_by('-created_at')
+    designer = get_object_or_404(Designer.objects.select_related('stats'), pk=pk)
+    # 只列出当前用户可见的服装
+    clothes = visible_clothes(request.user, Clothing.objects.filter(designer=designer)).select_related(
+        'category', 'season'
+    ).order_by('-created_at')
     
     context = {
         'designer': designer,
+        'stats': getattr(designer, 'stats', None),
         'clothes': clothes,
     }
     
@@ -121,7 +204,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class DesignerViewSet(viewsets.ModelViewSet):
     """设计师管理视图集"""
-    queryset = Designer.objects.all()
+    queryset = Designer.objects.select_related('user', 'stats')
     serializer_class = DesignerSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -132,19 +215,32 @@ class DesignerViewSet(viewsets.ModelViewSet):
     def clothes(self, request, pk=None):
         """获取设计师的所有服装"""
         designer = self.get_object()
-        clothes = Clothing.objects.filter(designer=designer)
-        serializer = ClothingListSerializer(clothes, many=True)
+        rows = ClothingListFastSerializer.values(Clothing.objects.filter(designer=designer))
+        serializer = ClothingListFastSerializer(rows, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
 class CategoryViewSet(viewsets.ModelViewSet):
     """分类管理视图集"""
-    queryset = Category.objects.all()
+    queryset = Category.objects.select_related('parent')
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
 
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """完整分类树（嵌套 children）"""
+        return Response(category_tree())
+
+    @action(detail=True, methods=['get'])
+    def breadcrumbs(self, request, pk=None):
+        """从根分类到当前分类的路径"""
+        path = category_path(int(pk)) if pk.isdigit() else []
+        if not path:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(path)
+
 class TagViewSet(viewsets.ModelViewSet):
     """标签管理视图集"""
     queryset = Tag.objects.all()
@@ -177,11 +273,17 @@ class ClothingViewSet(viewsets.ModelViewSet):
     queryset = Clothing.objects.all()
     serializer_class = ClothingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatalogPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'gender', 'season', 'designer', 'status', 'is_public']
+    filterset_class = ClothingFilter
     search_fields = ['name', 'style_number', 'description', 'color']
     ordering_fields = ['created_at', 'updated_at', 'name', 'style_number']
 
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        # ASGI 下只读请求（列表、详情、检索等）在线程池中并发执行，见 concurrency.py
+        return offload_reads(super().as_view(actions, **initkwargs))
+
     def get_serializer_class(self):
         if self.action == 'create':
             return ClothingCreateSerializer
@@ -191,33 +293,50 @@ class ClothingViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """根据用户权限过滤服装"""
-        user = self.request.user
-        if user.is_staff:
-            return Clothing.objects.all()
-        
-        # 普通用户只能看到公开的服装
-        queryset = Clothing.objects.filter(is_public=True)
-        
-        # 设计师可以看到自己设计的服装
+        return with_eager_loading(self.get_visible_queryset(), self.action)
+
+    def list(self, request, *args, **kwargs):
+        vis, scopes = scopes_for(request.user, ['catalog'])
+        etag = list_validators(request, scopes, owner=vis)
+        return conditional_response(request, etag, lambda: cached_api_response(
+            request, 'clothes-list', ['catalog'],
+            lambda: self.list_response(self.filter_queryset(self.get_visible_queryset()))
+        ))
+
+    def list_response(self, queryset):
+        """列表类接口统一走 values() 快速序列化"""
+        extra = [name for name in ('rank',) if name in queryset.query.annotations]
+        rows = ClothingListFastSerializer.values(queryset, *extra)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            with timed_serialize():
+                data = ClothingListFastSerializer(page, context=context).data
+            return self.get_paginated_response(data)
+        with timed_serialize():
+            data = ClothingListFastSerializer(rows, context=context).data
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        scopes = [f'clothing:{kwargs["pk"]}', 'reference']
+        build = lambda: cached_api_response(request, 'clothes-detail', scopes, self.retrieve_response)
         try:
-            designer = user.designer_profile
-            queryset = queryset | Clothing.objects.filter(designer=designer)
-        except Designer.DoesNotExist:
-            pass
-        
-        # 有特殊权限的服装
-        user_permissions = UserPermission.objects.filter(
-            user=user, 
-            can_view=True,
-            expires_at__isnull=True
-        )
-        if user_permissions.exists():
-            permitted_clothes = Clothing.objects.filter(
-                userpermission__in=user_permissions
-            )
-            queryset = queryset | permitted_clothes
-        
-        return queryset.distinct()
+            updated_at = self.get_visible_queryset().filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return build()
+        return conditional_response(request, detail_validators(request, updated_at, scopes), build)
+
+    def retrieve_response(self):
+        serializer = self.get_serializer(self.get_object())
+        with timed_serialize():
+            data = serializer.data
+        return Response(data)
+
+    def get_visible_queryset(self):
+        """当前用户可见的服装（不含预加载）"""
+        return visible_clothes(self.request.user)
 
     def perform_create(self, serializer):
         """创建服装时自动设置设计师"""
@@ -233,37 +352,69 @@ class ClothingViewSet(viewsets.ModelViewSet):
         )
 
     def perform_update(self, serializer):
-        """更新服装时记录修改历史"""
-        old_instance = self.get_object()
-        serializer.save()
-        
-        # 记录修改历史
-        designer = get_object_or_404(Designer, user=self.request.user)
-        changes = {}
-        for field in serializer.fields:
-            if field in serializer.validated_data:
-                old_value = getattr(old_instance, field, None)
-                new_value = serializer.validated_data[field]
-                if old_value != new_value:
-                    changes[field] = {
-                        'old': str(old_value),
-                        'new': str(new_value)
-                    }
-        
-        if changes:
-            ClothingHistory.objects.create(
-                clothing=serializer.instance,
-                designer=designer,
-                action='修改',
-                description='更新服装信息',
-                changes=changes
+        """更新服装时记录修改历史，与更新在同一事务中"""
+        instance = serializer.instance
+        before = snapshot(instance, serializer.validated_data)
+        with transaction.atomic():
+            serializer.save()
+            changes = diff(instance, before, serializer.validated_data)
+            if changes:
+                # 设计师本人修改时直接使用已加载的设计师，其他人（授权用户、管理员）记在自己或服装设计师名下
+                if instance.designer.user_id == self.request.user.pk:
+                    designer_id = instance.designer_id
+                else:
+                    designer = get_resolver(self.request).designer
+                    designer_id = designer.pk if designer else instance.designer_id
+                ClothingHistory.objects.create(
+                    clothing=instance,
+                    designer_id=designer_id,
+                    action='修改',
+                    description='更新服装信息',
+                    changes=changes
+                )
+
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        """批量导入服装：JSON 数组或 CSV 文件（file 字段），整批校验，全部通过才写入"""
+        designer = get_object_or_404(Designer, user=request.user)
+        try:
+            if 'file' in request.FILES:
+                rows = parse_csv(request.FILES['file'])
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                raise ValueError('请提交服装数组或上传 CSV 文件')
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = getattr(settings, 'BULK_IMPORT_MAX_ROWS', 10000)
+        if not rows or len(rows) > max_rows:
+            return Response(
+                {'error': f'每次导入 1 到 {max_rows} 件服装'}, status=status.HTTP_400_BAD_REQUEST
             )
+        ids, errors = import_clothes(rows, designer)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'created': len(ids), 'ids': ids}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """批量发布/归档/公开/取消公开/修改分类或季节，只处理有权限的服装"""
+        serializer = ClothingBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            result = bulk_transition(request.user, data['ids'], data['operation'], data.get('value'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
 
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
         """发布服装"""
         clothing = self.get_object()
-        if request.user != clothing.designer.user and not request.user.is_staff:
+        resolver = get_resolver(request)
+        if not resolver.has_perm(clothing, 'publish'):
             return Response(
                 {'error': '只有设计师本人或管理员可以发布服装'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -273,11 +424,10 @@ class ClothingViewSet(viewsets.ModelViewSet):
         clothing.published_at = timezone.now()
         clothing.save()
         
-        # 记录发布历史
-        designer = get_object_or_404(Designer, user=request.user)
+        # 记录发布历史（管理员没有设计师档案时记在服装的设计师名下）
         ClothingHistory.objects.create(
             clothing=clothing,
-            designer=designer,
+            designer=resolver.designer or clothing.designer,
             action='发布',
             description='发布服装'
         )
@@ -286,35 +436,36 @@ class ClothingViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['get'])
     def history(self, request, pk=None):
-        """获取服装修改历史"""
+        """获取服装修改历史（含归档），分页返回"""
         clothing = self.get_object()
-        history = ClothingHistory.objects.filter(clothing=clothing)
-        serializer = ClothingHistorySerializer(history, many=True)
-        return Response(serializer.data)
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(HistoryTimeline(clothing.pk), request, view=self)
+        return paginator.get_paginated_response(page)
 
-    @action(detail=False, methods=['get'])
-    def search(self, request):
-        """高级搜索服装"""
-        query = request.query_params.get('q', '')
-        category = request.query_params.get('category')
-        gender = request.query_params.get('gender')
-        season = request.query_params.get('season')
-        color = request.query_params.get('color')
-        tags = request.query_params.getlist('tags')
-        materials = request.query_params.getlist('materials')
-        
-        queryset = self.get_queryset()
+    def filter_catalog(self, queryset):
+        """按搜索参数过滤服装，search / facets 共用"""
+        params = self.request.query_params
+        query = params.get('q', '')
+        category = params.get('category')
+        category_tree_root = params.get('category__descendants_of')
+        gender = params.get('gender')
+        season = params.get('season')
+        color = params.get('color')
+        tags = params.getlist('tags')
+        materials = params.getlist('materials')
         
         if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) |
-                Q(style_number__icontains=query) |
-                Q(description__icontains=query)
-            )
+            queryset = search_clothes(queryset, query)
+            # 有相关度时游标分页默认按相关度排序
+            if 'rank' in queryset.query.annotations:
+                self.keyset_ordering = '-rank'
         
         if category:
             queryset = queryset.filter(category_id=category)
         
+        if category_tree_root and category_tree_root.isdigit():
+            queryset = in_category_tree(queryset, category_tree_root)
+        
         if gender:
             queryset = queryset.filter(gender=gender)
         
@@ -324,32 +475,98 @@ class ClothingViewSet(viewsets.ModelViewSet):
         if color:
             queryset = queryset.filter(color__icontains=color)
         
+        # 多对多条件用子查询表达，避免 JOIN 产生重复行
         if tags:
-            queryset = queryset.filter(tags__id__in=tags)
+            queryset = queryset.filter(
+                pk__in=Clothing.tags.through.objects.filter(tag_id__in=tags).values('clothing_id')
+            )
         
         if materials:
-            queryset = queryset.filter(materials__id__in=materials)
+            queryset = queryset.filter(
+                pk__in=Clothing.materials.through.objects.filter(material_id__in=materials).values('clothing_id')
+            )
         
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = ClothingListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """高级搜索服装，facets=1 时同时返回分面计数"""
+        queryset = self.filter_catalog(self.get_visible_queryset())
+        facets = None
+        if request.query_params.get('facets') in ('1', 'true'):
+            facets = get_facets(request.user, request.query_params, queryset)
         
-        serializer = ClothingListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        response = self.list_response(queryset)
+        if facets is not None:
+            response.data['facets'] = facets
+        return response
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """分面计数：分类、季节、性别、标签、面料"""
+        queryset = self.filter_catalog(self.get_visible_queryset())
+        return Response(get_facets(request.user, request.query_params, queryset))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """增量同步：since 游标之后新增/修改的服装和删除墓碑；不带 since 时返回当前游标作为起点"""
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': format_cursor(latest_cursor()), 'has_more': False, 'changed': [], 'deleted': []})
+        try:
+            since = parse_cursor(since)
+            limit = min(int(request.query_params.get('limit', 500)), 1000)
+        except ValueError:
+            return Response({'error': '无效的游标或数量'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(changes_since(request.user, since, max(limit, 1), self.get_serializer_context()))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """流式导出服装目录，export_format=ndjson（默认）或 csv，过滤参数与 search 相同"""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'不支持的导出格式，可选: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_catalog(self.get_visible_queryset())
+        content = stream(queryset, export_format)
+        if isinstance(request._request, ASGIRequest):
+            content = astream(content)
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+        filename = f'clothes-{timezone.localdate():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # 关闭 nginx 的代理缓冲，边查边发
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 class ClothingHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     """服装历史视图集"""
-    queryset = ClothingHistory.objects.all()
+    queryset = ClothingHistory.objects.select_related('designer')
     serializer_class = ClothingHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CatalogPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['clothing', 'designer', 'action']
     ordering_fields = ['created_at']
 
+    def list(self, request, *args, **kwargs):
+        """指定 clothing 时返回该服装的完整历史（热表 + 归档），否则只列出未归档的历史"""
+        clothing = request.query_params.get('clothing')
+        if not clothing:
+            return super().list(request, *args, **kwargs)
+        params = request.query_params
+        try:
+            timeline = HistoryTimeline(int(clothing), designer=params.get('designer'), action=params.get('action'))
+        except ValueError:
+            return Response({'error': '无效的服装或设计师 id'}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(timeline, request, view=self)
+        return paginator.get_paginated_response(page)
+
 class UserPermissionViewSet(viewsets.ModelViewSet):
     """用户权限视图集"""
-    queryset = UserPermission.objects.all()
+    queryset = UserPermission.objects.select_related('user', 'clothing', 'granted_by')
     serializer_class = UserPermissionSerializer
     permission_classes = [permissions.IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
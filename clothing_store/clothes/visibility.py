@@ -0,0 +1,59 @@
+"""
+服装可见性规则
+
+"用户 U 可以查看服装 C" 表达为单一谓词：
+公开 OR 设计师本人 OR 存在有效的查看授权 (EXISTS 子查询)。
+不再使用 queryset 的 OR 合并和 DISTINCT，授权子查询走 UserPermission(user, clothing) 唯一索引。
+有效授权：expires_at 为空或晚于当前时间。过期的授权由定时任务 purge_expired_grants 清理（见 retention.py），
+在此之前由查询条件排除；缓存在最早的授权到期时失效（见 cache.cached_visibility_class）。
+"""
+from django.db.models import Exists, Min, OuterRef, Q
+from django.utils import timezone
+
+from .models import Clothing, Designer, UserPermission
+
+
+def unexpired_q(now=None):
+    """授权仍然有效的过滤条件"""
+    return Q(expires_at__isnull=True) | Q(expires_at__gt=now or timezone.now())
+
+
+def active_grants(user):
+    """用户有效的查看授权"""
+    return UserPermission.objects.filter(unexpired_q(), user=user, can_view=True)
+
+
+def next_expiry(user):
+    """用户有效查看授权中最早的过期时间，没有会过期的授权时为 None"""
+    return active_grants(user).aggregate(next=Min('expires_at'))['next']
+
+
+def visible_q(user):
+    """用户可见服装的过滤条件，管理员返回空条件"""
+    if user.is_staff:
+        return Q()
+    q = Q(is_public=True)
+    if user.is_authenticated:
+        q |= Q(designer__user_id=user.pk)
+        q |= Exists(active_grants(user).filter(clothing=OuterRef('pk')))
+    return q
+
+
+def visible_clothes(user, queryset=None):
+    """用户可见的服装查询集"""
+    if queryset is None:
+        queryset = Clothing.objects.all()
+    return queryset.filter(visible_q(user))
+
+
+def visibility_class(user):
+    """可见性类别，用作缓存键的一部分
+
+    管理员共享 'staff'，只能看到公开服装的用户共享 'public'，其余用户各自独立。
+    """
+    if user.is_staff:
+        return 'staff'
+    if not user.is_authenticated:
+        return 'public'
+    has_private = Designer.objects.filter(user=user).exists() or active_grants(user).exists()
+    return f'user:{user.pk}' if has_private else 'public'
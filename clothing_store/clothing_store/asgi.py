@@ -5,6 +5,8 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+可选部署方式: SERVE_ASGI=true gunicorn -c gunicorn.conf.py（uvicorn 工作进程），默认部署为 WSGI
 """
 
 import os
@@ -12,5 +14,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "clothing_store.settings")
+os.environ.setdefault("SERVE_ASGI", "true")
 
 application = get_asgi_application()
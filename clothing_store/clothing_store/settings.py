@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "clothes.metrics.MetricsMiddleware",  # 请求耗时/SQL 指标，放在最前面
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # 静态文件服务
@@ -90,11 +92,11 @@ if DATABASE_URL.startswith('postgresql://'):
         'default': dj_database_url.parse(DATABASE_URL)
     }
 else:
-    # 开发环境使用SQLite
+    # 开发环境使用SQLite，DATABASE_URL=sqlite:///<路径> 可指定其他文件（如基准测试的专用数据库）
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": BASE_DIR / DATABASE_URL.removeprefix('sqlite:///'),
         }
     }
 
@@ -170,6 +172,39 @@ REST_FRAMEWORK = {
 # Redis配置
 REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 
+# 缓存配置
+# 'catalog' 为目录响应缓存的 L2 层：生产环境使用 Redis，开发和测试使用进程内 locmem
+USE_REDIS_CACHE = config('USE_REDIS_CACHE', default=not DEBUG, cast=bool)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'clothes',
+    } if USE_REDIS_CACHE else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalog',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+CATALOG_CACHE_L1_SIZE = config('CATALOG_CACHE_L1_SIZE', default=1000, cast=int)
+FACET_CACHE_TIMEOUT = CATALOG_CACHE_TIMEOUT
+# 进程内参考数据（分类/季节/标签/面料）检查共享版本号的最小间隔（秒），其他进程的变更最多延迟这么久可见
+REFERENCE_CHECK_INTERVAL = config('REFERENCE_CHECK_INTERVAL', default=5, cast=float)
+# 匿名公开页面允许代理缓存的秒数
+PUBLIC_PAGE_MAX_AGE = config('PUBLIC_PAGE_MAX_AGE', default=30, cast=int)
+# 目录导出每个分块的行数（服务端游标每次读取的行数）
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+# 单次批量导入的最大行数
+BULK_IMPORT_MAX_ROWS = config('BULK_IMPORT_MAX_ROWS', default=10000, cast=int)
+# /metrics 的访问令牌（Authorization: Bearer <token>），为空时不校验，由 nginx 禁止外部访问
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# 以 ASGI 运行（可选部署方式，clothing_store/asgi.py 设置），目录 API 的只读请求改在线程池中执行
+SERVE_ASGI = config('SERVE_ASGI', default=False, cast=bool)
+
 # Celery配置
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
@@ -177,6 +212,34 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# 没有 Redis 时（开发、测试）任务在当前进程中同步执行
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not USE_REDIS_CACHE, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# 定时任务
+CELERY_BEAT_SCHEDULE = {
+    'archive-clothing-history': {
+        'task': 'clothes.tasks.archive_clothing_history',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'purge-expired-permissions': {
+        'task': 'clothes.tasks.purge_expired_permissions',
+        'schedule': crontab(minute='*/5'),
+    },
+}
+
+# 服装历史保留天数，更早的历史按块归档（压缩）到 ClothingHistoryArchive
+HISTORY_RETENTION_DAYS = config('HISTORY_RETENTION_DAYS', default=180, cast=int)
+HISTORY_ARCHIVE_CHUNK_SIZE = 1000
+HISTORY_ARCHIVE_MAX_CHUNKS = 50
+
+# 过期授权按块删除；授权到期时缓存立即失效，定时清理只影响表大小和变更日志
+GRANT_PURGE_CHUNK_SIZE = 1000
+GRANT_PURGE_MAX_CHUNKS = 50
+
+# 图片衍生图：尺寸名 -> 最长边像素；格式按优先级排列，Pillow 不支持的格式自动跳过
+IMAGE_VARIANT_SIZES = {'thumb': 320, 'medium': 960}
+IMAGE_VARIANT_FORMATS = ['avif', 'webp', 'jpeg']
 
 # 安全设置
 if not DEBUG:
@@ -19,10 +19,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from clothes.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("clothes.urls")),
     path("api-auth/", include('rest_framework.urls')),
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 # 开发环境下的媒体文件服务
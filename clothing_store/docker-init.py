@@ -13,26 +13,31 @@ import time
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clothing_store.settings')
 
 def wait_for_database():
-    """等待数据库连接就绪"""
+    """等待数据库连接就绪：间隔从 0.1 秒起指数增长（最长 5 秒），超过 DB_WAIT_TIMEOUT 秒（默认 60）放弃"""
     from django.db import connection
     from django.db.utils import OperationalError
     
     print("等待数据库连接...")
-    max_attempts = 30
+    timeout = float(os.environ.get('DB_WAIT_TIMEOUT', 60))
+    deadline = time.monotonic() + timeout
+    delay = 0.1
     attempt = 0
     
-    while attempt < max_attempts:
+    while True:
+        attempt += 1
         try:
-            cursor = connection.cursor()
-            cursor.execute("SELECT 1")
+            connection.ensure_connection()
             print("✅ 数据库连接成功")
             return True
         except OperationalError:
-            attempt += 1
-            print(f"⏳ 等待数据库连接... ({attempt}/{max_attempts})")
-            time.sleep(2)
+            connection.close()
+            if time.monotonic() + delay > deadline:
+                break
+            print(f"⏳ 等待数据库连接... (第 {attempt} 次，{delay:.1f} 秒后重试)")
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
     
-    print("❌ 数据库连接失败")
+    print(f"❌ 数据库连接失败（已等待 {timeout:.0f} 秒）")
     return False
 
 def create_superuser():
@@ -46,93 +51,15 @@ def create_superuser():
         print("ℹ️ 超级用户已存在")
 
 def create_initial_data():
-    """创建初始数据"""
-    from clothes.models import Category, Season, Material, Tag
+    """批量补齐分类、季节、面料、标签，已存在的保持不变，可重复执行"""
+    from clothes.seeding import seed_base_reference
     
-    # 创建分类
-    categories_data = [
-        {'name': '上衣', 'description': '各种上衣类型'},
-        {'name': '裤子', 'description': '各种裤子类型'},
-        {'name': '裙子', 'description': '各种裙子类型'},
-        {'name': '外套', 'description': '各种外套类型'},
-        {'name': '内衣', 'description': '各种内衣类型'},
-        {'name': '配饰', 'description': '各种配饰类型'},
-    ]
-    
-    for data in categories_data:
-        category, created = Category.objects.get_or_create(
-            name=data['name'],
-            defaults={'description': data['description']}
-        )
-        if created:
-            print(f"✅ 创建分类: {category.name}")
-        else:
-            print(f"ℹ️ 分类已存在: {category.name}")
-    
-    # 创建季节
-    seasons_data = [
-        {'name': '春季', 'description': '春季服装'},
-        {'name': '夏季', 'description': '夏季服装'},
-        {'name': '秋季', 'description': '秋季服装'},
-        {'name': '冬季', 'description': '冬季服装'},
-        {'name': '四季', 'description': '四季通用服装'},
-    ]
-    
-    for data in seasons_data:
-        season, created = Season.objects.get_or_create(
-            name=data['name'],
-            defaults={'description': data['description']}
-        )
-        if created:
-            print(f"✅ 创建季节: {season.name}")
-        else:
-            print(f"ℹ️ 季节已存在: {season.name}")
-    
-    # 创建面料
-    materials_data = [
-        {'name': '棉质', 'description': '天然棉质面料'},
-        {'name': '丝绸', 'description': '天然丝绸面料'},
-        {'name': '羊毛', 'description': '天然羊毛面料'},
-        {'name': '聚酯纤维', 'description': '合成纤维面料'},
-        {'name': '尼龙', 'description': '合成尼龙面料'},
-        {'name': '牛仔布', 'description': '牛仔面料'},
-        {'name': '针织', 'description': '针织面料'},
-        {'name': '蕾丝', 'description': '蕾丝面料'},
-    ]
-    
-    for data in materials_data:
-        material, created = Material.objects.get_or_create(
-            name=data['name'],
-            defaults={'description': data['description']}
-        )
+    for model, created in seed_base_reference().items():
+        label = model._meta.verbose_name
         if created:
-            print(f"✅ 创建面料: {material.name}")
+            print(f"✅ 创建{label}: {', '.join(created)}")
         else:
-            print(f"ℹ️ 面料已存在: {material.name}")
-    
-    # 创建标签
-    tags_data = [
-        {'name': '时尚', 'color': '#FF6B6B'},
-        {'name': '经典', 'color': '#4ECDC4'},
-        {'name': '休闲', 'color': '#45B7D1'},
-        {'name': '商务', 'color': '#96CEB4'},
-        {'name': '运动', 'color': '#FFEAA7'},
-        {'name': '优雅', 'color': '#DDA0DD'},
-        {'name': '可爱', 'color': '#FFB6C1'},
-        {'name': '复古', 'color': '#DEB887'},
-        {'name': '简约', 'color': '#F0F8FF'},
-        {'name': '奢华', 'color': '#FFD700'},
-    ]
-    
-    for data in tags_data:
-        tag, created = Tag.objects.get_or_create(
-            name=data['name'],
-            defaults={'color': data['description']}
-        )
-        if created:
-            print(f"✅ 创建标签: {tag.name}")
-        else:
-            print(f"ℹ️ 标签已存在: {tag.name}")
+            print(f"ℹ️ {label}已全部存在")
 
 def main():
     """主函数"""
@@ -140,13 +67,13 @@ def main():
     print("=" * 50)
     
     try:
+        # 设置Django（只加载配置，不连接数据库）
+        django.setup()
+        
         # 等待数据库连接
         if not wait_for_database():
             sys.exit(1)
         
-        # 设置Django
-        django.setup()
-        
         # 创建初始数据
         create_initial_data()
         create_superuser()
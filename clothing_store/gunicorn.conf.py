@@ -0,0 +1,42 @@
+"""
+gunicorn 配置
+
+用法: gunicorn -c gunicorn.conf.py
+- SERVE_ASGI: 默认 false，同步工作进程运行 clothing_store.wsgi:application（默认部署方式）；
+  设为 true 时改用 uvicorn 工作进程运行 clothing_store.asgi:application。
+  在 SQLite 上的对比中 ASGI 吞吐低于 WSGI，在 PostgreSQL 上测得收益（benchmark_asgi）之前不要默认启用
+- WEB_CONCURRENCY: 工作进程数，默认 3
+- ASGI_THREADS: ASGI 下每个进程执行同步代码的线程池大小（见 clothes/concurrency.py），
+  CONN_MAX_AGE > 0 时每个线程各持有一个数据库连接，应小于数据库允许的连接数 / 进程数
+- PROMETHEUS_MULTIPROC_DIR: 各工作进程写入指标的目录（见 clothes/metrics.py），启动时清空
+"""
+import os
+import shutil
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/clothing_store_metrics')
+
+if os.environ.get('SERVE_ASGI', '').lower() in ('1', 'true', 'yes', 'on'):
+    wsgi_app = 'clothing_store.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'clothing_store.wsgi:application'
+    worker_class = 'sync'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # 清除上次运行遗留的指标文件
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)